@@ -0,0 +1,111 @@
+import asyncio
+import json
+import logging
+import os
+import time
+from typing import Callable, Dict, Optional
+
+from metrics import registry
+
+logger = logging.getLogger("KENET-ADMISSION")
+
+# ==========================================
+#      KABUL KONTROLÜ (429 / Retry-After)
+# ==========================================
+# Her iş yükü sınıfının (ingest, interactive) eşzamanlı istek sınırı vardır.
+# Sınır doluyken gelen istek en fazla ADMISSION_MAX_WAIT_MS bekler; süre dolarsa
+# ya da bekleyen sayısı ADMISSION_MAX_QUEUE'yu aşarsa gövde okunmadan 429 döner.
+# Böylece bir yoldaki taşma diğerlerini zaman aşımına sürüklemez, süreç
+# öngörülebilir biçimde yük atar.
+
+ADMISSION_INGEST_CONCURRENCY = int(os.getenv("ADMISSION_INGEST_CONCURRENCY", "256"))
+ADMISSION_INTERACTIVE_CONCURRENCY = int(os.getenv("ADMISSION_INTERACTIVE_CONCURRENCY", "64"))
+ADMISSION_MAX_WAIT_MS = int(os.getenv("ADMISSION_MAX_WAIT_MS", "200"))
+ADMISSION_MAX_QUEUE = int(os.getenv("ADMISSION_MAX_QUEUE", "1024"))
+ADMISSION_RETRY_AFTER_SEC = int(os.getenv("ADMISSION_RETRY_AFTER_SEC", "1"))
+# Ingest tamponunda bu kadar satır yazılmayı beklerken yeni sinyal kabul edilmez
+ADMISSION_INGEST_BACKLOG = int(os.getenv("ADMISSION_INGEST_BACKLOG", "20000"))
+
+ADMISSION_WAIT_SECONDS = registry.histogram(
+    "kenet_admission_wait_seconds", "Kabul kuyruğunda beklenen süre.", ("gate",))
+ADMISSION_REJECTED = registry.counter(
+    "kenet_admission_rejected_total", "429 ile reddedilen istekler (queue_full / wait_timeout / backlog).", ("gate", "reason"))
+
+class Overloaded(Exception):
+    def __init__(self, reason: str):
+        super().__init__(reason)
+        self.reason = reason
+
+class AdmissionGate:
+    def __init__(self, name: str, concurrency: int, max_wait_ms: int = ADMISSION_MAX_WAIT_MS,
+                 max_queue: int = ADMISSION_MAX_QUEUE, backlog: Optional[Callable[[], bool]] = None):
+        self.name = name
+        self.concurrency = concurrency
+        self.max_wait_sec = max_wait_ms / 1000
+        self.max_queue = max_queue
+        # Ek geri basınç: True dönerse (örn. ingest tamponu dolu) yeni istek alınmaz
+        self.backlog = backlog
+        self._sem = asyncio.Semaphore(concurrency)
+        self.in_flight = 0
+        self.waiting = 0
+
+    async def acquire(self):
+        if self.backlog is not None and self.backlog():
+            raise Overloaded("backlog")
+        if self._sem.locked():
+            if self.waiting >= self.max_queue:
+                raise Overloaded("queue_full")
+            start = time.perf_counter()
+            self.waiting += 1
+            try:
+                await asyncio.wait_for(self._sem.acquire(), self.max_wait_sec)
+            except asyncio.TimeoutError:
+                raise Overloaded("wait_timeout")
+            finally:
+                self.waiting -= 1
+                ADMISSION_WAIT_SECONDS.observe(time.perf_counter() - start, self.name)
+        else:
+            await self._sem.acquire()
+        self.in_flight += 1
+
+    def release(self):
+        self.in_flight -= 1
+        self._sem.release()
+
+    def stats(self) -> Dict:
+        return {'in_flight': self.in_flight, 'waiting': self.waiting, 'concurrency': self.concurrency}
+
+class AdmissionMiddleware:
+    """
+    Saf ASGI ara katmanı. classify(path) istek için kapı adını döner;
+    None dönen yollar (probelar, /metrics, SSE akışı) sınırlanmaz.
+    """
+    def __init__(self, app, gates: Dict[str, AdmissionGate], classify: Callable[[str], Optional[str]]):
+        self.app = app
+        self.gates = gates
+        self.classify = classify
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        gate = self.gates.get(self.classify(scope["path"]))
+        if gate is None:
+            return await self.app(scope, receive, send)
+        try:
+            await gate.acquire()
+        except Overloaded as e:
+            ADMISSION_REJECTED.inc(gate.name, e.reason)
+            return await self._reject(send, e.reason)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            gate.release()
+
+    async def _reject(self, send, reason: str):
+        body = json.dumps({"detail": "Sunucu yoğun, lütfen tekrar deneyin.", "reason": reason}).encode()
+        await send({"type": "http.response.start", "status": 429, "headers": [
+            (b"content-type", b"application/json"),
+            (b"retry-after", str(ADMISSION_RETRY_AFTER_SEC).encode()),
+            (b"content-length", str(len(body)).encode()),
+        ]})
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,147 @@
+import asyncio
+import json
+import logging
+import math
+import os
+import time
+from typing import Awaitable, Callable, Dict, Optional, Set
+
+from metrics import registry
+
+logger = logging.getLogger("KENET-ALERT")
+
+# ==========================================
+#      ERKEN UYARI DAĞITIMI (kullanıcı başına SSE)
+# ==========================================
+# Olay onaylanınca (her workerda deliver_event) merkez üssüne ALERT_RADIUS_KM
+# içindeki aktif kullanıcılar users.location'dan yakından uzağa çekilir. Her
+# alıcı için S dalgasının tahmini varış süresi hesaplanır ve uyarı, bu workera
+# /alerts/stream ile bağlı olan kullanıcının kuyruğuna yazılır. Alıcılar
+# ALERT_BATCH_SIZE'lık gruplar halinde işlenir; gruplar arasında olay döngüsüne
+# dönülür ki en acil grubun soketleri bir sonraki grup hazırlanırken yazılsın.
+
+ALERT_RADIUS_KM = float(os.getenv("ALERT_RADIUS_KM", "150"))
+ALERT_ACTIVE_MINUTES = int(os.getenv("ALERT_ACTIVE_MINUTES", "60"))
+ALERT_BATCH_SIZE = int(os.getenv("ALERT_BATCH_SIZE", "2000"))
+ALERT_QUEUE_SIZE = 16
+
+S_WAVE_KM_S = 3.5       # Kabuk içi ortalama S dalgası hızı
+HYPOCENTER_DEPTH_KM = 10.0  # Derinlik bilinmiyor: sığ deprem varsayımı
+# Onay anında depremin üzerinden geçtiği tahmini süre (telefonların sarsıntıyı
+# algılaması + sinyal + füzyon tick'i). Varış süresi bundan düşülür.
+ORIGIN_LAG_SEC = float(os.getenv("ALERT_ORIGIN_LAG_SEC", "4"))
+
+ALERT_FANOUT_SECONDS = registry.histogram(
+    "kenet_alert_fanout_seconds", "Uyarı dağıtım aşamaları (query / push / total).", ("stage",))
+ALERTS_SENT = registry.counter(
+    "kenet_alerts_total", "Uyarı alıcıları (sent / offline / dropped).", ("result",))
+
+def s_wave_eta_sec(distance_km: float, elapsed_sec: float) -> float:
+    """Merkez üssüne yüzey mesafesi distance_km olan noktaya S dalgasının kalan varış süresi."""
+    return max(0.0, math.hypot(distance_km, HYPOCENTER_DEPTH_KM) / S_WAVE_KM_S - elapsed_sec)
+
+class AlertHub:
+    """
+    user_id -> açık /alerts/stream kuyruğu. Kullanıcı başına tek kanal (son bağlanan geçerli);
+    connect yalnızca imzası doğrulanmış istemci için çağrılmalı, yoksa herkes kanalı devralır.
+    """
+    def __init__(self, queue_size: int = ALERT_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self.channels: Dict[str, asyncio.Queue] = {}
+
+    def __len__(self) -> int:
+        return len(self.channels)
+
+    def connect(self, user_id: str) -> asyncio.Queue:
+        q: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        old = self.channels.get(user_id)
+        self.channels[user_id] = q
+        if old is not None:
+            # Önceki bağlantı (yeniden bağlanan istemci) kapansın
+            self._close(old)
+        return q
+
+    def disconnect(self, user_id: str, q: asyncio.Queue):
+        if self.channels.get(user_id) is q:
+            del self.channels[user_id]
+
+    def push(self, user_id: str, frame: bytes) -> Optional[bool]:
+        """None: bağlı değil, False: kuyruğu dolu (düşürüldü), True: iletildi."""
+        q = self.channels.get(user_id)
+        if q is None: return None
+        try:
+            q.put_nowait(frame)
+            return True
+        except asyncio.QueueFull:
+            del self.channels[user_id]
+            self._close(q)
+            return False
+
+    @staticmethod
+    def _close(q: asyncio.Queue):
+        while not q.empty(): q.get_nowait()
+        q.put_nowait(None)
+
+class AlertFanout:
+    def __init__(self, fetch_recipients: Callable[..., Awaitable], hub: AlertHub,
+                 radius_km: float = ALERT_RADIUS_KM, batch_size: int = ALERT_BATCH_SIZE):
+        self.fetch_recipients = fetch_recipients
+        self.hub = hub
+        self.radius_km = radius_km
+        self.batch_size = batch_size
+        self.last: Dict = {}
+        self._tasks: Set[asyncio.Task] = set()
+
+    def dispatch_soon(self, event: Dict):
+        """deliver_event senkron: dağıtımı görev olarak başlat, onay anını şimdi al."""
+        task = asyncio.create_task(self.dispatch(event, time.monotonic()))
+        self._tasks.add(task)
+        task.add_done_callback(self._done)
+
+    def _done(self, task: asyncio.Task):
+        self._tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(f"Uyarı dağıtımı başarısız: {task.exception()}")
+
+    async def dispatch(self, event: Dict, confirmed_at: float) -> Dict:
+        stats = {'event_id': event['id'], 'recipients': 0, 'sent': 0, 'offline': 0, 'dropped': 0}
+        if not self.hub.channels:
+            # Bu workera bağlı kimse yok: sorguya gerek yok
+            self.last = stats
+            return stats
+        t0 = time.monotonic()
+        rows = await self.fetch_recipients(event['latitude'], event['longitude'], self.radius_km, ALERT_ACTIVE_MINUTES)
+        t1 = time.monotonic()
+        ALERT_FANOUT_SECONDS.observe(t1 - t0, "query")
+
+        # Ortak alanlar bir kez kodlanır, alıcıya özel kısım sona eklenir
+        prefix = ("event: alert\ndata: " + json.dumps({
+            'event_id': event['id'], 'latitude': event['latitude'], 'longitude': event['longitude'],
+            'intensity_label': event['intensity_label'], 'max_pga': event['max_pga'],
+        }, ensure_ascii=False)[:-1]).encode()
+        channels = self.hub.channels
+        push = self.hub.push
+        sent = dropped = 0
+        for start in range(0, len(rows), self.batch_size):
+            # Rotadaki bekleme de varış süresinden düşülsün
+            elapsed = time.monotonic() - confirmed_at + ORIGIN_LAG_SEC
+            for r in rows[start:start + self.batch_size]:
+                uid = r['user_id']
+                if uid not in channels: continue
+                d = r['distance_km']
+                ok = push(uid, prefix + b', "eta_sec": %.1f, "distance_km": %.1f}\n\n' % (s_wave_eta_sec(d, elapsed), d))
+                if ok: sent += 1
+                else: dropped += 1
+            await asyncio.sleep(0)
+        t2 = time.monotonic()
+        ALERT_FANOUT_SECONDS.observe(t2 - t1, "push")
+        ALERT_FANOUT_SECONDS.observe(t2 - confirmed_at, "total")
+
+        stats.update(recipients=len(rows), sent=sent, dropped=dropped, offline=len(rows) - sent - dropped,
+                     query_ms=round((t1 - t0) * 1000, 1), total_ms=round((t2 - confirmed_at) * 1000, 1))
+        ALERTS_SENT.inc("sent", amount=sent)
+        ALERTS_SENT.inc("dropped", amount=dropped)
+        ALERTS_SENT.inc("offline", amount=stats['offline'])
+        self.last = stats
+        logger.warning(f"📣 Uyarı #{event['id']}: {sent}/{len(rows)} alıcıya {stats['total_ms']} ms içinde iletildi.")
+        return stats
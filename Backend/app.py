@@ -1,14 +1,47 @@
-from fastapi import FastAPI, HTTPException, BackgroundTasks
-from typing import List
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.exceptions import RequestValidationError
+from pydantic import ValidationError
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
+from typing import Dict, List, Optional
+from datetime import datetime
+import asyncio
+import json
+import os
 from models import *
 from database import *
-from utils import generate_user_keys, generate_otp, send_real_sms_via_provider
-from crypto_utils import decrypt_gateway_message
+from utils import generate_user_keys, generate_otp, verify_alert_stream_signature
+from crypto_utils import decrypt_gateway_bytes_async, decrypt_gateway_message_async
+from signal_index import SignalIndex
+from ingest_buffer import SignalIngestBuffer
+from fusion_scheduler import FusionScheduler, EventDedup
+from density_map import ActiveUserDensity
+from fusion_cluster import cluster_signals
+from event_broadcaster import broadcaster, encode_sse, stream_events
+from response_cache import response_cache
+from sms_dispatcher import SmsDispatcher
+from packet_dedup import DONE, IN_FLIGHT, SeenPacketFilter
+from user_cache import user_cache
+from location_buffer import LocationBuffer
+from metrics import MetricsMiddleware, registry
+from admission import (AdmissionGate, AdmissionMiddleware, ADMISSION_INGEST_CONCURRENCY,
+                       ADMISSION_INTERACTIVE_CONCURRENCY, ADMISSION_INGEST_BACKLOG)
+from coordination import coordinator
+from alert_fanout import AlertFanout, AlertHub
+from wire_format import (GATEWAY_CONTENT_TYPE, SIGNAL_CONTENT_TYPE, WireFormatError,
+                         decode_gateway, decode_signals, inflate, media_type)
 import logging
+import math
+import time
+try:
+    import orjson
+except ImportError:  # FAST_JSON isteğe bağlıdır
+    orjson = None
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 
 # YANINDAKİ DOSYADAN İMPORT EDİYORUZ (Klasör adı yok)
-from kandilli_service import fetch_and_store_kandilli_data
+from kandilli_service import fetch_and_store_kandilli_data, close_kandilli_session
+from partitions import maintain_partitions
 
 # Loglama Ayarları
 logging.basicConfig(level=logging.INFO)
@@ -24,33 +57,235 @@ FUSION_RADIUS_KM = 20       # Analiz yarıçapı
 FUSION_TIME_WINDOW_SEC = 30 # Son 30 saniye
 MIN_SIGNAL_COUNT = 1        # Test için 1
 MAX_REALISTIC_PGA = 5.0     # Filtre (2.5 olacak)
+MAX_SIGNAL_BATCH = 1000     # /signals/batch başına en fazla okuma
+EVENT_DEDUP_MINUTES = 5     # Aynı bölgede tekrar olay açılmaz
 
 # Zamanlayıcı
 scheduler = AsyncIOScheduler()
 
+# Son FUSION_TIME_WINDOW_SEC saniyelik sinyallerin bellek içi indeksi
+signal_index = SignalIndex(FUSION_TIME_WINDOW_SEC)
+
+# /signal yazmalarını biriktirip toplu yazan tampon (INGEST_* ortam değişkenleri)
+ingest_buffer = SignalIngestBuffer()
+
+# Konum güncellemelerini birleştirip periyodik toplu yazan tampon
+location_buffer = LocationBuffer()
+
+# Aynı bölge için tekrar olay oluşmasını engelleyen bellek içi kontrol
+event_dedup = EventDedup(FUSION_RADIUS_KM, EVENT_DEDUP_MINUTES * 60)
+
+# Gateway SMS'lerini arka planda gönderen kuyruk (SMS_* ortam değişkenleri)
+sms_dispatcher = SmsDispatcher()
+
+# Yakın zamanda görülen gateway paketleri (mesh tekrarları için)
+seen_packets = SeenPacketFilter()
+
+# Son 1 saatte görülen kullanıcıların hücre bazlı sayaçları (füzyon paydası)
+active_users = ActiveUserDensity()
+
+# /alerts/stream ile bağlı kullanıcılar ve onaylanan olayda onlara erken uyarı dağıtımı
+alert_hub = AlertHub()
+alert_fanout = AlertFanout(get_alert_recipients, alert_hub)
+
+# ==========================================
+#      KABUL KONTROLÜ (ADMISSION_* ortam değişkenleri)
+# ==========================================
+# Sinyal/konum akışı ile kullanıcı API'leri ayrı kapılardan geçer (ayrı DB havuzları
+# gibi): deprem anındaki sinyal seli OTP/rehber isteklerini bekletmez, sınır
+# aşılınca istek kuyrukta birikmek yerine 429 + Retry-After alır.
+
+INGEST_PATHS = {"/signal", "/signals/batch", "/update_location"}
+UNGATED_PATHS = {"/healthz", "/readyz", "/metrics", "/events/stream", "/alerts/stream"}
+
+admission_gates = {
+    'ingest': AdmissionGate('ingest', ADMISSION_INGEST_CONCURRENCY,
+                            backlog=lambda: ingest_buffer.queue_depth >= ADMISSION_INGEST_BACKLOG),
+    'interactive': AdmissionGate('interactive', ADMISSION_INTERACTIVE_CONCURRENCY),
+}
+
+def classify_request(path: str) -> Optional[str]:
+    if path in UNGATED_PATHS: return None
+    return 'ingest' if path in INGEST_PATHS else 'interactive'
+
+# Sıra önemli: son eklenen en dışta çalışır, 429'lar da /metrics'e yansır
+app.add_middleware(AdmissionMiddleware, gates=admission_gates, classify=classify_request)
+app.add_middleware(MetricsMiddleware)
+
+# ==========================================
+#      METRİKLER (/metrics)
+# ==========================================
+
+FUSION_CLUSTERS = registry.counter(
+    "kenet_fusion_clusters_total", "Değerlendirilen kümeler (below_min / below_ratio / duplicate / confirmed).", ("outcome",))
+registry.counter_callback("kenet_fusion_ticks_total", "Füzyon tick sayısı.", lambda: fusion_scheduler.ticks)
+registry.counter_callback("kenet_fusion_dirty_cells_total", "Değerlendirmeye giren kirli hücreler.", lambda: fusion_scheduler.evaluations)
+registry.gauge_callback("kenet_background_queue_depth", "Arka plan kuyruklarında bekleyen iş.", lambda: {
+    ("signal_ingest",): ingest_buffer.queue_depth,
+    ("location",): location_buffer.stats()['pending'],
+    ("fusion",): fusion_scheduler.queue_depth,
+    ("sms",): sms_dispatcher.stats()['queue_depth'],
+}, ("queue",))
+registry.gauge_callback("kenet_admission_in_flight", "Kapı başına işlenen istekler.", lambda: {
+    (name,): g.in_flight for name, g in admission_gates.items()
+}, ("gate",))
+registry.gauge_callback("kenet_admission_waiting", "Kapı başına kabul için bekleyen istekler.", lambda: {
+    (name,): g.waiting for name, g in admission_gates.items()
+}, ("gate",))
+registry.gauge_callback("kenet_fusion_leader", "Bu worker füzyon lideri mi (1/0).", lambda: int(coordinator.is_leader))
+registry.gauge_callback("kenet_coordination_outbox", "NOTIFY ile yayınlanmayı bekleyen sinyal/konum kayıtları.", lambda: coordinator.stats()['outbox'])
+registry.gauge_callback("kenet_signal_index_size", "Bellek içi füzyon penceresindeki sinyaller.", lambda: len(signal_index))
+registry.gauge_callback("kenet_sse_subscribers", "Bağlı /events/stream istemcileri.", lambda: broadcaster.subscriber_count)
+registry.gauge_callback("kenet_alert_subscribers", "Bağlı /alerts/stream kullanıcıları.", lambda: len(alert_hub))
+registry.counter_callback("kenet_sms_total", "Gateway SMS sonuçları.", lambda: {
+    (k,): v for k, v in sms_dispatcher.stats().items() if k != 'queue_depth'
+}, ("result",))
+registry.counter_callback("kenet_cache_requests_total", "Önbellek isabetleri / ıskalamaları.", lambda: {
+    ("user", "hit"): user_cache.hits, ("user", "miss"): user_cache.misses,
+    ("response", "hit"): response_cache.hits, ("response", "miss"): response_cache.misses,
+}, ("cache", "result"))
+
 # ==========================================
 #      BAŞLANGIÇ VE KAPANIŞ
 # ==========================================
 
+async def seed_fusion_state():
+    """Füzyon liderliği alınınca: tekilleştirme ve aktif kullanıcı haritasını DB'den doldur."""
+    for ev in await get_recent_app_detected_events(EVENT_DEDUP_MINUTES):
+        event_dedup.seed(ev['latitude'], ev['longitude'], float(ev['age_sec']))
+    rows = await get_active_user_locations(hours=1)
+    now = time.monotonic()
+    active_users.seed((u['user_id'], u['latitude'], u['longitude'], now - float(u['age_sec'])) for u in rows)
+
+def reset_fusion_state():
+    """Liderlik kaybedilince bu worker füzyon yapmaz: bellek içi pencereyi boşalt."""
+    signal_index.clear()
+    fusion_scheduler.clear()
+
+def leader_only(job):
+    """Zamanlanmış işi sadece füzyon liderinde çalıştırır (tek süreçte her zaman)."""
+    async def run():
+        if coordinator.is_leader:
+            await job()
+    return run
+
+# Hazırlık durumu (/readyz): DB bağlanıp ısınana kadar trafik alınmaz
+startup_state = {'phase': 'starting', 'ready': False, 'error': None, 'ready_ms': None}
+BOOTSTRAP_RETRY_MAX_SEC = 30
+_process_start = time.monotonic()
+_bootstrap_task: Optional[asyncio.Task] = None
+
+async def bootstrap():
+    """
+    Yavaş açılış işleri (DB bağlantısı + ısınma, füzyon durumu, SMS kuyruğu)
+    istek kabulünü bekletmeden arka planda yapılır. Başarısız adım (DB yok, bağlantı
+    sonrası kopma, eksik kolon) üstel geri çekilmeyle tekrar denenir; hata
+    /readyz'de görünür. Kandilli ilk çekimi zamanlayıcıya bırakılır.
+    """
+    steps = [
+        ('connecting_db', connect_db),
+        # Tek süreçte hemen lider olunur; postgres modunda seçim arka planda yapılır
+        ('starting_coordination', coordinator.start),
+        ('starting_sms', sms_dispatcher.start),
+    ]
+    delay = 1
+    for phase, step in steps:
+        startup_state['phase'] = phase
+        while True:
+            try:
+                await step()
+                break
+            except Exception as e:
+                startup_state['error'] = f"{phase}: {e}"
+                logger.error(f"❌ Açılış adımı başarısız ({phase}), {delay} sn sonra tekrar: {e}")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, BOOTSTRAP_RETRY_MAX_SEC)
+
+    # Zamanlayıcı işleri: ilk çalıştırmalar da arka planda (next_run_time=şimdi)
+    scheduler.add_job(leader_only(fetch_and_store_kandilli_data), 'interval', seconds=60, next_run_time=datetime.now())
+    # seismic_signals saatlik bölümleri (python partitions.py migrate sonrası)
+    scheduler.add_job(leader_only(maintain_partitions), 'interval', minutes=30, next_run_time=datetime.now())
+
+    startup_state.update(phase='ready', ready=True, error=None, ready_ms=round((time.monotonic() - _process_start) * 1000, 1))
+    logger.info(f"🚀 Sistem hazır ({startup_state['ready_ms']} ms).")
+
 @app.on_event("startup")
 async def startup_event():
-    await connect_db()
-    logger.info("✅ Veritabanı bağlantısı başarılı.")
-
-    # Zamanlayıcıyı başlat (60 saniyede bir yan dosyayı çalıştır)
-    scheduler.add_job(fetch_and_store_kandilli_data, 'interval', seconds=60)
+    global _bootstrap_task
+    # DB gerektirmeyen bileşenler hemen başlar
+    await ingest_buffer.start()
+    await location_buffer.start()
+    await fusion_scheduler.start()
+    # Hücreleri ve pencereden çıkan kullanıcıların kodlarını temizler
+    scheduler.add_job(signal_index.prune_user_codes, 'interval', seconds=FUSION_TIME_WINDOW_SEC)
+    scheduler.add_job(active_users.expire, 'interval', seconds=60)
     scheduler.start()
-
-    # İlk sefer hemen çalıştır
-    await fetch_and_store_kandilli_data()
-    logger.info("🚀 Kandilli Takip Servisi Başlatıldı.")
+    _bootstrap_task = asyncio.create_task(bootstrap())
 
 @app.on_event("shutdown")
 async def shutdown_event():
+    if _bootstrap_task and not _bootstrap_task.done():
+        _bootstrap_task.cancel()
     scheduler.shutdown()
+    await fusion_scheduler.stop()
+    await coordinator.stop()
+    await sms_dispatcher.stop()
+    try:
+        await ingest_buffer.stop()
+        await location_buffer.stop()
+    except Exception as e:
+        logger.error(f"Kapanışta tamponlar yazılamadı: {e}")
+    await close_kandilli_session()
     await close_db()
     logger.info("🛑 Sistem kapatıldı.")
 
+@app.get("/healthz")
+async def healthz_endpoint():
+    # Canlılık: süreç ve olay döngüsü cevap veriyor (DB'ye bakılmaz)
+    return {"status": "ok"}
+
+@app.get("/readyz")
+async def readyz_endpoint():
+    # Hazırlık: açılış tamamlandı ve DB şu an cevap veriyor
+    db_ok = await ping_db() if startup_state['ready'] else False
+    body = {"ready": startup_state['ready'] and db_ok, "phase": startup_state['phase'], "db": db_ok,
+            "error": startup_state['error'], "ready_ms": startup_state['ready_ms']}
+    return JSONResponse(body, status_code=200 if body['ready'] else 503)
+
+# ==========================================
+#      İSTEK GÖVDESİ (JSON / ikili biçim, wire_format.py)
+# ==========================================
+# /signal, /signals/batch ve /send_gateway_sms gövdeyi kendisi okur: Content-Type
+# ikili biçimse model kurulmadan doğrudan çözülür, değilse eski JSON modeliyle
+# doğrulanır (hata yanıtı FastAPI'nin 422 biçimiyle aynı).
+
+def request_body_doc(model, binary_type: str) -> Dict:
+    """OpenAPI: gövde Request'ten okunduğu için şema elle verilir."""
+    return {"requestBody": {"required": True, "content": {
+        "application/json": {"schema": model.model_json_schema()},
+        binary_type: {"schema": {"type": "string", "format": "binary"}},
+    }}}
+
+async def read_body(http_request: Request, model, binary_type: str):
+    """
+    İkili biçimde (açılmış) ham baytları, JSON'da doğrulanmış modeli döner.
+    Content-Encoding her iki biçimde de açılır: sıkıştırılmış JSON model hatası vermesin.
+    """
+    body = decode_binary(inflate, await http_request.body(), http_request.headers.get("content-encoding"))
+    if media_type(http_request.headers.get("content-type")) == binary_type:
+        return body
+    try:
+        return model.model_validate_json(body)
+    except ValidationError as e:
+        errors = [{**err, 'loc': ('body', *err['loc'])} for err in e.errors(include_url=False)]
+        raise RequestValidationError(errors, body=body)
+
+def decode_binary(fn, *args):
+    try:
+        return fn(*args)
+    except WireFormatError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
 # ==========================================
 #      KULLANICI VE OTP İŞLEMLERİ
 # ==========================================
@@ -65,7 +300,8 @@ async def request_otp_endpoint(request: RequestOtpRequest):
 
 @app.post("/verify_otp", response_model=VerifyOtpResponse)
 async def verify_otp_endpoint(request: VerifyOtpRequest):
-    user = await get_user_by_phone(request.phone_number)
+    # OTP başka bir workerda üretilmiş olabilir: kod ve anahtarlar her zaman DB'den
+    user = await get_user_by_phone(request.phone_number, fresh=True)
     if not user or str(user.get('verification_code')) != str(request.code):
         raise HTTPException(status_code=401, detail="Hatalı doğrulama kodu.")
     current_priv = user.get('ibe_private_key')
@@ -91,7 +327,16 @@ async def complete_profile_endpoint(request: CompleteProfileRequest):
 
 @app.post("/update_location", response_model=StatusResponse)
 async def update_location_endpoint(request: UpdateLocationRequest):
-    await update_user_location(request.user_id, request.latitude, request.longitude)
+    error = user_id_error(request.user_id)
+    if error: raise HTTPException(status_code=400, detail=error)
+    error = coordinate_error(request.latitude, request.longitude)
+    if error: raise HTTPException(status_code=400, detail=error)
+    uid = request.user_id.strip()
+    # Yoğunluk haritası füzyonun paydası: yalnızca kayıtlı kullanıcılar sayılır
+    if not await get_user_by_id(uid):
+        raise HTTPException(status_code=404, detail="Kullanıcı bulunamadı.")
+    location_buffer.update(uid, request.latitude, request.longitude)
+    coordinator.submit_location(uid, request.latitude, request.longitude)
     return StatusResponse(message="Konum güncellendi.")
 
 # ==========================================
@@ -101,31 +346,63 @@ async def update_location_endpoint(request: UpdateLocationRequest):
 @app.post("/check_contacts", response_model=CheckContactsResponse)
 async def check_contacts_endpoint(request: CheckContactsRequest):
     rows = await get_registered_users_details(request.phone_numbers)
-    users = [RegisteredUserItem(user_id=r['user_id'], phone_number=r['phone_number'], display_name=r['display_name'] or "", blood_type=r['blood_type'], public_key=r['public_params'], latitude=r['latitude'], longitude=r['longitude']) for r in rows]
-    return CheckContactsResponse(registered_users=users)
+    return json_response({"registered_users": [registered_user_item(r) for r in rows]})
 
 @app.post("/sync_contacts", response_model=SyncContactsResponse)
 async def sync_contacts_endpoint(request: SyncContactsRequest):
     rows = await get_user_contacts(request.user_id)
-    contacts = [SyncContactItem(contact_id=r['contact_id'], phone_number=r['phone_number'], display_name=r['display_name'], latitude=r['latitude'], longitude=r['longitude'], public_key=r['public_params']) for r in rows]
-    return SyncContactsResponse(contacts=contacts)
+    return json_response({"contacts": [sync_contact_item(r) for r in rows]})
 
 @app.post("/delete_contact", response_model=StatusResponse)
 async def delete_contact_endpoint(request: DeleteContactRequest):
     await delete_contact_from_db(request.owner_phone, request.contact_phone)
     return StatusResponse(message="Silindi.")
 
-@app.post("/send_gateway_sms", response_model=StatusResponse)
-async def send_gateway_sms_endpoint(request: GatewaySmsRequest):
-    if await is_sms_processed(request.packet_uid): return StatusResponse(message="Duplicate.")
-    sender_user = await get_user_by_id(request.sender_id)
-    if not sender_user: return StatusResponse(message="User not found.")
-    plaintext_msg = decrypt_gateway_message(request.encrypted_payload, request.nonce, request.ephemeral_key, request.integrity_tag)
-    if "HATASI" in plaintext_msg: return StatusResponse(message="Decryption Failed")
-    final_msg = f"{plaintext_msg}\n--\nKimden: {sender_user['phone_number']} (KENET)"
-    provider_resp = await send_real_sms_via_provider(request.target_phone, final_msg)
-    await log_sms_attempt(request.packet_uid, sender_user['phone_number'], request.target_phone, "ENCRYPTED", "SENT", provider_resp)
-    return StatusResponse(message="Secure SMS Sent.")
+@app.post("/send_gateway_sms", response_model=StatusResponse, openapi_extra=request_body_doc(GatewaySmsRequest, GATEWAY_CONTENT_TYPE))
+async def send_gateway_sms_endpoint(http_request: Request):
+    body = await read_body(http_request, GatewaySmsRequest, GATEWAY_CONTENT_TYPE)
+    if isinstance(body, bytes):
+        # Ham nonce / anahtar / etiket: base64 adımı yok
+        request = decode_binary(decode_gateway, body)
+        decrypt = lambda: decrypt_gateway_bytes_async(request.ciphertext, request.nonce, request.ephemeral_key, request.integrity_tag)
+    else:
+        request = body
+        decrypt = lambda: decrypt_gateway_message_async(request.encrypted_payload, request.nonce, request.ephemeral_key, request.integrity_tag)
+    # Mesh tekrarları Postgres'e gitmeden burada elenir. İlk kopya henüz kuyruğa
+    # yazılmadıysa (başarısız da olabilir) röle sonra tekrar denesin: 409
+    state = seen_packets.add(request.packet_uid)
+    if state == DONE: return StatusResponse(message="Duplicate.")
+    if state == IN_FLIGHT:
+        raise HTTPException(status_code=409, detail="InFlight", headers={"Retry-After": "1"})
+    # Hata ya da iptal (istemci koptu) UID'yi işlemde bırakmasın: tüm kopyalar 409 alırdı
+    try:
+        sender_user = await get_user_by_id(request.sender_id)
+        if not sender_user:
+            seen_packets.discard(request.packet_uid)
+            return StatusResponse(message="User not found.")
+        plaintext_msg = await decrypt()
+        if plaintext_msg is None:
+            seen_packets.discard(request.packet_uid)
+            return StatusResponse(message="Decryption Failed")
+        final_msg = f"{plaintext_msg}\n--\nKimden: {sender_user['phone_number']} (KENET)"
+        # Tekilleştirme + kuyruğa alma tek atomik INSERT ... ON CONFLICT DO NOTHING RETURNING
+        # (aynı anda gelen iki röleden yalnızca biri kazanır); sağlayıcı gecikmesi isteğe yansımaz
+        queued = await sms_dispatcher.enqueue(request.packet_uid, sender_user['phone_number'], request.target_phone, final_msg)
+    except BaseException:
+        seen_packets.discard(request.packet_uid)
+        raise
+    # Kuyrukta (ya da sms_logs'ta zaten) var: bundan sonraki kopyalar Duplicate
+    seen_packets.mark_done(request.packet_uid)
+    if not queued: return StatusResponse(message="Duplicate.")
+    return StatusResponse(message="Secure SMS Queued.")
+
+@app.get("/users/cache_stats", response_model=UserCacheStatsResponse)
+async def get_user_cache_stats_endpoint():
+    return UserCacheStatsResponse(**user_cache.stats())
+
+@app.get("/sms/stats", response_model=SmsQueueStatsResponse)
+async def get_sms_stats_endpoint():
+    return SmsQueueStatsResponse(**sms_dispatcher.stats())
 
 # =================================================================
 #      DEPREM ANALİZ MOTORU
@@ -148,23 +425,31 @@ def get_dynamic_threshold(total_users: int) -> float:
     if total_users <= 100: return 0.25
     return 0.15
 
-async def process_fusion_logic(lat: float, lng: float, triggering_pga: float):
-    if triggering_pga > MAX_REALISTIC_PGA:
-        logger.warning(f"⚠️ Anormal Veri ({triggering_pga}g) yok sayıldı.")
-        return
-
-    stats = await get_recent_signals_stats(lat, lng, FUSION_RADIUS_KM, FUSION_TIME_WINDOW_SEC)
-
-    # Eğer veritabanında yeterli sinyal yoksa çık (Test için 1 yapmıştın)
-    if not stats or stats['signal_count'] < MIN_SIGNAL_COUNT:
+async def process_fusion_logic(dirty_cells: Dict):
+    """
+    Penceredeki tüm sinyalleri tek vektörel geçişte kümeler ve bu tick'te
+    kirlenen hücrelere dokunan her kümeyi ayrı bir deprem adayı olarak değerlendirir.
+    """
+    codes, pgas, lats, lngs = signal_index.window()
+    clusters = cluster_signals(codes, pgas, lats, lngs, max_pga=MAX_REALISTIC_PGA,
+                               dirty_cells=dirty_cells.keys(), dirty_cell_deg=signal_index.cell_deg)
+    for stats in clusters:
+        await evaluate_cluster(stats)
+
+async def evaluate_cluster(stats: Dict):
+    # Eğer kümede yeterli sinyal yoksa çık (Test için 1 yapmıştın)
+    if stats['signal_count'] < MIN_SIGNAL_COUNT:
+        FUSION_CLUSTERS.inc("below_min")
         return
 
     signal_count = stats['signal_count']
     avg_pga = stats['avg_pga']
-    center_lat = stats['center_lat']
+    center_lat = stats['center_lat']   # PGA ağırlıklı merkez üssü
     center_lng = stats['center_lng']
 
-    total_users_in_area = await get_nearby_users_count(center_lat, center_lng, FUSION_RADIUS_KM)
+    # Payda: küme alanındaki (en az FUSION_RADIUS_KM) aktif kullanıcılar
+    area_radius_km = max(FUSION_RADIUS_KM, stats['radius_km'])
+    total_users_in_area = active_users.count_within(center_lat, center_lng, area_radius_km)
     if total_users_in_area == 0: total_users_in_area = 1
 
     ratio = signal_count / total_users_in_area
@@ -187,24 +472,254 @@ async def process_fusion_logic(lat: float, lng: float, triggering_pga: float):
 
     if is_confirmed:
         intensity_label = calculate_mmi_intensity(avg_pga)
+        if not event_dedup.claim(center_lat, center_lng):
+            FUSION_CLUSTERS.inc("duplicate")
+            return
         logger.warning(f"🚨 DEPREM ONAYLANDI! Şiddet: {intensity_label}")
-        await create_app_detected_event(center_lat, center_lng, intensity_label, avg_pga, signal_count)
+        try:
+            row = await create_app_detected_event(center_lat, center_lng, intensity_label, avg_pga, signal_count)
+        except Exception:
+            event_dedup.release(center_lat, center_lng)
+            raise
+        FUSION_CLUSTERS.inc("confirmed")
+        await coordinator.announce("app_detected_event", dict(row))
+    else:
+        FUSION_CLUSTERS.inc("below_ratio")
+
+# Kirli hücreleri tick başına bir kez değerlendirir
+fusion_scheduler = FusionScheduler(process_fusion_logic)
 
-@app.post("/signal", response_model=StatusResponse)
-async def receive_seismic_signal(request: SeismicSignalRequest, background_tasks: BackgroundTasks):
-    await insert_seismic_signal(request.user_id, request.pga, request.latitude, request.longitude)
-    await update_user_location(request.user_id, request.latitude, request.longitude)
-    background_tasks.add_task(process_fusion_logic, request.latitude, request.longitude, request.pga)
+# Yeni kayıtların hangi liste önbelleğini eskittiği
+EVENT_CACHE_KEYS = {"app_detected_event": "app_detected_events", "confirmed_earthquake": "confirmed_earthquakes"}
+
+def apply_signal(user_id: str, pga: float, lat: float, lng: float):
+    """Sinyali füzyon penceresine ekler (tek süreçte doğrudan, çoklu workerda liderde)."""
+    cell = signal_index.add(user_id, pga, lat, lng)
+    active_users.touch(user_id, lat, lng)
+    if pga > MAX_REALISTIC_PGA:
+        logger.warning(f"⚠️ Anormal Veri ({pga}g) yok sayıldı.")
+    else:
+        fusion_scheduler.mark_dirty(cell, lat, lng)
+
+def deliver_event(event: str, row: Dict):
+    """Onaylanan olay / yeni resmi deprem: önbelleği eskit, SSE istemcilerine ilet."""
+    response_cache.invalidate(EVENT_CACHE_KEYS[event])
+    if event == "app_detected_event":
+        # Yaklaşan sarsıntı: bölgedeki bağlı kullanıcılara kişisel uyarı (en acil önce)
+        alert_fanout.dispatch_soon(row)
+    broadcaster.publish(event, row)
+
+coordinator.bind(apply_signal, active_users.touch, deliver_event, seed_fusion_state, reset_fusion_state)
+
+@app.post("/signal", response_model=StatusResponse, openapi_extra=request_body_doc(SeismicSignalRequest, SIGNAL_CONTENT_TYPE))
+async def receive_seismic_signal(http_request: Request):
+    body = await read_body(http_request, SeismicSignalRequest, SIGNAL_CONTENT_TYPE)
+    if isinstance(body, bytes):
+        records = decode_binary(decode_signals, body)
+        if len(records) != 1:
+            raise HTTPException(status_code=400, detail="/signal tek kayıt alır; çoklu için /signals/batch.")
+        uid, pga, lat, lng = records[0]
+    else:
+        uid, pga, lat, lng = body.user_id, body.pga, body.latitude, body.longitude
+    # İkili, JSON ve /signals/batch aynı doğrulamadan geçer
+    error = signal_error(uid, pga, lat, lng)
+    if error: raise HTTPException(status_code=400, detail=error)
+    uid = uid.strip()
+    # enqueue modunda yanıt satır yazılmadan döner: füzyona girmeden gönderen çözülür
+    if ingest_buffer.ack_mode == "enqueue" and not await get_user_by_id(uid):
+        raise HTTPException(status_code=404, detail="Kullanıcı bulunamadı.")
+    # Sinyal tampon üzerinden toplu yazılır (INGEST_ACK_MODE'a göre beklenir), konum birleştirilir
+    if await ingest_buffer.submit(uid, pga, lat, lng) is False:
+        raise HTTPException(status_code=404, detail="Kullanıcı bulunamadı.")
+    location_buffer.update(uid, lat, lng)
+    coordinator.submit_signal(uid, pga, lat, lng)
     return StatusResponse(message="Sinyal Alındı")
 
+def user_id_error(uid) -> Optional[str]:
+    if not isinstance(uid, str) or not uid.strip():
+        return "user_id eksik"
+    if len(uid.strip()) > USER_ID_LEN:
+        return "user_id geçersiz"
+    return None
+
+def signal_error(uid, pga, lat, lng) -> Optional[str]:
+    error = user_id_error(uid)
+    if error: return error
+    if any(isinstance(v, bool) or not isinstance(v, (int, float)) for v in (pga, lat, lng)):
+        return "pga/latitude/longitude sayı olmalı"
+    if not math.isfinite(pga) or pga < 0:
+        return "pga geçersiz"
+    return coordinate_error(lat, lng)
+
+def coordinate_error(lat: float, lng: float) -> Optional[str]:
+    """Tampona / ızgaraya girmeden önce: NaN ve inf aralık dışı sayılır (cell_of floor'da patlar)."""
+    if not (math.isfinite(lat) and math.isfinite(lng) and -90 <= lat <= 90 and -180 <= lng <= 180):
+        return "koordinat geçersiz"
+    return None
+
+def validate_signal_batch(items: List):
+    """
+    Partideki okumaları (JSON sözlükleri ya da ikili kayıt demetleri) tek geçişte doğrular.
+    Dönüş: (geçerli kayıtlar [(index, user_id, pga, lat, lng)], öğe sonuçları)
+    """
+    valid, results = [], []
+    for i, item in enumerate(items):
+        if isinstance(item, dict):
+            uid, pga, lat, lng = item.get('user_id'), item.get('pga'), item.get('latitude'), item.get('longitude')
+            error = signal_error(uid, pga, lat, lng)
+        elif isinstance(item, tuple):
+            uid, pga, lat, lng = item
+            error = signal_error(uid, pga, lat, lng)
+        else:
+            # JSON partisinde nesne olmayan öğe (sayı, dizi, null...): yalnızca o öğe reddedilir
+            error = "öğe nesne olmalı"
+        if error is None:
+            valid.append((i, uid.strip(), float(pga), float(lat), float(lng)))
+        results.append(SignalBatchItemResult(index=i, accepted=error is None, error=error))
+    return valid, results
+
+@app.post("/signals/batch", response_model=SignalBatchResponse, openapi_extra=request_body_doc(SeismicSignalBatchRequest, SIGNAL_CONTENT_TYPE))
+async def receive_seismic_signal_batch(http_request: Request):
+    body = await read_body(http_request, SeismicSignalBatchRequest, SIGNAL_CONTENT_TYPE)
+    signals = decode_binary(decode_signals, body) if isinstance(body, bytes) else body.signals
+    if len(signals) > MAX_SIGNAL_BATCH:
+        raise HTTPException(status_code=413, detail=f"En fazla {MAX_SIGNAL_BATCH} okuma gönderilebilir.")
+    valid, results = validate_signal_batch(signals)
+    if ingest_buffer.ack_mode == "enqueue" and valid:
+        # Yazım beklenmez: bilinmeyen gönderenler füzyona ve tampona hiç girmesin
+        known = await known_user_ids(uid for _, uid, *_ in valid)
+        for i, uid, *_ in valid:
+            if uid not in known: results[i] = SignalBatchItemResult(index=i, accepted=False, error="kullanıcı bulunamadı")
+        valid = [v for v in valid if v[1] in known]
+
+    # Tüm parti tek flush'ta (tek COPY) yazılır; flush modunda yazılmayan
+    # (bilinmeyen kullanıcılı) satırlar kabul edilmiş sayılmaz
+    written = await ingest_buffer.submit_many([(uid, pga, lat, lng) for _, uid, pga, lat, lng in valid])
+    if written is not None and not all(written):
+        for (i, *_), ok in zip(valid, written):
+            if not ok: results[i] = SignalBatchItemResult(index=i, accepted=False, error="kullanıcı bulunamadı")
+        valid = [v for v, ok in zip(valid, written) if ok]
+
+    # Füzyon, etkilenen her hücre için bir kez tetiklenir
+    for _, uid, pga, lat, lng in valid:
+        location_buffer.update(uid, lat, lng)
+        coordinator.submit_signal(uid, pga, lat, lng)
+
+    return SignalBatchResponse(accepted=len(valid), rejected=len(results) - len(valid), results=results)
+
+@app.get("/fusion/stats", response_model=FusionStatsResponse)
+async def get_fusion_stats_endpoint():
+    return FusionStatsResponse(**fusion_scheduler.stats(), coordination=coordinator.mode, is_leader=coordinator.is_leader)
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics_endpoint():
+    # Prometheus metin biçimi
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+# ==========================================
+#      JSON YANITLARI
+# ==========================================
+# Satırlar yanıt modelleriyle aynı alan sırası ve dönüşümlerle sözlüğe çevrilir.
+# FAST_JSON=1 (ve orjson kurulu) ise bu sözlükler model kurulmadan doğrudan
+# bayta yazılır; kapalıyken FastAPI response_model ile doğrular ve serileştirir.
+# Çıktı aynı JSON'dur (küçük ondalıklar 1e-05 yerine 0.00001 yazılabilir).
+
+FAST_JSON = os.getenv("FAST_JSON", "0") == "1" and orjson is not None
+
+def registered_user_item(row) -> Dict:
+    return {'user_id': row['user_id'], 'phone_number': row['phone_number'], 'display_name': row['display_name'] or "", 'blood_type': row['blood_type'], 'public_key': row['public_params'], 'latitude': row['latitude'], 'longitude': row['longitude']}
+
+def sync_contact_item(row) -> Dict:
+    return {'contact_id': row['contact_id'], 'phone_number': row['phone_number'], 'display_name': row['display_name'], 'latitude': row['latitude'], 'longitude': row['longitude'], 'public_key': row['public_params']}
+
+def app_event_item(row) -> Dict:
+    return {'id': row['id'], 'latitude': row['latitude'], 'longitude': row['longitude'], 'intensity_label': row['intensity_label'], 'max_pga': row['max_pga'], 'participating_users': row['participating_users'], 'created_at': row['created_at']}
+
+def confirmed_earthquake_item(row) -> Dict:
+    return {'id': row['id'], 'external_id': row['external_id'], 'title': row['title'], 'magnitude': row['magnitude'], 'depth': row['depth'], 'latitude': row['latitude'], 'longitude': row['longitude'], 'occurred_at': row['occurred_at']}
+
+def encode_json(content) -> bytes:
+    if FAST_JSON:
+        return orjson.dumps(content)
+    # FastAPI'nin JSONResponse çıktısıyla aynı biçim
+    return json.dumps(jsonable_encoder(content), ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode("utf-8")
+
+def json_response(content):
+    """FAST_JSON açıksa hazır bayt yanıtı, değilse response_model'e bırakılan içerik."""
+    if FAST_JSON:
+        return Response(content=orjson.dumps(content), media_type="application/json")
+    return content
+
+async def cached_json_response(request: Request, key: str, build) -> Response:
+    """
+    Tam (imleçsiz) liste yanıtını bellekten ETag ile sunar.
+    If-None-Match tutarsa 304 döner; ne DB'ye gidilir ne de serileştirme yapılır.
+    """
+    cached = response_cache.get(key)
+    if cached is None:
+        async with response_cache.lock(key):
+            cached = response_cache.get(key)
+            if cached is None:
+                version = response_cache.version(key)
+                body = encode_json(await build())
+                cached = (body, response_cache.put(key, body, version))
+    body, etag = cached
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
 # --- 1. Sekme: Kenet Algılamaları ---
+# since_id / since verilirse sadece yeni kayıtlar döner (önbelleğe alınmaz)
 @app.get("/app_detected_events", response_model=List[AppDetectedEventItem])
-async def get_app_detected_events_endpoint():
-    rows = await get_app_detected_events_db(hours=24)
-    return [AppDetectedEventItem(id=row['id'], latitude=row['latitude'], longitude=row['longitude'], intensity_label=row['intensity_label'], max_pga=row['max_pga'], participating_users=row['participating_users'], created_at=row['created_at']) for row in rows]
+async def get_app_detected_events_endpoint(request: Request, since_id: Optional[int] = None, since: Optional[datetime] = None):
+    async def build():
+        rows = await get_app_detected_events_db(hours=24, since_id=since_id, since=since)
+        return [app_event_item(row) for row in rows]
+    if since_id is None and since is None:
+        return await cached_json_response(request, "app_detected_events", build)
+    return json_response(await build())
 
 # --- 2. Sekme: Resmi Veriler ---
 @app.get("/confirmed_earthquakes", response_model=EarthquakeListResponse)
-async def get_confirmed_earthquakes_endpoint():
-    rows = await get_confirmed_earthquakes_db(hours=24)
-    return EarthquakeListResponse(earthquakes=[ConfirmedEarthquakeItem(id=row['id'], external_id=row['external_id'], title=row['title'], magnitude=row['magnitude'], depth=row['depth'], latitude=row['latitude'], longitude=row['longitude'], occurred_at=row['occurred_at']) for row in rows])
+async def get_confirmed_earthquakes_endpoint(request: Request, since_id: Optional[int] = None, since: Optional[datetime] = None):
+    async def build():
+        rows = await get_confirmed_earthquakes_db(hours=24, since_id=since_id, since=since)
+        return {"earthquakes": [confirmed_earthquake_item(row) for row in rows]}
+    if since_id is None and since is None:
+        return await cached_json_response(request, "confirmed_earthquakes", build)
+    return json_response(await build())
+
+# --- Canlı Akış (Polling yerine) ---
+# Bağlanınca son 24 saatin snapshot'ı bir kez gönderilir, sonra sadece yeni
+# kayıtlar itilir: "app_detected_event" ve "confirmed_earthquake" olayları.
+@app.get("/events/stream")
+async def stream_events_endpoint():
+    q = broadcaster.subscribe()  # Snapshot sırasında gelen kayıt kaçmasın diye önce abone ol
+    try:
+        app_rows = await get_app_detected_events_db(hours=24)
+        eq_rows = await get_confirmed_earthquakes_db(hours=24)
+    except Exception:
+        broadcaster.unsubscribe(q)
+        raise
+    snapshot = encode_sse("snapshot", {
+        "app_detected_events": jsonable_encoder([app_event_item(r) for r in app_rows]),
+        "earthquakes": jsonable_encoder([confirmed_earthquake_item(r) for r in eq_rows]),
+    })
+    return StreamingResponse(stream_events(q, snapshot), media_type="text/event-stream", headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.get("/alerts/stream")
+async def stream_alerts_endpoint(user_id: str, ts: int, sig: str):
+    """
+    Kullanıcıya özel kalıcı kanal: yalnızca onun konumu için hesaplanan erken uyarılar.
+    Yeni kanal eskisini kapatır; bu yüzden bağlantı, kullanıcının özel anahtarıyla
+    imzalanmış (user_id, ts) ister (utils.alert_stream_signature).
+    """
+    user = await get_user_by_id(user_id)
+    if not user:
+        raise HTTPException(status_code=404, detail="Kullanıcı bulunamadı.")
+    if not verify_alert_stream_signature(user.get('ibe_private_key'), user_id, ts, sig, time.time()):
+        raise HTTPException(status_code=401, detail="Geçersiz imza.")
+    q = alert_hub.connect(user_id)
+    return StreamingResponse(stream_events(q, b": connected\n\n", on_close=lambda: alert_hub.disconnect(user_id, q)),
+                             media_type="text/event-stream", headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
@@ -0,0 +1,150 @@
+"""
+Erken uyarı dağıtımı: olay onayından son alıcının uyarıyı okumasına kadar geçen süre.
+
+Sürü (swarm) iki parçadır:
+  * N sanal istemci: her biri alert_hub'a bağlı kuyruğu okuyan bir görev
+    (SSE akışının sunucu tarafındaki tüketicisiyle aynı kuyruk yolu),
+  * --http K: aynı süreçte açılan uvicorn'a /alerts/stream ile bağlanan K gerçek
+    HTTP istemcisi (soket yazımı ve SSE ayrıştırması dahil).
+
+Alıcılar varsayılan olarak bellekte üretilir (merkez üssüne uzaklığa göre sıralı,
+get_alert_recipients çıktısıyla aynı biçim). --db ile kullanıcılar yerel PostGIS
+veritabanına yazılır ve gerçek sorgu kullanılır ("AF" ile başlayanlar sonunda silinir).
+
+Kullanım (Backend klasöründen):
+    python benchmarks/bench_alert_fanout.py [--users 100000] [--http 200] [--db]
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import statistics
+import sys
+import time
+
+import httpx
+import uvicorn
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as kenet  # noqa: E402
+import database  # noqa: E402
+from utils import alert_stream_signature, generate_user_keys  # noqa: E402
+
+EPICENTER = (38.40, 27.10)
+PORT = 8791
+# Tüm sanal kullanıcılar aynı anahtarı paylaşır (imza yine user_id'ye bağlı)
+BENCH_KEY, _ = generate_user_keys()
+
+def user_id(i: int) -> str:
+    return f"AF{i:06d}"
+
+def synthetic_recipients(n: int, radius_km: float):
+    rnd = random.Random(n)
+    # Alana düzgün dağılım: yarıçap karekök ile örneklenir
+    rows = [{'user_id': user_id(i), 'distance_km': radius_km * math.sqrt(rnd.random())} for i in range(n)]
+    rows.sort(key=lambda r: r['distance_km'])
+    return rows
+
+async def seed_db(n: int, radius_km: float):
+    rnd = random.Random(n)
+    lat0, lng0 = EPICENTER
+    lats, lngs = [], []
+    for _ in range(n):
+        d, b = radius_km * math.sqrt(rnd.random()), rnd.random() * 2 * math.pi
+        lats.append(lat0 + d * math.cos(b) / 111.32)
+        lngs.append(lng0 + d * math.sin(b) / (111.32 * math.cos(math.radians(lat0))))
+    await database.pool.execute("""
+        INSERT INTO users (user_id, phone_number, display_name, latitude, longitude, last_seen)
+        SELECT 'AF' || lpad(i::text, 6, '0'), '5996' || lpad(i::text, 6, '0'), 'alert', v.lat, v.lng, NOW()
+        FROM unnest($1::float8[], $2::float8[]) WITH ORDINALITY AS v(lat, lng, i)
+        ON CONFLICT DO NOTHING
+    """, lats, lngs)
+    # ORDINALITY 1'den başlar
+    return [user_id(i + 1) for i in range(n)]
+
+async def virtual_client(q: asyncio.Queue, received: list):
+    frame = await q.get()
+    if frame is not None:
+        received.append(time.monotonic())
+
+def stream_params(uid: str) -> dict:
+    ts = int(time.time())
+    return {"user_id": uid, "ts": ts, "sig": alert_stream_signature(BENCH_KEY, uid, ts)}
+
+async def http_client(client: httpx.AsyncClient, uid: str, connected: asyncio.Event, received: list, payloads: list):
+    async with client.stream("GET", f"http://127.0.0.1:{PORT}/alerts/stream", params=stream_params(uid), timeout=None) as r:
+        async for line in r.aiter_lines():
+            if line.startswith(": connected"):
+                connected.set()
+            elif line.startswith("data: "):
+                received.append(time.monotonic())
+                payloads.append(json.loads(line[6:]))
+                return
+
+async def main(args):
+    radius = kenet.alert_fanout.radius_km
+    if args.db:
+        await database.connect_db()
+        uids = await seed_db(args.users, radius)
+    else:
+        rows = synthetic_recipients(args.users, radius)
+        uids = [r['user_id'] for r in rows]
+
+        async def recipients(lat, lng, radius_km, active_minutes): return rows
+        kenet.alert_fanout.fetch_recipients = recipients
+
+    async def known_user(uid): return {'user_id': uid, 'ibe_private_key': BENCH_KEY}
+    kenet.get_user_by_id = known_user
+
+    server = uvicorn.Server(uvicorn.Config(kenet.app, port=PORT, log_level="warning", lifespan="off"))
+    server_task = asyncio.create_task(server.serve())
+    try:
+        while not server.started: await asyncio.sleep(0.01)
+        # HTTP istemcilerini alıcı listesine yay (hem yakın hem uzak örnekler)
+        step = max(1, len(uids) // max(1, args.http))
+        http_uids = uids[::step][:args.http]
+        chosen = set(http_uids)
+        virtual_uids = [u for u in uids if u not in chosen]
+
+        received, http_received, payloads = [], [], []
+        tasks = [asyncio.create_task(virtual_client(kenet.alert_hub.connect(u), received)) for u in virtual_uids]
+        async with httpx.AsyncClient(limits=httpx.Limits(max_connections=args.http + 10)) as client:
+            events = [asyncio.Event() for _ in http_uids]
+            http_tasks = [asyncio.create_task(http_client(client, u, e, http_received, payloads)) for u, e in zip(http_uids, events)]
+            await asyncio.wait_for(asyncio.gather(*(e.wait() for e in events)), 30)
+            print(f"🔌 {len(virtual_uids)} sanal + {len(http_uids)} HTTP istemci bağlı.")
+
+            event = {'id': -1, 'latitude': EPICENTER[0], 'longitude': EPICENTER[1], 'intensity_label': "VI", 'max_pga': 0.2}
+            t0 = time.monotonic()
+            stats = await kenet.alert_fanout.dispatch(event, t0)
+            await asyncio.wait_for(asyncio.gather(*tasks, *http_tasks), 30)
+
+        last = max(received + http_received)
+        print(f"alıcı: {stats['recipients']}, iletilen: {stats['sent']}, düşürülen: {stats['dropped']}")
+        print(f"sorgu:                  {stats['query_ms']:.0f} ms")
+        print(f"dağıtım (push bitti):   {stats['total_ms']:.0f} ms")
+        print(f"son sanal istemci:      {(max(received) - t0) * 1000:.0f} ms" if received else "son sanal istemci: -")
+        if http_received:
+            lat_ms = sorted((t - t0) * 1000 for t in http_received)
+            print(f"HTTP istemciler:        medyan {statistics.median(lat_ms):.0f} ms, son {lat_ms[-1]:.0f} ms")
+            # Yakın istemciler uzaklardan önce almalı
+            by_dist = sorted(payloads, key=lambda p: p['distance_km'])
+            print(f"en yakın HTTP alıcı:    {by_dist[0]['distance_km']} km, ETA {by_dist[0]['eta_sec']} sn")
+        total = (last - t0) * 1000
+        print(f"onay -> son uyarı:      {total:.0f} ms {'✅' if total < 1000 else '❌'} (hedef < 1000 ms)")
+    finally:
+        server.should_exit = True
+        await server_task
+        if args.db:
+            await database.pool.execute("DELETE FROM users WHERE user_id LIKE 'AF%'")
+            await database.close_db()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--http", type=int, default=200)
+    parser.add_argument("--db", action="store_true")
+    asyncio.run(main(parser.parse_args()))
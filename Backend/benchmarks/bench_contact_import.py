@@ -0,0 +1,71 @@
+"""
+Rehber içe aktarma: eski satır satır yol (N+1) ile toplu add_contacts_to_db karşılaştırması.
+
+Yerel bir PostGIS veritabanı gerekir (PostgredbKurulum.txt uygulanmış, DATABASE_URL .env'de).
+Kullanım (Backend klasöründen):
+    python benchmarks/bench_contact_import.py 100 1000 3000
+Oluşturulan test kullanıcıları ("BNCH" ile başlayan) sonunda silinir.
+"""
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import database  # noqa: E402
+from models import ContactModel  # noqa: E402
+
+OWNER_PHONE = "5999000000"
+
+async def legacy_add_contacts(owner_phone, contacts):
+    """Değişiklik öncesi davranış: kişi başına SELECT + INSERT."""
+    owner = await database.get_user_by_phone(owner_phone)
+    for c in contacts:
+        clean_c = database.sanitize_phone(c.phone_number)
+        reg = await database.get_user_by_phone(clean_c)
+        await database.pool.execute("""
+            INSERT INTO contacts (owner_id, contact_id, phone_number, display_name, is_registered_user)
+            VALUES ($1, $2, $3, $4, $5)
+            ON CONFLICT (owner_id, phone_number) DO UPDATE SET display_name = $4, contact_id = $2, is_registered_user = $5
+        """, owner['user_id'], reg['user_id'] if reg else None, clean_c, c.display_name, reg is not None)
+
+async def seed(max_size: int):
+    # Rehberin yarısı kayıtlı kullanıcı olsun
+    ids = [f"BNCH{i:04d}" for i in range(max_size // 2 + 1)]
+    phones = [OWNER_PHONE] + [f"59980{i:05d}" for i in range(max_size // 2)]
+    await database.pool.execute("""
+        INSERT INTO users (user_id, phone_number, display_name)
+        SELECT * FROM unnest($1::text[], $2::text[], $3::text[]) ON CONFLICT DO NOTHING
+    """, ids, phones, ["bench"] * len(ids))
+
+async def cleanup():
+    await database.pool.execute("DELETE FROM users WHERE user_id LIKE 'BNCH%'")
+
+async def clear_contacts():
+    await database.pool.execute("DELETE FROM contacts WHERE owner_id = 'BNCH0000'")
+
+async def main(sizes):
+    await database.connect_db()
+    await seed(max(sizes))
+    try:
+        print(f"{'kişi':>6} {'eski (ms)':>12} {'toplu (ms)':>12} {'hızlanma':>9}")
+        for n in sizes:
+            contacts = [ContactModel(phone_number=f"+90 59980{i:05d}" if i % 2 else f"0597{i:07d}", display_name=f"Kişi {i}") for i in range(n)]
+            await clear_contacts()
+            t = time.perf_counter()
+            await legacy_add_contacts(OWNER_PHONE, contacts)
+            legacy = (time.perf_counter() - t) * 1000
+
+            await clear_contacts()
+            t = time.perf_counter()
+            await database.add_contacts_to_db(OWNER_PHONE, contacts)
+            bulk = (time.perf_counter() - t) * 1000
+            print(f"{n:>6} {legacy:>12.1f} {bulk:>12.1f} {legacy / bulk:>8.1f}x")
+    finally:
+        await clear_contacts()
+        await cleanup()
+        await database.close_db()
+
+if __name__ == "__main__":
+    asyncio.run(main([int(a) for a in sys.argv[1:]] or [100, 1000, 3000]))
@@ -0,0 +1,67 @@
+"""
+Gateway şifre çözme verimi: tekil (eski yol) / tekil async / toplu.
+
+Kullanım (Backend klasöründen):
+    python benchmarks/bench_gateway_decrypt.py [paket_sayısı]
+"""
+import asyncio
+import base64
+import os
+import sys
+import time
+from types import SimpleNamespace
+
+from nacl.public import PrivateKey, Box
+from nacl.utils import random as nacl_random
+
+# Test için sunucu anahtarı üret (.env'dekini kullanma)
+_server = PrivateKey.generate()
+os.environ["SERVER_PRIVATE_KEY"] = base64.b64encode(_server.encode()).decode()
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import crypto_utils  # noqa: E402
+
+b64 = lambda b: base64.b64encode(b).decode()
+
+def make_packet(i: int):
+    """Android tarafındaki gibi: geçici anahtar + MAC ile şifreli metin ayrı."""
+    eph = PrivateKey.generate()
+    nonce = nacl_random(Box.NONCE_SIZE)
+    combined = Box(eph, _server.public_key).encrypt(f"Acil durum mesajı #{i}".encode(), nonce).ciphertext
+    return SimpleNamespace(encrypted_payload=b64(combined[16:]), nonce=b64(nonce),
+                           ephemeral_key=b64(eph.public_key.encode()), integrity_tag=b64(combined[:16]))
+
+def legacy_decrypt(p):
+    """Eski yol: her çağrıda anahtar base64'ten yeniden kurulur."""
+    key = PrivateKey(os.environ["SERVER_PRIVATE_KEY"], encoder=crypto_utils.Base64Encoder)
+    box = Box(key, crypto_utils.PublicKey(base64.b64decode(p.ephemeral_key)))
+    return box.decrypt(base64.b64decode(p.integrity_tag) + base64.b64decode(p.encrypted_payload),
+                       nonce=base64.b64decode(p.nonce)).decode()
+
+async def main(n: int):
+    packets = [make_packet(i) for i in range(n)]
+
+    t = time.perf_counter()
+    for p in packets: legacy_decrypt(p)
+    legacy = time.perf_counter() - t
+
+    t = time.perf_counter()
+    for p in packets: crypto_utils.decrypt_gateway_message(p.encrypted_payload, p.nonce, p.ephemeral_key, p.integrity_tag)
+    cached = time.perf_counter() - t
+
+    t = time.perf_counter()
+    await asyncio.gather(*(crypto_utils.decrypt_gateway_message_async(p.encrypted_payload, p.nonce, p.ephemeral_key, p.integrity_tag) for p in packets))
+    concurrent = time.perf_counter() - t
+
+    t = time.perf_counter()
+    out = await crypto_utils.decrypt_gateway_batch(packets)
+    batch = time.perf_counter() - t
+    assert out[0] == "Acil durum mesajı #0"
+
+    print(f"paket: {n}, işçi: {crypto_utils.DECRYPT_WORKERS}")
+    for name, sec in [("tekil, anahtar her seferinde (eski)", legacy), ("tekil, önbellekli anahtar", cached),
+                      ("async tekil x N (gather)", concurrent), ("decrypt_gateway_batch", batch)]:
+        print(f"  {name:<38} {n / sec:>10.0f} paket/sn")
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 5000))
@@ -0,0 +1,80 @@
+"""
+Liste yanıtları: model kurup FastAPI ile serileştirme (varsayılan) ile FAST_JSON
+(satır sözlükleri -> orjson) karşılaştırması. Yanıtların aynı JSON olduğu da kontrol edilir.
+
+Veritabanı gerekmez: sorgu fonksiyonları bellekteki sahte satırlarla değiştirilir,
+istekler uygulamaya ASGI üzerinden gönderilir (ölçülen: yönlendirme + serileştirme).
+Kullanım (Backend klasöründen):
+    python benchmarks/bench_list_encoding.py [satır_sayısı ...]
+"""
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+import httpx
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as kenet  # noqa: E402
+
+REPEAT = 30
+
+def fake_users(n):
+    rnd = random.Random(n)
+    return [{'user_id': f"{i:08X}", 'phone_number': f"5{i:09d}", 'display_name': None if i % 7 == 0 else f"Kişi {i}",
+             'blood_type': "A Rh+", 'public_params': "k" * 44, 'latitude': 38 + rnd.random(), 'longitude': 27 + rnd.random(),
+             'ibe_private_key': "p" * 44, 'verification_code': "1234"} for i in range(n)]
+
+def fake_contacts(n):
+    rnd = random.Random(n)
+    return [{'owner_id': "AAAAAAAA", 'contact_id': None if i % 3 == 0 else f"{i:08X}", 'phone_number': f"5{i:09d}",
+             'display_name': f"Kişi {i}", 'is_registered_user': i % 3 != 0, 'latitude': 38 + rnd.random(),
+             'longitude': 27 + rnd.random(), 'public_params': "k" * 44} for i in range(n)]
+
+def fake_quakes(n):
+    now = datetime(2026, 10, 18, 12, 0, 0)
+    return [{'id': i, 'external_id': f"2026.10.18 {i:08d}", 'title': "AKDENIZ", 'magnitude': 2.1 + i % 30 / 10,
+             'depth': 7.3, 'latitude': 36.5, 'longitude': 28.1, 'occurred_at': now - timedelta(seconds=i * 37, microseconds=i)}
+            for i in range(n)]
+
+async def measure(client, method, path, body):
+    t = time.perf_counter()
+    for _ in range(REPEAT):
+        r = await client.request(method, path, json=body)
+    return (time.perf_counter() - t) / REPEAT * 1000, r
+
+async def main(sizes):
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=kenet.app), base_url="http://bench") as client:
+        print(f"{'uç nokta':<24} {'satır':>6} {'model (ms)':>11} {'FAST_JSON (ms)':>15} {'hızlanma':>9}")
+        for n in sizes:
+            users, contacts, quakes = fake_users(n), fake_contacts(n), fake_quakes(n)
+
+            async def registered(phones): return users
+            async def user_contacts(uid): return contacts
+            async def confirmed(hours=24, since_id=None, since=None): return quakes
+            kenet.get_registered_users_details = registered
+            kenet.get_user_contacts = user_contacts
+            kenet.get_confirmed_earthquakes_db = confirmed
+
+            cases = [
+                ("/check_contacts", "POST", "/check_contacts", {"phone_numbers": ["5"] * 3}),
+                ("/sync_contacts", "POST", "/sync_contacts", {"user_id": "AAAAAAAA"}),
+                # since_id verilince önbellek devre dışı: her istek serileştirir
+                ("/confirmed_earthquakes", "GET", "/confirmed_earthquakes?since_id=-1", None),
+            ]
+            for name, method, path, body in cases:
+                kenet.FAST_JSON = False
+                slow, r_slow = await measure(client, method, path, body)
+                kenet.FAST_JSON = True
+                fast, r_fast = await measure(client, method, path, body)
+                assert json.loads(r_slow.content) == json.loads(r_fast.content), f"{name}: yanıtlar farklı"
+                print(f"{name:<24} {n:>6} {slow:>11.2f} {fast:>15.2f} {slow / fast:>8.1f}x")
+
+if __name__ == "__main__":
+    if kenet.orjson is None:
+        raise SystemExit("orjson kurulu değil (pip install orjson)")
+    asyncio.run(main([int(a) for a in sys.argv[1:]] or [100, 1000, 5000]))
@@ -0,0 +1,92 @@
+"""
+Kolon projeksiyonu: eski SELECT * sorguları ile queries.py'deki adlı, bağlantı
+başına hazırlanmış sorguların karşılaştırması (satır yükü ve gecikme).
+
+Satır yükü, sonuç satırlarının pg_column_size toplamıdır (sunucunun gönderdiği
+veriye yakın; protokol başlıkları hariç). Test kullanıcılarına gerçekçi boyutta
+IBE anahtarları yazılır.
+
+Yerel bir PostGIS veritabanı gerekir (PostgredbKurulum.txt uygulanmış, DATABASE_URL .env'de).
+Kullanım (Backend klasöründen):
+    python benchmarks/bench_query_projections.py 100 1000 3000
+Oluşturulan test kullanıcıları ("QP" ile başlayan) ve rehberleri sonunda silinir.
+"""
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import database  # noqa: E402
+import queries  # noqa: E402
+
+OWNER_ID = "QP000000"
+REPEAT = 20
+
+# Değişiklik öncesi sorgular
+LEGACY = {
+    'registered_users': "SELECT * FROM users WHERE phone_number = ANY($1::text[])",
+    'user_contacts': "SELECT c.*, u.latitude, u.longitude, u.public_params FROM contacts c LEFT JOIN users u ON c.contact_id = u.user_id WHERE c.owner_id = $1",
+    'user_by_phone': "SELECT * FROM users WHERE phone_number = $1",
+}
+
+def phone(i: int) -> str:
+    return f"59970{i:05d}"
+
+async def seed(n: int):
+    ids = [OWNER_ID] + [f"QP{i + 1:06d}" for i in range(n)]
+    phones = ["5997999999"] + [phone(i) for i in range(n)]
+    await database.pool.execute("""
+        INSERT INTO users (user_id, phone_number, display_name, blood_type, ibe_private_key, public_params,
+                           verification_code, latitude, longitude, last_seen)
+        SELECT u.id, u.phone, 'Kişi ' || u.id, 'A Rh+', repeat(md5(u.id), 12), repeat(md5(u.phone), 8),
+               '1234', 38 + random(), 27 + random(), NOW()
+        FROM unnest($1::text[], $2::text[]) AS u(id, phone)
+        ON CONFLICT DO NOTHING
+    """, ids, phones)
+    await database.pool.execute("""
+        INSERT INTO contacts (owner_id, contact_id, phone_number, display_name, is_registered_user)
+        SELECT $1, u.user_id, u.phone_number, u.display_name, TRUE FROM users u
+        WHERE u.user_id LIKE 'QP%' AND u.user_id <> $1
+        ON CONFLICT DO NOTHING
+    """, OWNER_ID)
+
+async def cleanup():
+    await database.pool.execute("DELETE FROM contacts WHERE owner_id = $1", OWNER_ID)
+    await database.pool.execute("DELETE FROM users WHERE user_id LIKE 'QP%'")
+
+async def payload_bytes(sql: str, *args) -> int:
+    return await database.pool.fetchval(f"SELECT COALESCE(SUM(pg_column_size(t.*)), 0) FROM ({sql}) t", *args)
+
+async def timed(fn, *args) -> float:
+    t = time.perf_counter()
+    for _ in range(REPEAT):
+        await fn(*args)
+    return (time.perf_counter() - t) / REPEAT * 1000
+
+async def compare(name: str, *args):
+    legacy_bytes = await payload_bytes(LEGACY[name], *args)
+    new_bytes = await payload_bytes(queries.QUERIES[name], *args)
+    legacy_ms = await timed(database.pool.fetch, LEGACY[name], *args)
+    new_ms = await timed(queries.fetch, database.pool, name, *args)
+    print(f"{name:<18} {legacy_bytes / 1024:>10.1f} {new_bytes / 1024:>10.1f} {legacy_ms:>10.2f} {new_ms:>10.2f} {legacy_ms / new_ms:>8.1f}x")
+
+async def main(sizes):
+    await database.connect_db()
+    try:
+        await seed(max(sizes))
+        print(f"{'sorgu':<18} {'eski KiB':>10} {'yeni KiB':>10} {'eski ms':>10} {'yeni ms':>10} {'hızlanma':>9}")
+        for n in sizes:
+            print(f"-- {n} kişi")
+            await compare('registered_users', [phone(i) for i in range(n)])
+        print(f"-- {max(sizes)} kişilik rehber")
+        await compare('user_contacts', OWNER_ID)
+        print("-- tek kullanıcı")
+        await compare('user_by_phone', phone(0))
+    finally:
+        await cleanup()
+        await database.close_db()
+
+if __name__ == "__main__":
+    asyncio.run(main([int(a) for a in sys.argv[1:]] or [100, 1000, 3000]))
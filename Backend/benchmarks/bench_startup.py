@@ -0,0 +1,58 @@
+"""
+Açılış süresi: uvicorn sürecinin başlatılmasından ilk cevaplanan isteğe (/healthz)
+ve trafiğe hazır olmaya (/readyz 200) kadar geçen süre.
+
+Kullanım (Backend klasöründen):
+    python benchmarks/bench_startup.py [tekrar]
+DB yoksa /readyz hiç 200 olmaz; yalnızca /healthz süresi raporlanır.
+"""
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+import httpx
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PORT = 8790
+READY_TIMEOUT_SEC = 15
+
+def wait_for(client, path, ok_status, deadline):
+    while time.monotonic() < deadline:
+        try:
+            if client.get(f"http://127.0.0.1:{PORT}{path}", timeout=0.5).status_code == ok_status:
+                return time.monotonic()
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.005)
+    return None
+
+def run_once():
+    env = dict(os.environ, KANDILLI_URL="file:///dev/null")
+    t0 = time.monotonic()
+    proc = subprocess.Popen([sys.executable, "-m", "uvicorn", "app:app", "--port", str(PORT), "--log-level", "warning"],
+                            cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        with httpx.Client() as client:
+            deadline = t0 + READY_TIMEOUT_SEC
+            healthy = wait_for(client, "/healthz", 200, deadline)
+            ready = wait_for(client, "/readyz", 200, deadline) if healthy else None
+        return ((healthy - t0) * 1000 if healthy else None), ((ready - t0) * 1000 if ready else None)
+    finally:
+        proc.terminate()
+        proc.wait(timeout=10)
+
+def main(n: int):
+    import_ms = float(subprocess.check_output(
+        [sys.executable, "-c", "import time; t = time.perf_counter(); import app; print((time.perf_counter() - t) * 1000)"],
+        cwd=BACKEND_DIR, stderr=subprocess.DEVNULL).decode().split()[-1])
+    runs = [run_once() for _ in range(n)]
+    health = [h for h, _ in runs if h is not None]
+    ready = [r for _, r in runs if r is not None]
+    print(f"import app:      {import_ms:.0f} ms")
+    print(f"ilk /healthz:    {statistics.median(health):.0f} ms (medyan, {len(health)}/{n})" if health else "ilk /healthz:    yok")
+    print(f"/readyz 200:     {statistics.median(ready):.0f} ms (medyan, {len(ready)}/{n})" if ready else "/readyz 200:     yok (DB erişilemiyor?)")
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5)
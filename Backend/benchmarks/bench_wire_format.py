@@ -0,0 +1,76 @@
+"""
+İstek biçimleri: JSON (+base64) ile wire_format.py ikili biçimlerinin karşılaştırması.
+  * Yük boyutu: ham ve deflate ile sıkıştırılmış.
+  * Çözme hızı: sunucunun gövdeden çağrılabilir değerlere kadar yaptığı iş
+    (JSON: model doğrulama + base64 çözme, ikili: struct açma), saniyede istek.
+
+Veritabanı ve ağ gerekmez. Kullanım (Backend klasöründen):
+    python benchmarks/bench_wire_format.py [parti_boyutu]
+"""
+import base64
+import json
+import os
+import random
+import sys
+import time
+import zlib
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models import GatewaySmsRequest, SeismicSignalBatchRequest, SeismicSignalRequest  # noqa: E402
+from wire_format import GatewayPacket, decode_gateway, decode_signals, encode_gateway, encode_signals  # noqa: E402
+
+MIN_SECONDS = 0.5
+
+def signal(rnd: random.Random):
+    return (f"{rnd.getrandbits(32):08X}", round(rnd.uniform(0.01, 0.5), 4),
+            round(38 + rnd.random(), 6), round(27 + rnd.random(), 6))
+
+def signal_json(s) -> dict:
+    return {"user_id": s[0], "pga": s[1], "latitude": s[2], "longitude": s[3]}
+
+def gateway_packet(rnd: random.Random) -> GatewayPacket:
+    # 140 karakterlik SMS şifreli haliyle aynı boyutta
+    return GatewayPacket("3f2a9c1e-7b4d-4e21-9a0f-5c6d7e8f9a0b", "A1B2C3D4", "5321234567", "5559876543",
+                         rnd.randbytes(24), rnd.randbytes(32), rnd.randbytes(16), rnd.randbytes(140))
+
+def gateway_json(p: GatewayPacket) -> dict:
+    b64 = lambda b: base64.b64encode(b).decode()
+    return {"packet_uid": p.packet_uid, "sender_id": p.sender_id, "sender_phone": p.sender_phone, "target_phone": p.target_phone,
+            "encrypted_payload": b64(p.ciphertext), "nonce": b64(p.nonce), "ephemeral_key": b64(p.ephemeral_key),
+            "integrity_tag": b64(p.integrity_tag)}
+
+def rate(fn, body) -> float:
+    n, start = 0, time.perf_counter()
+    while True:
+        for _ in range(100): fn(body)
+        n += 100
+        elapsed = time.perf_counter() - start
+        if elapsed >= MIN_SECONDS: return n / elapsed
+
+def decode_gateway_json(body: bytes):
+    req = GatewaySmsRequest.model_validate_json(body)
+    return (base64.b64decode(req.encrypted_payload), base64.b64decode(req.nonce),
+            base64.b64decode(req.ephemeral_key), base64.b64decode(req.integrity_tag))
+
+def main(batch_size: int):
+    rnd = random.Random(42)
+    sig = signal(rnd)
+    batch = [signal(rnd) for _ in range(batch_size)]
+    packet = gateway_packet(rnd)
+    cases = [
+        ("/signal", json.dumps(signal_json(sig)).encode(), SeismicSignalRequest.model_validate_json,
+         encode_signals([sig]), decode_signals),
+        (f"/signals/batch ({batch_size})", json.dumps({"signals": [signal_json(s) for s in batch]}).encode(),
+         SeismicSignalBatchRequest.model_validate_json, encode_signals(batch), decode_signals),
+        ("/send_gateway_sms", json.dumps(gateway_json(packet)).encode(), decode_gateway_json,
+         encode_gateway(packet), decode_gateway),
+    ]
+    print(f"{'uç nokta':<22} {'JSON B':>8} {'JSON+def':>9} {'ikili B':>8} {'ikili+def':>10} {'JSON istek/sn':>14} {'ikili istek/sn':>15} {'hız':>6}")
+    for name, j, decode_j, b, decode_b in cases:
+        json_rate, bin_rate = rate(decode_j, j), rate(decode_b, b)
+        print(f"{name:<22} {len(j):>8} {len(zlib.compress(j)):>9} {len(b):>8} {len(zlib.compress(b)):>10} "
+              f"{json_rate:>14,.0f} {bin_rate:>15,.0f} {bin_rate / json_rate:>5.1f}x")
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 500)
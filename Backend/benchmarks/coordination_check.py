@@ -0,0 +1,117 @@
+"""
+Çoklu worker füzyon koordinasyonu kontrolü (FUSION_COORDINATION=postgres).
+
+K adet uvicorn süreci ayrı portlarda başlatılır ve sinyaller bu süreçlere sırayla
+(round-robin) dağıtılır. Kontrol edilenler:
+  1. Tam olarak bir lider seçilir.
+  2. Tek deprem için tek olay açılır (sinyaller farklı workerlara gelse bile).
+  3. Olay tüm workerların /app_detected_events önbelleğine yansır (kenet_events).
+  4. Lider öldürülünce (SIGKILL) kalanlardan biri devralır ve yeni depremi algılar.
+
+Yerel bir PostGIS veritabanı gerekir (PostgredbKurulum.txt uygulanmış, DATABASE_URL .env'de).
+Kullanım (Backend klasöründen):
+    python benchmarks/coordination_check.py [worker_sayısı]
+Test kullanıcıları ("cc" ile başlar) ve açılan olaylar sonunda silinir.
+"""
+import asyncio
+import os
+import signal
+import subprocess
+import sys
+import time
+
+import httpx
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+import database  # noqa: E402
+
+BASE_PORT = 8700
+USERS_PER_QUAKE = 30
+RETRY_SEC = 1
+
+def start_worker(port: int) -> subprocess.Popen:
+    env = dict(os.environ, FUSION_COORDINATION="postgres", COORD_LEADER_RETRY_SEC=str(RETRY_SEC),
+               KANDILLI_URL="file:///dev/null")
+    return subprocess.Popen([sys.executable, "-m", "uvicorn", "app:app", "--port", str(port), "--log-level", "warning"],
+                            cwd=BACKEND_DIR, env=env)
+
+async def fusion_stats(client, port):
+    try:
+        return (await client.get(f"http://127.0.0.1:{port}/fusion/stats", timeout=1)).json()
+    except Exception:
+        return None
+
+async def wait_for_leader(client, ports, timeout=20):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        stats = {p: await fusion_stats(client, p) for p in ports}
+        leaders = [p for p, s in stats.items() if s and s['is_leader']]
+        if all(stats.values()) and len(leaders) == 1:
+            return leaders[0]
+        if len(leaders) > 1:
+            raise AssertionError(f"Birden fazla lider: {leaders}")
+        await asyncio.sleep(0.2)
+    raise AssertionError("Lider seçilemedi")
+
+async def send_quake(client, ports, lat, lng, offset):
+    """Aynı bölgedeki kullanıcıların sinyallerini workerlara sırayla dağıtır."""
+    reqs = []
+    for i in range(USERS_PER_QUAKE):
+        port = ports[i % len(ports)]
+        body = {"user_id": f"cc{offset + i:06d}", "pga": 0.08, "latitude": lat + i * 0.001, "longitude": lng}
+        reqs.append(client.post(f"http://127.0.0.1:{port}/signal", json=body))
+    for r in await asyncio.gather(*reqs):
+        assert r.status_code == 200, r.text
+
+async def count_events(first_id):
+    return await database.pool.fetchval("SELECT COUNT(*) FROM app_detected_events WHERE id > $1", first_id)
+
+async def main(k: int):
+    await database.connect_db()
+    await database.pool.execute("""
+        INSERT INTO users (user_id, phone_number, display_name)
+        SELECT 'cc' || lpad(i::text, 6, '0'), '5995' || lpad(i::text, 6, '0'), 'coord'
+        FROM generate_series(0, $1) i ON CONFLICT DO NOTHING
+    """, USERS_PER_QUAKE * 2)
+    first_id = await database.pool.fetchval("SELECT COALESCE(MAX(id), 0) FROM app_detected_events")
+    ports = [BASE_PORT + i for i in range(k)]
+    procs = {p: start_worker(p) for p in ports}
+    try:
+        async with httpx.AsyncClient() as client:
+            leader = await wait_for_leader(client, ports)
+            print(f"👑 Lider: :{leader}")
+
+            await send_quake(client, ports, 38.40, 27.10, 0)
+            await asyncio.sleep(1.5)
+            n = await count_events(first_id)
+            assert n == 1, f"1 olay bekleniyordu, {n} açıldı"
+            for p in ports:
+                events = (await client.get(f"http://127.0.0.1:{p}/app_detected_events")).json()
+                assert any(e['id'] > first_id for e in events), f":{p} olayı görmüyor (önbellek eskitilmedi)"
+            print(f"✅ Tek olay açıldı ve {k} workerda görünüyor.")
+
+            procs.pop(leader).send_signal(signal.SIGKILL)
+            ports.remove(leader)
+            t = time.monotonic()
+            new_leader = await wait_for_leader(client, ports)
+            print(f"🔁 Yeni lider :{new_leader} ({time.monotonic() - t:.1f} sn)")
+
+            await send_quake(client, ports, 39.90, 32.85, USERS_PER_QUAKE)
+            await asyncio.sleep(1.5)
+            n = await count_events(first_id)
+            assert n == 2, f"2 olay bekleniyordu, {n} açıldı"
+            print("✅ Devralma sonrası yeni deprem algılandı.")
+    finally:
+        for proc in procs.values():
+            proc.terminate()
+        for proc in procs.values():
+            proc.wait(timeout=10)
+        await database.pool.execute("DELETE FROM app_detected_events WHERE id > $1", first_id)
+        await database.pool.execute("DELETE FROM seismic_signals WHERE user_id LIKE 'cc%'")
+        await database.pool.execute("DELETE FROM users WHERE user_id LIKE 'cc%'")
+        await database.close_db()
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 3))
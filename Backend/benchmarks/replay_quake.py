@@ -0,0 +1,301 @@
+"""
+Sentetik deprem tekrarı: /signal -> füzyon -> create_app_detected_event hattının
+yük altındaki algılama gecikmesini ölçer.
+
+Senaryo: her depremin çevresine N sanal telefon yerleşir, merkezden P/S dalga
+cephesi yayılır (PGA azalım modeli + log-normal gürültü, GPS sapması, uygulama
+gecikmesi). Tetiklenen telefonlar S dalgası geldiğinde /signal gönderir; ayrıca
+rastgele zamanlarda yanlış pozitif (masaya vurma) ve anormal (düşen telefon)
+okumalar üretilir. Uygulama süreç içinde httpx ASGI transport ile sürülür,
+veritabanı gerçek (yerel PostGIS, PostgredbKurulum.txt uygulanmış, DATABASE_URL .env'de).
+
+Raporlanan: ingest verimi, /signal p50/p99 gecikmesi, ilk sarsıntıdan olay
+onayına süre, merkez üssü hatası, tekrar (duplicate) ve yanlış olaylar.
+
+Kullanım (Backend klasöründen):
+    python benchmarks/replay_quake.py --phones 5000
+    python benchmarks/replay_quake.py --phones 20000 --quake 38.42,27.14,6.0 --quake 37.0,35.3,5.5,4
+    python benchmarks/replay_quake.py --phones 20000 --time-scale 0     # zamanlamasız, azami ingest
+    python benchmarks/replay_quake.py --dry-run                         # sadece senaryo özeti
+
+Test kullanıcıları ("rp" ile başlar) ve koşu sırasında açılan olaylar sonunda
+silinir (--keep ile kalır; kalan olaylar sonraki koşuda EventDedup'a yüklenir).
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+# Başlangıçta gerçek Kandilli beslemesine gidilmesin: boş bir yerel besleme ver
+_empty_feed = os.path.join(tempfile.gettempdir(), "kenet_replay_empty_feed.xml")
+with open(_empty_feed, "w") as f:
+    f.write("<earhquakes></earhquakes>")
+os.environ.setdefault("KANDILLI_URL", f"file://{_empty_feed}")
+
+from geo_grid import KM_PER_DEG_LAT, haversine_km  # noqa: E402
+
+USER_PREFIX = "rp"
+P_WAVE_KM_S = 6.0
+S_WAVE_KM_S = 3.5
+
+# ==========================================
+#      SENARYO ÜRETİCİ
+# ==========================================
+
+@dataclass
+class Quake:
+    lat: float
+    lng: float
+    magnitude: float
+    origin_sec: float = 0.0   # senaryo başlangıcına göre
+    depth_km: float = 10.0
+
+@dataclass
+class Reading:
+    t: float                  # senaryo zamanı (sn)
+    user_id: str
+    pga: float
+    lat: float
+    lng: float
+    kind: str                 # "quake" | "false" | "glitch"
+    quake: int = -1
+
+def parse_quake(text: str) -> Quake:
+    parts = [float(p) for p in text.split(",")]
+    if len(parts) < 3:
+        raise argparse.ArgumentTypeError("lat,lng,büyüklük[,başlangıç_sn[,derinlik_km]] bekleniyor")
+    return Quake(*parts)
+
+def median_pga(magnitude: float, hypo_km: float) -> float:
+    """Campbell (1997) biçiminde azalım: sert zemin, g cinsinden medyan PGA."""
+    near = 0.149 * math.exp(0.647 * magnitude)
+    return math.exp(-3.512 + 0.904 * magnitude - 1.328 * math.log(math.sqrt(hypo_km ** 2 + near ** 2)))
+
+def place_phone(rng: random.Random, lat: float, lng: float, area_km: float):
+    """Merkez çevresinde alan olarak düzgün dağılmış konum."""
+    d = area_km * math.sqrt(rng.random())
+    theta = rng.uniform(0, 2 * math.pi)
+    d_lat = d * math.cos(theta) / KM_PER_DEG_LAT
+    d_lng = d * math.sin(theta) / (KM_PER_DEG_LAT * math.cos(math.radians(lat)))
+    return lat + d_lat, lng + d_lng
+
+def build_scenario(quakes: List[Quake], phones: int, area_km: float, trigger_pga: float,
+                   offline_rate: float, false_rate: float, glitch_rate: float,
+                   duration_sec: float, seed: int):
+    """
+    Dönüş: (telefonlar [(user_id, lat, lng)], zamana göre sıralı okumalar).
+    Telefonlar depremler arasında eşit bölünür.
+    """
+    rng = random.Random(seed)
+    devices, readings = [], []
+    for i in range(phones):
+        q_idx = i % len(quakes)
+        q = quakes[q_idx]
+        uid = f"{USER_PREFIX}{i:06d}"
+        lat, lng = place_phone(rng, q.lat, q.lng, area_km)
+        devices.append((uid, lat, lng))
+        # GPS sapması (~20 m) ve uygulama algılama + ağ gecikmesi
+        rep_lat = lat + rng.gauss(0, 20) / 1000 / KM_PER_DEG_LAT
+        rep_lng = lng + rng.gauss(0, 20) / 1000 / KM_PER_DEG_LAT
+
+        if rng.random() >= offline_rate:
+            hypo = math.hypot(haversine_km(q.lat, q.lng, lat, lng), q.depth_km)
+            pga = median_pga(q.magnitude, hypo) * math.exp(rng.gauss(0, 0.5))
+            if pga >= trigger_pga:
+                # Güçlü P dalgası da tetikleyebilir; çoğu telefon S dalgasında tetiklenir
+                arrival = hypo / (P_WAVE_KM_S if pga >= 10 * trigger_pga and rng.random() < 0.3 else S_WAVE_KM_S)
+                t = q.origin_sec + arrival + rng.uniform(0.2, 1.5)
+                readings.append(Reading(t, uid, round(pga, 5), rep_lat, rep_lng, "quake", q_idx))
+
+        if rng.random() < false_rate:
+            readings.append(Reading(rng.uniform(0, duration_sec), uid, round(rng.uniform(0.005, 0.05), 5), rep_lat, rep_lng, "false"))
+        if rng.random() < glitch_rate:
+            readings.append(Reading(rng.uniform(0, duration_sec), uid, round(rng.uniform(6.0, 20.0), 3), rep_lat, rep_lng, "glitch"))
+    readings.sort(key=lambda r: r.t)
+    return devices, readings
+
+def percentile(values: List[float], p: float) -> float:
+    if not values: return float("nan")
+    values = sorted(values)
+    k = (len(values) - 1) * p / 100
+    lo, hi = math.floor(k), math.ceil(k)
+    return values[lo] + (values[hi] - values[lo]) * (k - lo)
+
+# ==========================================
+#      UYGULAMAYI SÜRME
+# ==========================================
+
+async def seed_users(pool, devices):
+    await pool.execute("""
+        INSERT INTO users (user_id, phone_number, display_name)
+        SELECT * FROM unnest($1::text[], $2::text[], $3::text[]) ON CONFLICT DO NOTHING
+    """, [d[0] for d in devices], [f"5996{i:06d}" for i in range(len(devices))], ["replay"] * len(devices))
+
+async def cleanup(pool, first_event_id: int):
+    await pool.execute("DELETE FROM app_detected_events WHERE id > $1", first_event_id)
+    await pool.execute(f"DELETE FROM seismic_signals WHERE user_id LIKE '{USER_PREFIX}%'")
+    await pool.execute(f"DELETE FROM users WHERE user_id LIKE '{USER_PREFIX}%'")
+
+async def drive(client, path: str, payloads, time_scale: float, concurrency: int, latencies: Optional[List[float]]):
+    """
+    İstekleri senaryo zamanında gönderir (time_scale=0: beklemeden).
+    Dönüş: (başarısız istek sayısı, ilk gönderim, son yanıt) perf_counter cinsinden.
+    """
+    sem = asyncio.Semaphore(concurrency)
+    errors = 0
+    start = time.perf_counter()
+    end = start
+
+    async def send(t: float, body: Dict):
+        nonlocal errors, end
+        if time_scale > 0:
+            delay = start + t / time_scale - time.perf_counter()
+            if delay > 0: await asyncio.sleep(delay)
+        async with sem:
+            t0 = time.perf_counter()
+            try:
+                r = await client.post(path, json=body)
+                ok = r.status_code == 200
+            except Exception:
+                ok = False
+            t1 = time.perf_counter()
+        if not ok: errors += 1
+        if latencies is not None: latencies.append((t1 - t0) * 1000)
+        end = max(end, t1)
+
+    await asyncio.gather(*(send(t, body) for t, body in payloads))
+    return errors, start, end
+
+async def collect_events(q: asyncio.Queue, detections: List):
+    """Yayıncıya SSE istemcisi gibi abone olur; olayın yayınlandığı anı kaydeder."""
+    while True:
+        frame = await q.get()
+        if frame is None: return
+        event_line, data_line = frame.decode().split("\n")[:2]
+        if event_line == "event: app_detected_event":
+            detections.append((time.perf_counter(), json.loads(data_line[len("data: "):])))
+
+async def run(args):
+    import httpx
+    import database
+    from app import app, event_dedup, fusion_scheduler, startup_state
+    from event_broadcaster import broadcaster
+
+    quakes = args.quake or [Quake(38.42, 27.14, 6.0)]
+    duration = max(q.origin_sec for q in quakes) + args.area_km / S_WAVE_KM_S + 5
+    devices, readings = build_scenario(quakes, args.phones, args.area_km, args.trigger_pga,
+                                       args.offline_rate, args.false_rate, args.glitch_rate, duration, args.seed)
+    kinds = {k: sum(1 for r in readings if r.kind == k) for k in ("quake", "false", "glitch")}
+    print(f"📱 {len(devices)} telefon, {len(readings)} okuma (deprem: {kinds['quake']}, yanlış: {kinds['false']}, anormal: {kinds['glitch']}), senaryo {duration:.1f} sn")
+    if args.dry_run:
+        return
+
+    transport = httpx.ASGITransport(app=app)
+    async with app.router.lifespan_context(app):
+        # Açılış arka planda (lifespan yalnızca başlatır): DB bağlanıp ısınana kadar bekle.
+        # bootstrap hataları sonsuza dek yeniden dener; süre dolarsa son hatayla çık.
+        deadline = time.monotonic() + args.startup_timeout
+        while not startup_state['ready']:
+            if time.monotonic() > deadline:
+                raise SystemExit(f"❌ Uygulama {args.startup_timeout:.0f} sn içinde hazır olmadı "
+                                 f"({startup_state['error'] or startup_state['phase']})")
+            await asyncio.sleep(0.05)
+        first_event_id = await database.pool.fetchval("SELECT COALESCE(MAX(id), 0) FROM app_detected_events")
+        await seed_users(database.pool, devices)
+        async with httpx.AsyncClient(transport=transport, base_url="http://replay") as client:
+            # Isınma: tüm telefonlar aktif (füzyon paydası)
+            await drive(client, "/update_location", [(0, {"user_id": u, "latitude": lat, "longitude": lng}) for u, lat, lng in devices],
+                        0, args.concurrency, None)
+
+            q = broadcaster.subscribe()
+            detections = []
+            collector = asyncio.create_task(collect_events(q, detections))
+            latencies: List[float] = []
+            payloads = [(r.t, {"user_id": r.user_id, "pga": r.pga, "latitude": r.lat, "longitude": r.lng}) for r in readings]
+            errors, t_start, t_end = await drive(client, "/signal", payloads, args.time_scale, args.concurrency, latencies)
+            # Son tick'lerin işlenmesini bekle
+            await asyncio.sleep(args.settle_sec)
+            broadcaster.unsubscribe(q)
+            collector.cancel()
+        db_events = await database.pool.fetch("SELECT id, latitude, longitude FROM app_detected_events WHERE id > $1", first_event_id)
+
+    # --- Rapor ---
+    wall = t_end - t_start
+    scale = args.time_scale if args.time_scale > 0 else None
+    report = {
+        'phones': len(devices), 'signals': len(readings), 'errors': errors,
+        'ingest_per_sec': round(len(readings) / wall, 1) if wall > 0 else None,
+        'signal_p50_ms': round(percentile(latencies, 50), 3), 'signal_p99_ms': round(percentile(latencies, 99), 3),
+        'signal_max_ms': round(max(latencies), 3) if latencies else None,
+        'fusion': fusion_scheduler.stats(), 'quakes': [], 'false_events': 0, 'db_events': len(db_events),
+    }
+    matched = [[] for _ in quakes]
+    for t_det, data in detections:
+        dists = [haversine_km(q.lat, q.lng, data['latitude'], data['longitude']) for q in quakes]
+        nearest = min(range(len(quakes)), key=dists.__getitem__)
+        if dists[nearest] <= args.area_km:
+            matched[nearest].append((t_det, data, dists[nearest]))
+        else:
+            report['false_events'] += 1
+    for i, quake in enumerate(quakes):
+        first_shake = min((r.t for r in readings if r.quake == i), default=None)
+        entry = {'quake': f"{quake.lat},{quake.lng} M{quake.magnitude}", 'events': len(matched[i]), 'duplicates': max(0, len(matched[i]) - 1)}
+        if matched[i] and first_shake is not None:
+            t_det, data, err = matched[i][0]
+            # Senaryo saniyesi duvar saatine çevrilir (time_scale=0 ise anlamsız)
+            entry['detect_ms'] = round((t_det - (t_start + first_shake / scale)) * 1000, 1) if scale else None
+            entry['epicenter_error_km'] = round(err, 2)
+            entry['signals_at_detect'] = data['participating_users']
+            entry['intensity'] = data['intensity_label']
+        report['quakes'].append(entry)
+
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+    else:
+        print(f"⚡ Ingest: {report['ingest_per_sec']}/sn, /signal p50 {report['signal_p50_ms']} ms, p99 {report['signal_p99_ms']} ms, hata {errors}")
+        print(f"🧮 Füzyon: {report['fusion']}")
+        for e in report['quakes']:
+            print(f"🚨 {e['quake']}: olay {e['events']} (tekrar {e['duplicates']}), ilk sarsıntıdan onaya {e.get('detect_ms')} ms, "
+                  f"merkez hatası {e.get('epicenter_error_km')} km, {e.get('signals_at_detect')} sinyal, {e.get('intensity')}")
+        print(f"❓ Yanlış olay: {report['false_events']}, DB'de açılan olay: {report['db_events']}")
+
+    if not args.keep:
+        await database.connect_db()
+        try:
+            await cleanup(database.pool, first_event_id)
+        finally:
+            await database.close_db()
+    # Sonraki koşuyu etkilemesin
+    event_dedup._events.clear()
+
+def main():
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument("--phones", type=int, default=5000)
+    p.add_argument("--quake", type=parse_quake, action="append", help="lat,lng,büyüklük[,başlangıç_sn[,derinlik_km]] (tekrarlanabilir)")
+    p.add_argument("--area-km", type=float, default=150, help="Telefonların deprem çevresine dağıldığı yarıçap")
+    p.add_argument("--trigger-pga", type=float, default=0.005, help="Telefonun sinyal gönderdiği en düşük PGA (g)")
+    p.add_argument("--offline-rate", type=float, default=0.2, help="Sinyal gönderemeyen telefon oranı")
+    p.add_argument("--false-rate", type=float, default=0.01, help="Yanlış pozitif okuma üreten telefon oranı")
+    p.add_argument("--glitch-rate", type=float, default=0.002, help="Anormal (> MAX_REALISTIC_PGA) okuma oranı")
+    p.add_argument("--time-scale", type=float, default=1.0, help="1: gerçek zaman, 2: iki kat hızlı, 0: beklemeden")
+    p.add_argument("--concurrency", type=int, default=200)
+    p.add_argument("--settle-sec", type=float, default=1.0)
+    p.add_argument("--startup-timeout", type=float, default=60.0, help="DB bağlantısı / ısınma için en fazla bekleme (sn)")
+    p.add_argument("--seed", type=int, default=1)
+    p.add_argument("--json", action="store_true", help="Raporu JSON olarak yaz")
+    p.add_argument("--keep", action="store_true", help="Test verisini silme")
+    p.add_argument("--dry-run", action="store_true", help="Sadece senaryoyu üret")
+    asyncio.run(run(p.parse_args()))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,250 @@
+import asyncio
+import json
+import logging
+import os
+from typing import Awaitable, Callable, Dict, List, Optional
+
+import asyncpg
+
+import database
+from event_broadcaster import _json_default
+
+logger = logging.getLogger("KENET-COORD")
+
+# ==========================================
+#   ÇOKLU WORKER FÜZYON KOORDİNASYONU
+# ==========================================
+# FUSION_COORDINATION=local (varsayılan): tek süreç, her şey bellek içinde.
+# FUSION_COORDINATION=postgres: birden çok uvicorn worker / sunucu.
+#   - Her worker kabul ettiği sinyal ve konumları kısa aralıklarla paketleyip
+#     kenet_signals kanalına NOTIFY eder (kompakt metin, payload < 8000 bayt).
+#   - pg_try_advisory_lock ile tek bir lider seçilir. Kilit, workerın ayrılmış
+#     bağlantısına (oturuma) bağlıdır: süreç ölür ya da bağlantı koparsa kilit
+#     düşer, diğer workerlardan biri COORD_LEADER_RETRY_SEC içinde devralır.
+#   - Yalnızca lider kenet_signals'ı dinler, sinyal indeksini doldurur ve füzyon
+#     yapar; tekilleştirme de tek yerde (liderin EventDedup'ında) olur.
+#   - Onaylanan olaylar (ve yeni resmi depremler) kenet_events kanalıyla tüm
+#     workerlara yayılır; her worker kendi önbelleğini temizler ve SSE
+#     istemcilerine iletir.
+
+FUSION_COORDINATION = os.getenv("FUSION_COORDINATION", "local").lower()
+COORD_FLUSH_MS = int(os.getenv("COORD_FLUSH_MS", "20"))
+COORD_LEADER_RETRY_SEC = float(os.getenv("COORD_LEADER_RETRY_SEC", "2"))
+
+SIGNAL_CHANNEL = "kenet_signals"
+EVENT_CHANNEL = "kenet_events"
+LEADER_LOCK_KEY = 0x4B454E4554  # "KENET"
+MAX_PAYLOAD = 7900  # NOTIFY sınırı 8000 bayt
+# bigint advisory kilidi pg_locks'ta classid (üst 32 bit) + objid (alt 32 bit) olarak görünür
+SQL_HOLDS_LEADER_LOCK = """
+    SELECT EXISTS (SELECT 1 FROM pg_locks WHERE locktype = 'advisory' AND pid = pg_backend_pid()
+                   AND granted AND classid = $1 AND objid = $2 AND objsubid = 1)
+"""
+
+def encode_record(uid: str, pga: Optional[float], lat: float, lng: float) -> str:
+    """Sinyal: "uid,pga,lat,lng"  Konum: "uid,,lat,lng"."""
+    return f"{uid},{'' if pga is None else f'{pga:.6g}'},{lat:.6f},{lng:.6f}"
+
+def decode_payload(payload: str):
+    for rec in payload.split(";"):
+        parts = rec.split(",")
+        if len(parts) != 4: continue
+        try:
+            yield parts[0], (float(parts[1]) if parts[1] else None), float(parts[2]), float(parts[3])
+        except ValueError:
+            continue
+
+class FusionCoordinator:
+    def __init__(self, mode: str = FUSION_COORDINATION, flush_ms: int = COORD_FLUSH_MS, retry_sec: float = COORD_LEADER_RETRY_SEC):
+        if mode not in ("local", "postgres"):
+            raise ValueError(f"Geçersiz FUSION_COORDINATION: {mode}")
+        self.mode = mode
+        self.flush_sec = flush_ms / 1000
+        self.retry_sec = retry_sec
+        self.is_leader = False
+        self._conn: Optional[asyncpg.Connection] = None
+        # Tek bağlantı üzerinde aynı anda tek işlem (asyncpg kuralı)
+        self._conn_lock = asyncio.Lock()
+        self._outbox: List[str] = []
+        self._tasks: List[asyncio.Task] = []
+        self.published = 0
+        self.received = 0
+        self.notify_errors = 0
+        self.elections = 0
+
+    def bind(
+        self,
+        on_signal: Callable[[str, float, float, float], None],
+        on_location: Callable[[str, float, float], None],
+        on_event: Callable[[str, Dict], None],
+        on_elected: Callable[[], Awaitable[None]],
+        on_demoted: Callable[[], None],
+    ):
+        """Uygulama tarafı işleyicileri (app.py bağlar)."""
+        self.on_signal = on_signal
+        self.on_location = on_location
+        self.on_event = on_event
+        self.on_elected = on_elected
+        self.on_demoted = on_demoted
+
+    @property
+    def distributed(self) -> bool:
+        return self.mode == "postgres"
+
+    # --- Yaşam döngüsü ---
+
+    async def start(self):
+        """Tekrar çağrılabilir: açılış adımı başarısız olursa bootstrap yeniden dener."""
+        if not self.distributed:
+            await self.on_elected()
+            self.is_leader = True
+            return
+        if self._tasks: return
+        self._tasks = [asyncio.create_task(self._leadership_loop()), asyncio.create_task(self._flush_loop())]
+
+    async def stop(self):
+        for t in self._tasks: t.cancel()
+        for t in self._tasks:
+            try: await t
+            except asyncio.CancelledError: pass
+        self._tasks = []
+        if self.distributed:
+            try: await self._flush()
+            except Exception: pass
+        await self._drop_connection()
+
+    # --- Giriş noktaları (endpoint'ler çağırır) ---
+
+    def submit_signal(self, uid: str, pga: float, lat: float, lng: float):
+        if not self.distributed:
+            self.on_signal(uid, pga, lat, lng)
+        elif "," not in uid and ";" not in uid:
+            self._outbox.append(encode_record(uid, pga, lat, lng))
+
+    def submit_location(self, uid: str, lat: float, lng: float):
+        if not self.distributed:
+            self.on_location(uid, lat, lng)
+        elif "," not in uid and ";" not in uid:
+            self._outbox.append(encode_record(uid, None, lat, lng))
+
+    async def announce(self, event: str, row: Dict):
+        """Yeni kaydı tüm workerlara duyurur (yerel modda doğrudan işler)."""
+        if not self.distributed:
+            self.on_event(event, row)
+            return
+        payload = json.dumps({"event": event, "data": row}, default=_json_default, ensure_ascii=False)
+        try:
+            await self._notify(EVENT_CHANNEL, payload)
+        except Exception as e:
+            # Koordinasyon bağlantısı yoksa en azından bu workerın istemcileri duysun
+            logger.error(f"Olay yayını başarısız, yerel iletiliyor: {e}")
+            self.on_event(event, row)
+
+    # --- Bağlantı ---
+
+    async def _connection(self) -> asyncpg.Connection:
+        if self._conn is None or self._conn.is_closed():
+            if self.is_leader:
+                # Kilit ve kenet_signals dinleyicisi eski oturumla gitti: lider değiliz,
+                # _leadership_loop kilidi yeni bağlantıda yeniden denesin
+                self._demote()
+            self._conn = await asyncpg.connect(database.DATABASE_URL)
+            await self._conn.add_listener(EVENT_CHANNEL, self._on_event_notify)
+        return self._conn
+
+    async def _drop_connection(self):
+        conn, self._conn = self._conn, None
+        if self.is_leader:
+            self._demote()
+        if conn is not None and not conn.is_closed():
+            try: await conn.close(timeout=2)
+            except Exception: conn.terminate()
+
+    async def _notify(self, channel: str, payload: str):
+        async with self._conn_lock:
+            conn = await self._connection()
+            await conn.execute("SELECT pg_notify($1, $2)", channel, payload)
+
+    # --- Sinyal yayını ---
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(self.flush_sec)
+            try:
+                await self._flush()
+            except Exception as e:
+                self.notify_errors += 1
+                logger.error(f"❌ Sinyal yayını başarısız: {e}")
+
+    async def _flush(self):
+        if not self._outbox: return
+        batch, self._outbox = self._outbox, []
+        payloads, current, size = [], [], 0
+        for rec in batch:
+            if size + len(rec) + 1 > MAX_PAYLOAD and current:
+                payloads.append(";".join(current))
+                current, size = [], 0
+            current.append(rec)
+            size += len(rec) + 1
+        if current: payloads.append(";".join(current))
+        for p in payloads:
+            await self._notify(SIGNAL_CHANNEL, p)
+        self.published += len(batch)
+
+    def _on_signal_notify(self, conn, pid, channel, payload):
+        if not self.is_leader: return
+        for uid, pga, lat, lng in decode_payload(payload):
+            self.received += 1
+            if pga is None:
+                self.on_location(uid, lat, lng)
+            else:
+                self.on_signal(uid, pga, lat, lng)
+
+    def _on_event_notify(self, conn, pid, channel, payload):
+        try:
+            msg = json.loads(payload)
+            self.on_event(msg["event"], msg["data"])
+        except Exception as e:
+            logger.error(f"Olay bildirimi işlenemedi: {e}")
+
+    # --- Liderlik ---
+
+    async def _leadership_loop(self):
+        while True:
+            try:
+                elected = False
+                async with self._conn_lock:
+                    conn = await self._connection()
+                    if self.is_leader:
+                        # Kilit bu oturumda hâlâ tutuluyor mu (bağlantı sessizce yenilenmiş olabilir)
+                        if not await conn.fetchval(SQL_HOLDS_LEADER_LOCK, LEADER_LOCK_KEY >> 32, LEADER_LOCK_KEY & 0xFFFFFFFF):
+                            self._demote()
+                            await conn.remove_listener(SIGNAL_CHANNEL, self._on_signal_notify)
+                    elif await conn.fetchval("SELECT pg_try_advisory_lock($1)", LEADER_LOCK_KEY):
+                        await conn.add_listener(SIGNAL_CHANNEL, self._on_signal_notify)
+                        self.is_leader = elected = True
+                if elected:
+                    self.elections += 1
+                    logger.info(f"👑 Füzyon lideri bu worker (pid {os.getpid()}).")
+                    await self.on_elected()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Koordinasyon bağlantısı koptu: {e}")
+                await self._drop_connection()
+            await asyncio.sleep(self.retry_sec)
+
+    def _demote(self):
+        self.is_leader = False
+        logger.warning("⚠️ Füzyon liderliği bırakıldı.")
+        self.on_demoted()
+
+    def stats(self) -> Dict:
+        return {
+            'mode': self.mode, 'is_leader': self.is_leader, 'elections': self.elections,
+            'outbox': len(self._outbox), 'published': self.published,
+            'received': self.received, 'notify_errors': self.notify_errors,
+        }
+
+# Uygulama genelinde tek koordinatör
+coordinator = FusionCoordinator()
@@ -1,5 +1,8 @@
 import os
 import base64
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Sequence
 from nacl.public import PrivateKey, PublicKey, Box
 from nacl.encoding import Base64Encoder
 from dotenv import load_dotenv
@@ -9,19 +12,33 @@ load_dotenv()
 # .env dosyasından Private Key'i güvenli şekilde al
 SERVER_PRIVATE_KEY_B64 = os.getenv("SERVER_PRIVATE_KEY")
 
+# Anahtar bir kez çözülür; her çağrıda base64 + PrivateKey kurulmaz
+_server_priv: Optional[PrivateKey] = None
+
+# Şifre çözme olay döngüsü dışında yapılır (libsodium çağrıları GIL'i bırakır)
+DECRYPT_WORKERS = int(os.getenv("DECRYPT_WORKERS", str(os.cpu_count() or 4)))
+_decrypt_executor = ThreadPoolExecutor(max_workers=DECRYPT_WORKERS, thread_name_prefix="kenet-decrypt")
+
+def _get_server_key() -> Optional[PrivateKey]:
+    global _server_priv
+    if _server_priv is None and SERVER_PRIVATE_KEY_B64:
+        _server_priv = PrivateKey(SERVER_PRIVATE_KEY_B64, encoder=Base64Encoder)
+    return _server_priv
+
 def decrypt_gateway_message(
     encrypted_payload_b64: str,
     nonce_b64: str,
     ephemeral_key_b64: str,
     integrity_tag_b64: str
-) -> str:
+) -> Optional[str]:
     """
     Android'den gelen X25519 + ChaCha20-Poly1305 şifreli paketi çözer.
+    Çözülemezse (anahtar yok, biçim, MAC) None döner; hata metni asla mesaj olmaz.
     """
     try:
         if not SERVER_PRIVATE_KEY_B64:
             print("❌ HATA: SERVER_PRIVATE_KEY .env dosyasında bulunamadı!")
-            return "[SERVER CONFIG ERROR]"
+            return None
 
         # 1. Base64 Decode (String -> Bytes)
         try:
@@ -31,10 +48,22 @@ def decrypt_gateway_message(
             tag_bytes = base64.b64decode(integrity_tag_b64)
         except Exception:
             print("❌ Base64 Decode Hatası")
-            return "[FORMAT HATASI]"
+            return None
+
+        return decrypt_gateway_bytes(cipher_bytes, nonce_bytes, sender_pub_bytes, tag_bytes)
+
+    except Exception as e:
+        print(f"⚠️ Şifre Çözme Başarısız: {e}")
+        return None
 
+def decrypt_gateway_bytes(cipher_bytes: bytes, nonce_bytes: bytes, sender_pub_bytes: bytes, tag_bytes: bytes) -> Optional[str]:
+    """Ham baytlarla şifre çözme (base64 adımı olmadan). Çözülemezse None."""
+    try:
         # 2. Anahtarları Oluştur
-        server_priv = PrivateKey(SERVER_PRIVATE_KEY_B64, encoder=Base64Encoder)
+        server_priv = _get_server_key()
+        if server_priv is None:
+            print("❌ HATA: SERVER_PRIVATE_KEY .env dosyasında bulunamadı!")
+            return None
         sender_pub = PublicKey(sender_pub_bytes) # Raw bytes
 
         # 3. Kripto Kutusu (Box) Oluştur
@@ -55,4 +84,38 @@ def decrypt_gateway_message(
 
     except Exception as e:
         print(f"⚠️ Şifre Çözme Başarısız: {e}")
-        return "[ŞİFRE ÇÖZÜLEMEDİ]"
\ No newline at end of file
+        return None
+
+async def decrypt_gateway_message_async(
+    encrypted_payload_b64: str,
+    nonce_b64: str,
+    ephemeral_key_b64: str,
+    integrity_tag_b64: str
+) -> Optional[str]:
+    """decrypt_gateway_message'ın iş parçacığı havuzunda çalışan sürümü."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        _decrypt_executor, decrypt_gateway_message,
+        encrypted_payload_b64, nonce_b64, ephemeral_key_b64, integrity_tag_b64
+    )
+
+async def decrypt_gateway_bytes_async(cipher_bytes: bytes, nonce_bytes: bytes, sender_pub_bytes: bytes, tag_bytes: bytes) -> Optional[str]:
+    """İkili gateway paketleri için: base64 çözmeden, iş parçacığı havuzunda."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_decrypt_executor, decrypt_gateway_bytes, cipher_bytes, nonce_bytes, sender_pub_bytes, tag_bytes)
+
+def _decrypt_chunk(packets: Sequence) -> List[Optional[str]]:
+    return [decrypt_gateway_message(p.encrypted_payload, p.nonce, p.ephemeral_key, p.integrity_tag) for p in packets]
+
+async def decrypt_gateway_batch(packets: Sequence) -> List[Optional[str]]:
+    """
+    Birden çok GatewaySmsRequest paketini eşzamanlı çözer.
+    Paketler işçi sayısı kadar parçaya bölünür; sonuç sırası girişle aynıdır
+    (çözülemeyenler None).
+    """
+    if not packets: return []
+    loop = asyncio.get_running_loop()
+    size = -(-len(packets) // DECRYPT_WORKERS)
+    chunks = [packets[i:i + size] for i in range(0, len(packets), size)]
+    results = await asyncio.gather(*(loop.run_in_executor(_decrypt_executor, _decrypt_chunk, c) for c in chunks))
+    return [msg for chunk in results for msg in chunk]
@@ -1,24 +1,88 @@
+import asyncio
 import asyncpg
 from dotenv import load_dotenv
+import math
 import os
-from typing import Optional, Dict, List
+from datetime import datetime
+from typing import Iterable, Optional, Dict, List, Set
 from models import ContactModel
 from utils import generate_short_id
+from user_cache import user_cache
+from metrics import registry, timed_query
+import queries
+from queries import KenetConnection
 
 load_dotenv()
 DATABASE_URL = os.getenv("DATABASE_URL")
+# İş yükü başına ayrı havuz: bir yoldaki taşma diğerlerinin bağlantısını tüketmez
+DB_POOL_SIZES = {
+    'interactive': int(os.getenv("DB_POOL_INTERACTIVE_SIZE", "10")),  # kullanıcı API'leri, listeler, rehber
+    'ingest': int(os.getenv("DB_POOL_INGEST_SIZE", "4")),             # sinyal/konum toplu yazımları, olay kaydı
+    'background': int(os.getenv("DB_POOL_BACKGROUND_SIZE", "2")),     # Kandilli, SMS kuyruğu, uyarı alıcıları, bölüm bakımı, açılış
+}
+USER_ID_LEN = 8  # users.user_id CHAR(8)
+SIGNAL_COLUMNS = ['user_id', 'pga', 'latitude', 'longitude']
 pool = None
+ingest_pool = None
+background_pool = None
+# Sorgular bağlantıyı queries.acquire ile alır (bekleme süresi havuz etiketiyle ölçülür);
+# yalnızca sağlık kontrolü (ping_db) havuzu doğrudan kullanır.
+
+async def _create_pool(name: str, size: int, init=None) -> asyncpg.Pool:
+    p = await asyncpg.create_pool(DATABASE_URL, min_size=size, max_size=size, init=init,
+                                  connection_class=KenetConnection)
+    queries.POOL_LABELS[id(p)] = name
+    return p
+
+def _pools() -> Dict[str, asyncpg.Pool]:
+    return {n: p for n, p in (('interactive', pool), ('ingest', ingest_pool), ('background', background_pool)) if p is not None}
 
 async def connect_db():
-    global pool
+    """
+    Üç havuzu sabit boyutta, bağlantıları açık kurar; interactive bağlantılarda
+    adlı sorgular (queries.py) açılışta hazırlanır.
+    Hata yutulmaz: çağıran tekrar dener (uygulama) ya da çıkar (CLI / benchmark).
+    """
+    global pool, ingest_pool, background_pool
+    results = await asyncio.gather(
+        _create_pool('interactive', DB_POOL_SIZES['interactive'], init=queries.prepare_all),
+        _create_pool('ingest', DB_POOL_SIZES['ingest']),
+        _create_pool('background', DB_POOL_SIZES['background']),
+        return_exceptions=True,
+    )
+    errors = [r for r in results if isinstance(r, BaseException)]
+    if errors:
+        for r in results:
+            if not isinstance(r, BaseException):
+                queries.POOL_LABELS.pop(id(r), None)
+                await r.close()
+        print(f"HATA: DB Bağlantı Hatası: {errors[0]}")
+        raise errors[0]
+    pool, ingest_pool, background_pool = results
+    print("INFO: PostgreSQL Bağlantısı Başarılı.")
+
+async def ping_db(timeout: float = 1.0) -> bool:
+    if pool is None: return False
     try:
-        pool = await asyncpg.create_pool(DATABASE_URL)
-        print("INFO: PostgreSQL Bağlantısı Başarılı.")
-    except Exception as e:
-        print(f"HATA: DB Bağlantı Hatası: {e}")
+        return await pool.fetchval("SELECT 1", timeout=timeout) == 1
+    except Exception:
+        return False
 
 async def close_db():
-    if pool: await pool.close()
+    global pool, ingest_pool, background_pool
+    for p in _pools().values():
+        queries.POOL_LABELS.pop(id(p), None)
+        await p.close()
+    pool = ingest_pool = background_pool = None
+
+registry.gauge_callback("kenet_db_pool_size", "Havuzdaki açık bağlantılar.",
+                        lambda: {(n,): p.get_size() for n, p in _pools().items()}, ("pool",))
+registry.gauge_callback("kenet_db_pool_idle", "Havuzdaki boşta bağlantılar.",
+                        lambda: {(n,): p.get_idle_size() for n, p in _pools().items()}, ("pool",))
+registry.gauge_callback("kenet_db_pool_max_size", "Havuzun azami boyutu.",
+                        lambda: {(n,): p.get_max_size() for n, p in _pools().items()}, ("pool",))
+registry.gauge_callback("kenet_db_pool_utilization", "Kullanımdaki bağlantı oranı (0-1).",
+                        lambda: {(n,): (p.get_size() - p.get_idle_size()) / p.get_max_size() for n, p in _pools().items()}, ("pool",))
 
 def sanitize_phone(phone: str) -> str:
     p = ''.join(filter(str.isdigit, phone))
@@ -27,139 +91,327 @@ def sanitize_phone(phone: str) -> str:
     return p
 
 # --- KULLANICI İŞLEMLERİ ---
-async def get_user_by_phone(phone: str) -> Optional[Dict]:
-    return await pool.fetchrow("SELECT * FROM users WHERE phone_number = $1", sanitize_phone(phone))
+# Okumalar user_cache üzerinden yapılır; aşağıdaki yazma fonksiyonları ilgili kaydı siler.
+# Süre yalnızca önbellek ıskasında (veritabanı okumasında) ölçülür.
+@timed_query
+async def fetch_user_by_phone(clean: str):
+    return await queries.fetchrow(pool, 'user_by_phone', clean)
+
+@timed_query
+async def fetch_user_by_id(uid: str):
+    return await queries.fetchrow(pool, 'user_by_id', uid)
+
+async def get_user_by_phone(phone: str, fresh: bool = False) -> Optional[Dict]:
+    """
+    fresh=True önbelleği atlar: önbellek silmeleri süreç içidir, çoklu workerda başka
+    bir worker'ın yazdığı OTP / anahtar TTL boyunca bayat görünebilir.
+    """
+    clean = sanitize_phone(phone)
+    user = None if fresh else user_cache.get_by_phone(clean)
+    if user is None:
+        gen = user_cache.generation
+        user = await fetch_user_by_phone(clean)
+        user_cache.put(user, gen)
+    return user
 
 async def get_user_by_id(uid: str) -> Optional[Dict]:
-    return await pool.fetchrow("SELECT * FROM users WHERE user_id = $1", uid)
+    user = user_cache.get_by_id(uid)
+    if user is None:
+        gen = user_cache.generation
+        user = await fetch_user_by_id(uid)
+        user_cache.put(user, gen)
+    return user
+
+@timed_query
+async def fetch_known_user_ids(uids: List[str]) -> Set[str]:
+    async with queries.acquire(pool) as conn:
+        rows = await conn.fetch("""
+            SELECT DISTINCT v.uid FROM unnest($1::text[]) AS v(uid) JOIN users u ON u.user_id = v.uid
+        """, uids)
+    return {r['uid'] for r in rows}
+
+async def known_user_ids(uids: Iterable[str]) -> Set[str]:
+    """Kayıtlı olan id'ler: önbellekte olanlar + kalanlar için tek sorgu."""
+    uids = set(uids)
+    known = {uid for uid in uids if user_cache.get_by_id(uid) is not None}
+    missing = uids - known
+    if missing:
+        known |= await fetch_known_user_ids(list(missing))
+    return known
 
+@timed_query
 async def upsert_otp(phone: str, otp: str):
     clean = sanitize_phone(phone)
     user = await get_user_by_phone(clean)
     if user:
-        await pool.execute("UPDATE users SET verification_code = $1 WHERE phone_number = $2", otp, clean)
+        async with queries.acquire(pool) as conn:
+            await conn.execute("UPDATE users SET verification_code = $1 WHERE phone_number = $2", otp, clean)
     else:
         new_id = generate_short_id(clean)
-        await pool.execute("INSERT INTO users (user_id, phone_number, verification_code, display_name) VALUES ($1, $2, $3, '')", new_id, clean, otp)
+        async with queries.acquire(pool) as conn:
+            await conn.execute("INSERT INTO users (user_id, phone_number, verification_code, display_name) VALUES ($1, $2, $3, '')", new_id, clean, otp)
+    user_cache.invalidate(phone=clean)
 
+@timed_query
 async def activate_new_user(phone: str, uid: str, priv: str, pub: str):
-    await pool.execute("UPDATE users SET ibe_private_key = $1, public_params = $2, user_id = $3 WHERE phone_number = $4", priv, pub, uid, sanitize_phone(phone))
+    clean = sanitize_phone(phone)
+    async with queries.acquire(pool) as conn:
+        await conn.execute("UPDATE users SET ibe_private_key = $1, public_params = $2, user_id = $3 WHERE phone_number = $4", priv, pub, uid, clean)
+    # user_id de değişebilir: hem eski (telefon üzerinden) hem yeni kaydı sil
+    user_cache.invalidate(uid=uid, phone=clean)
 
+@timed_query
 async def update_user_profile(phone: str, name: str, blood: str):
-    await pool.execute("UPDATE users SET display_name = $1, blood_type = $2 WHERE phone_number = $3", name, blood, sanitize_phone(phone))
-
-async def update_user_location(user_id: str, lat: float, lng: float):
-    # last_seen'i güncellemek hayati önem taşır (Aktif kullanıcı sayımı için)
-    await pool.execute("UPDATE users SET latitude = $1, longitude = $2, last_seen = NOW() WHERE user_id = $3", lat, lng, user_id)
+    clean = sanitize_phone(phone)
+    async with queries.acquire(pool) as conn:
+        await conn.execute("UPDATE users SET display_name = $1, blood_type = $2 WHERE phone_number = $3", name, blood, clean)
+    user_cache.invalidate(phone=clean)
 
 # --- REHBER & SMS ---
+@timed_query
 async def add_contacts_to_db(owner_phone: str, contacts: List[ContactModel]):
-    clean_owner = sanitize_phone(owner_phone)
-    owner = await get_user_by_phone(clean_owner)
-    if not owner: return
-    owner_id = owner['user_id']
+    """
+    Rehberi tek sorguda içe aktarır: sahip ve kayıtlı kişiler users ile
+    küme bazlı eşleştirilir, sonuç tek INSERT ... ON CONFLICT ile yazılır.
+    """
+    # Aynı numara listede birden fazla varsa son kayıt geçerli (eski sıralı davranış)
+    merged = {}
     for c in contacts:
-        clean_c = sanitize_phone(c.phone_number)
-        reg = await get_user_by_phone(clean_c)
-        c_id = reg['user_id'] if reg else None
-        is_reg = reg is not None
-        await pool.execute("""
+        merged[sanitize_phone(c.phone_number)] = c.display_name
+    if not merged: return
+    phones = list(merged)
+    names = [merged[p] for p in phones]
+    async with queries.acquire(pool) as conn:
+        await conn.execute("""
             INSERT INTO contacts (owner_id, contact_id, phone_number, display_name, is_registered_user)
-            VALUES ($1, $2, $3, $4, $5)
-            ON CONFLICT (owner_id, phone_number) DO UPDATE SET display_name = $4, contact_id = $2, is_registered_user = $5
-        """, owner_id, c_id, clean_c, c.display_name, is_reg)
+            SELECT o.user_id, u.user_id, c.phone, c.name, u.user_id IS NOT NULL
+            FROM (SELECT user_id FROM users WHERE phone_number = $1) o
+            CROSS JOIN unnest($2::text[], $3::text[]) AS c(phone, name)
+            LEFT JOIN users u ON u.phone_number = c.phone
+            ON CONFLICT (owner_id, phone_number) DO UPDATE
+            SET display_name = EXCLUDED.display_name, contact_id = EXCLUDED.contact_id, is_registered_user = EXCLUDED.is_registered_user
+        """, sanitize_phone(owner_phone), phones, names)
 
+@timed_query
 async def get_registered_users_details(phones: List[str]) -> List[Dict]:
     clean = [sanitize_phone(p) for p in phones]
-    return await pool.fetch("SELECT * FROM users WHERE phone_number = ANY($1::text[])", clean)
+    return await queries.fetch(pool, 'registered_users', clean)
 
+@timed_query
 async def get_user_contacts(uid: str) -> List[Dict]:
-    return await pool.fetch("SELECT c.*, u.latitude, u.longitude, u.public_params FROM contacts c LEFT JOIN users u ON c.contact_id = u.user_id WHERE c.owner_id = $1", uid)
+    return await queries.fetch(pool, 'user_contacts', uid)
 
+@timed_query
 async def delete_contact_from_db(o_phone: str, c_phone: str):
     owner = await get_user_by_phone(o_phone)
-    if owner: await pool.execute("DELETE FROM contacts WHERE owner_id = $1 AND phone_number = $2", owner['user_id'], sanitize_phone(c_phone))
+    if not owner: return
+    async with queries.acquire(pool) as conn:
+        await conn.execute("DELETE FROM contacts WHERE owner_id = $1 AND phone_number = $2", owner['user_id'], sanitize_phone(c_phone))
 
-async def is_sms_processed(uid: str) -> bool:
-    return await pool.fetchval("SELECT 1 FROM sms_logs WHERE packet_uid = $1", uid) is not None
+# --- GİDEN SMS KUYRUĞU ---
+# Mesaj metni sadece PENDING iken tutulur; gönderim bitince "ENCRYPTED" ile ezilir.
+@timed_query
+async def enqueue_sms(uid: str, sender: str, target: str, message: str) -> bool:
+    """Paketi atomik olarak sahiplenir. Aynı packet_uid daha önce alındıysa False."""
+    async with queries.acquire(pool) as conn:
+        return await conn.fetchval("""
+            INSERT INTO sms_logs (packet_uid, sender_phone, target_phone, message_content, status, attempts, updated_at)
+            VALUES ($1, $2, $3, $4, 'PENDING', 0, NOW())
+            ON CONFLICT (packet_uid) DO NOTHING
+            RETURNING TRUE
+        """, uid, sender, target, message) is not None
 
-async def log_sms_attempt(uid, sender, target, content, status, resp):
-    await pool.execute("INSERT INTO sms_logs (packet_uid, sender_phone, target_phone, message_content, status, provider_response) VALUES ($1, $2, $3, $4, $5, $6)", uid, sender, target, content, status, resp)
+@timed_query
+async def claim_stale_sms(lease_sec: float) -> List[Dict]:
+    """
+    Kira süresi (updated_at) dolmuş PENDING kayıtları atomik olarak sahiplenir.
+    Canlı bir worker kendi kayıtlarını renew_sms_leases ile tazeler; SKIP LOCKED
+    sayesinde aynı anda çalışan iki worker aynı kaydı alamaz.
+    """
+    async with queries.acquire(background_pool) as conn:
+        return await conn.fetch("""
+            UPDATE sms_logs s SET updated_at = NOW()
+            FROM (
+                SELECT packet_uid FROM sms_logs
+                WHERE status = 'PENDING' AND (updated_at IS NULL OR updated_at < NOW() - ($1 || ' seconds')::INTERVAL)
+                ORDER BY created_at
+                FOR UPDATE SKIP LOCKED
+            ) p
+            WHERE s.packet_uid = p.packet_uid
+            RETURNING s.packet_uid, s.target_phone, s.message_content, s.attempts
+        """, str(lease_sec))
+
+@timed_query
+async def renew_sms_leases(uids: List[str]):
+    async with queries.acquire(background_pool) as conn:
+        await conn.execute("""
+            UPDATE sms_logs SET updated_at = NOW() WHERE packet_uid = ANY($1::text[]) AND status = 'PENDING'
+        """, uids)
+
+@timed_query
+async def mark_sms_retry(uid: str, resp: str, attempts: int):
+    async with queries.acquire(background_pool) as conn:
+        await conn.execute("UPDATE sms_logs SET provider_response = $2, attempts = $3, updated_at = NOW() WHERE packet_uid = $1", uid, resp, attempts)
+
+@timed_query
+async def finish_sms(uid: str, status: str, resp: str, attempts: int):
+    async with queries.acquire(background_pool) as conn:
+        await conn.execute("""
+            UPDATE sms_logs SET status = $2, provider_response = $3, attempts = $4,
+            message_content = 'ENCRYPTED', updated_at = NOW()
+            WHERE packet_uid = $1
+        """, uid, status, resp, attempts)
 
 # ==================================================
 #      DEPREM ALGORİTMASI VERİTABANI İŞLEMLERİ
 # ==================================================
 
-async def insert_seismic_signal(user_id: str, pga: float, lat: float, lng: float):
-    """Telefondan gelen ham titreşim verisini kaydeder."""
-    await pool.execute("""
-        INSERT INTO seismic_signals (user_id, pga, latitude, longitude, created_at)
-        VALUES ($1, $2, $3, $4, NOW())
-    """, user_id, pga, lat, lng)
-
-async def get_nearby_users_count(lat: float, lng: float, radius_km: int) -> int:
-    """O bölgedeki aktif (son 1 saatte sinyal/konum atmış) kullanıcı sayısı."""
-    query = """
-        SELECT COUNT(*) FROM users
-        WHERE last_seen > NOW() - INTERVAL '1 hour'
-        AND ST_DWithin(location, ST_SetSRID(ST_MakePoint($1, $2), 4326)::geography, $3)
-    """
-    # $1=lng, $2=lat, $3=meters
-    count = await pool.fetchval(query, lng, lat, radius_km * 1000)
-    return count if count else 0
-
-async def get_recent_signals_stats(lat: float, lng: float, radius_km: int, seconds: int):
-    """Son X saniyede, X km yarıçapındaki sinyalleri analiz eder."""
-    query = """
-        SELECT COUNT(DISTINCT user_id) as signal_count, AVG(pga) as avg_pga, AVG(latitude) as center_lat, AVG(longitude) as center_lng
-        FROM seismic_signals
-        WHERE created_at > (NOW() - ($4 || ' seconds')::INTERVAL)
-        AND ST_DWithin(location, ST_SetSRID(ST_MakePoint($1, $2), 4326)::geography, $3)
-    """
-    return await pool.fetchrow(query, lng, lat, radius_km * 1000, str(seconds))
+@timed_query
+async def insert_seismic_signals_bulk(records: List[tuple]) -> List[bool]:
+    """
+    Sinyal partisini tek seferde yazar: (user_id, pga, lat, lng).
+    COPY de satır trigger'larını çalıştırır, location kolonu yine dolar.
+    Dönüş: kayıt başına yazıldı mı. Bilinmeyen kullanıcı ya da geçersiz veri
+    yalnızca o satırı düşürür, partideki diğer istekleri etkilemez.
+    """
+    if not records: return []
+    async with queries.acquire(ingest_pool) as conn:
+        try:
+            await conn.copy_records_to_table('seismic_signals', records=records, columns=SIGNAL_COLUMNS)
+            return [True] * len(records)
+        except (asyncpg.ForeignKeyViolationError, asyncpg.DataError):
+            pass
+        # Partide kayıtlı olmayan kullanıcı ya da CHAR(8)'e sığmayan id var:
+        # bilinen kullanıcıların satırlarını tekrar tek COPY ile yaz
+        known = {r['uid'] for r in await conn.fetch("""
+            SELECT DISTINCT v.uid FROM unnest($1::text[]) AS v(uid) JOIN users u ON u.user_id = v.uid
+        """, list({rec[0] for rec in records}))}
+        written = [rec[0] in known for rec in records]
+        try:
+            await conn.copy_records_to_table('seismic_signals', records=[r for r, ok in zip(records, written) if ok], columns=SIGNAL_COLUMNS)
+            return written
+        except asyncpg.DataError:
+            pass
+        # Son çare: satır satır, her biri ayrı; yalnızca hatalı satırlar düşer
+        for i, rec in enumerate(records):
+            if not written[i]: continue
+            try:
+                await conn.execute("INSERT INTO seismic_signals (user_id, pga, latitude, longitude) VALUES ($1, $2, $3, $4)", *rec)
+            except (asyncpg.IntegrityConstraintViolationError, asyncpg.DataError):
+                written[i] = False
+        return written
 
-async def create_app_detected_event(lat: float, lng: float, intensity: str, max_pga: float, user_count: int):
+@timed_query
+async def update_user_locations_bulk(locations: Dict[str, tuple]):
+    """{user_id: (lat, lng)} eşlemesini tek UPDATE ile yazar."""
+    if not locations: return
+    uids = list(locations)
+    lats = [locations[u][0] for u in uids]
+    lngs = [locations[u][1] for u in uids]
+    async with queries.acquire(ingest_pool) as conn:
+        await conn.execute("""
+            UPDATE users u SET latitude = v.lat, longitude = v.lng, last_seen = NOW()
+            FROM unnest($1::text[], $2::float8[], $3::float8[]) AS v(uid, lat, lng)
+            WHERE u.user_id = v.uid
+        """, uids, lats, lngs)
+
+@timed_query
+async def get_active_user_locations(hours: int):
+    """Açılışta yoğunluk haritasını doldurmak için aktif kullanıcılar (eskiden yeniye)."""
+    async with queries.acquire(background_pool) as conn:
+        return await conn.fetch("""
+            SELECT user_id, latitude, longitude, EXTRACT(EPOCH FROM (NOW() - last_seen)) AS age_sec
+            FROM users
+            WHERE last_seen > NOW() - ($1 || ' hours')::INTERVAL
+            AND latitude IS NOT NULL AND longitude IS NOT NULL
+            ORDER BY last_seen ASC
+        """, str(hours))
+
+@timed_query
+async def get_alert_recipients(lat: float, lng: float, radius_km: float, active_minutes: int):
     """
-    Kenet algoritmasının tespit ettiği depremi kaydeder.
-    Spam Koruması: Aynı bölgede son 5 dakikada kayıt varsa tekrar oluşturmaz.
+    Erken uyarı alıcıları: merkez üssüne radius_km içindeki aktif kullanıcılar,
+    yakından uzağa (S dalgasının varış sırası). && kutusu users.location GiST
+    indeksini kullanır, kesin mesafe geography ile hesaplanır. Olay anında ingest
+    havuzu sinyal seliyle dolu olur: sorgu background havuzundan çalışır.
     """
-    exists = await pool.fetchrow("""
-        SELECT id FROM app_detected_events
-        WHERE created_at > NOW() - INTERVAL '5 minutes'
-        AND ST_DWithin(location, ST_SetSRID(ST_MakePoint($1, $2), 4326)::geography, 20000)
-    """, lng, lat)
+    # Boylam derecesi enlemle kısalır: kutu her yönde en az radius_km kapsasın
+    box_deg = radius_km / (111.32 * max(math.cos(math.radians(lat)), 0.01))
+    async with queries.acquire(background_pool) as conn:
+        return await conn.fetch("""
+            WITH e AS (SELECT ST_SetSRID(ST_MakePoint($1, $2), 4326) AS g)
+            SELECT u.user_id, ST_Distance(u.location::geography, e.g::geography) / 1000 AS distance_km
+            FROM users u, e
+            WHERE u.last_seen > NOW() - ($4 || ' minutes')::INTERVAL
+            AND u.location && ST_Expand(e.g, $5)
+            AND ST_DWithin(u.location::geography, e.g::geography, $3)
+            ORDER BY distance_km
+        """, lng, lat, radius_km * 1000, str(active_minutes), box_deg)
 
-    if exists: return exists['id']
+@timed_query
+async def create_app_detected_event(lat: float, lng: float, intensity: str, max_pga: float, user_count: int):
+    """
+    Kenet algoritmasının tespit ettiği depremi kaydeder, eklenen satırı döner.
+    Spam koruması (aynı bölgede 5 dakika) füzyon motorunda bellek içinde yapılır.
+    """
+    async with queries.acquire(ingest_pool) as conn:
+        return await conn.fetchrow("""
+            INSERT INTO app_detected_events (latitude, longitude, intensity_label, max_pga, participating_users, created_at)
+            VALUES ($1, $2, $3, $4, $5, NOW())
+            RETURNING id, latitude, longitude, intensity_label, max_pga, participating_users, created_at
+        """, lat, lng, intensity, max_pga, user_count)
 
-    return await pool.fetchval("""
-        INSERT INTO app_detected_events (latitude, longitude, intensity_label, max_pga, participating_users, created_at)
-        VALUES ($1, $2, $3, $4, $5, NOW()) RETURNING id
-    """, lat, lng, intensity, max_pga, user_count)
+@timed_query
+async def get_recent_app_detected_events(minutes: int):
+    """Açılışta tekilleştirme hafızasını doldurmak için son olaylar ve yaşları (sn)."""
+    async with queries.acquire(background_pool) as conn:
+        return await conn.fetch("""
+            SELECT latitude, longitude, EXTRACT(EPOCH FROM (NOW() - created_at)) AS age_sec
+            FROM app_detected_events
+            WHERE created_at > NOW() - ($1 || ' minutes')::INTERVAL
+        """, str(minutes))
 
-async def get_app_detected_events_db(hours: int):
-    """Mobil uygulama 1. Sekme (Polling) için."""
-    return await pool.fetch("""
-        SELECT * FROM app_detected_events
-        WHERE created_at > NOW() - ($1 || ' hours')::INTERVAL
-        ORDER BY created_at DESC
-    """, str(hours))
+def since_args(since: Optional[datetime]) -> tuple:
+    """
+    Kolonlar saat dilimsiz TIMESTAMP: tz'li bir datetime asyncpg'de doğrudan
+    karşılaştırılamaz. Saat dilimsiz değer $3, tz'li değer $4 olarak gider.
+    """
+    if since is None or since.tzinfo is None: return since, None
+    return None, since
 
-async def get_confirmed_earthquakes_db(hours: int):
-    """Mobil uygulama 2. Sekme (Resmi Veri) için."""
-    return await pool.fetch("""
-        SELECT * FROM confirmed_earthquakes
-        WHERE occurred_at > NOW() - ($1 || ' hours')::INTERVAL
-        ORDER BY occurred_at DESC
-    """, str(hours))
+@timed_query
+async def get_app_detected_events_db(hours: int, since_id: Optional[int] = None, since: Optional[datetime] = None):
+    """
+    Mobil uygulama 1. Sekme (Polling) için.
+    since_id / since verilirse sadece o imleçten sonraki kayıtlar döner.
+    """
+    return await queries.fetch(pool, 'app_events', str(hours), since_id, *since_args(since))
 
-async def get_confirmed_earthquakes_db(hours: int = 24):
+@timed_query
+async def get_confirmed_earthquakes_db(hours: int = 24, since_id: Optional[int] = None, since: Optional[datetime] = None):
     """
     Son X saatte gerçekleşen resmi depremleri getirir.
-    En yeniden en eskiye sıralar.
-    """
-    query = """
-        SELECT * FROM confirmed_earthquakes
-        WHERE occurred_at > NOW() - ($1 || ' hours')::INTERVAL
-        ORDER BY occurred_at DESC
+    En yeniden en eskiye sıralar. since_id / since ile sadece fark döner.
     """
-    return await pool.fetch(query, str(hours))
\ No newline at end of file
+    return await queries.fetch(pool, 'confirmed_earthquakes', str(hours), since_id, *since_args(since))
+
+@timed_query
+async def get_latest_earthquake_external_id() -> Optional[str]:
+    """Kandilli aktarımının kaldığı yer (external_id tarih damgası, sıralanabilir)."""
+    async with queries.acquire(background_pool) as conn:
+        return await conn.fetchval("SELECT MAX(external_id) FROM confirmed_earthquakes")
+
+@timed_query
+async def insert_confirmed_earthquakes_bulk(rows: List[Dict]):
+    """Yeni resmi depremleri tek INSERT ile yazar; sadece gerçekten eklenenleri döner."""
+    async with queries.acquire(background_pool) as conn:
+        return await conn.fetch("""
+            INSERT INTO confirmed_earthquakes (external_id, title, magnitude, depth, latitude, longitude, occurred_at)
+            SELECT * FROM unnest($1::varchar[], $2::varchar[], $3::float8[], $4::float8[], $5::float8[], $6::float8[], $7::timestamp[])
+            ON CONFLICT (external_id) DO NOTHING
+            RETURNING id, external_id, title, magnitude, depth, latitude, longitude, occurred_at
+        """,
+            [r['external_id'] for r in rows], [r['title'] for r in rows],
+            [r['magnitude'] for r in rows], [r['depth'] for r in rows],
+            [r['latitude'] for r in rows], [r['longitude'] for r in rows],
+            [r['occurred_at'] for r in rows])
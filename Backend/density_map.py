@@ -0,0 +1,79 @@
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional, Tuple
+
+from geo_grid import Cell, cell_center, cell_of, cells_in_radius, haversine_km
+
+# ==========================================
+#      AKTİF KULLANICI YOĞUNLUK HARİTASI
+# ==========================================
+# Füzyon oranının paydası (bölgedeki aktif kullanıcı sayısı) her seferinde
+# users tablosu taranarak değil, hücre başına tutulan sayaçlardan okunur.
+# Son ACTIVE_USER_TTL_SEC içinde konum/sinyal göndermeyen kullanıcı düşer.
+
+ACTIVE_USER_TTL_SEC = 3600
+DENSITY_CELL_DEG = 0.02  # ~2 km; 20 km yarıçapı hücre hassasiyetinde yaklaşık
+
+class ActiveUserDensity:
+    def __init__(self, ttl_sec: float = ACTIVE_USER_TTL_SEC, cell_deg: float = DENSITY_CELL_DEG):
+        self.ttl_sec = ttl_sec
+        self.cell_deg = cell_deg
+        # user_id -> (hücre, son görülme); en eski başta kalır
+        self._users: "OrderedDict[str, Tuple[Cell, float]]" = OrderedDict()
+        self.cell_counts: Dict[Cell, int] = {}
+
+    def touch(self, user_id: str, lat: float, lng: float, ts: Optional[float] = None):
+        """
+        Kullanıcının konumunu/son görülmesini günceller. Daha eski zamanlı bir kayıt
+        (ör. DB'den tohumlama) canlı bir güncellemeyi ezmez; sona yalnızca zamanı
+        ilerleyen kayıt taşınır, böylece sıra expire için en eskiden yeniye kalır.
+        """
+        now = ts if ts is not None else time.monotonic()
+        prev = self._users.get(user_id)
+        if prev is not None:
+            if now < prev[1]: return
+            self._decrement(prev[0])
+            del self._users[user_id]
+        cell = cell_of(lat, lng, self.cell_deg)
+        self._users[user_id] = (cell, now)
+        self.cell_counts[cell] = self.cell_counts.get(cell, 0) + 1
+
+    def seed(self, entries: Iterable[Tuple[str, float, float, float]]):
+        """
+        (user_id, lat, lng, ts) kayıtlarını toplu ekler. Tohumlama sırasında gelmiş canlı
+        kayıtlar daha yeni olabilir: sonunda sıra bir kez zamana göre yeniden kurulur.
+        """
+        for user_id, lat, lng, ts in entries:
+            self.touch(user_id, lat, lng, ts=ts)
+        self._users = OrderedDict(sorted(self._users.items(), key=lambda item: item[1][1]))
+
+    def _decrement(self, cell: Cell):
+        left = self.cell_counts[cell] - 1
+        if left: self.cell_counts[cell] = left
+        else: del self.cell_counts[cell]
+
+    def expire(self, now: Optional[float] = None) -> int:
+        """Süresi dolan kullanıcıları sayaçlardan düşer."""
+        now = now if now is not None else time.monotonic()
+        cutoff = now - self.ttl_sec
+        removed = 0
+        while self._users:
+            uid, (cell, seen) = next(iter(self._users.items()))
+            if seen > cutoff: break
+            self._users.popitem(last=False)
+            self._decrement(cell)
+            removed += 1
+        return removed
+
+    def count_within(self, lat: float, lng: float, radius_km: float, now: Optional[float] = None) -> int:
+        """Merkezi yarıçap içinde kalan hücrelerin sayaçlarını toplar."""
+        self.expire(now)
+        total = 0
+        for cell in cells_in_radius(lat, lng, radius_km, self.cell_deg):
+            n = self.cell_counts.get(cell)
+            if n and haversine_km(lat, lng, *cell_center(cell, self.cell_deg)) <= radius_km:
+                total += n
+        return total
+
+    def __len__(self) -> int:
+        return len(self._users)
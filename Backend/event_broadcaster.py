@@ -0,0 +1,75 @@
+import asyncio
+import json
+import logging
+from datetime import datetime
+from typing import Callable, Optional, Set
+
+logger = logging.getLogger("KENET-EVENTS")
+
+# ==========================================
+#      OLAY YAYINCISI (Server-Sent Events)
+# ==========================================
+# Yeni deprem kayıtları bir kez SSE çerçevesine çevrilir ve bağlı tüm
+# istemcilerin kuyruğuna eklenir. İstemci başına veritabanı sorgusu yoktur.
+# Kuyruğu dolan (yavaş) istemci düşürülür; yeniden bağlanınca snapshot alır.
+
+SUBSCRIBER_QUEUE_SIZE = 256
+
+def _json_default(o):
+    if isinstance(o, datetime): return o.isoformat()
+    raise TypeError(f"{type(o).__name__} JSON'a çevrilemez")
+
+def encode_sse(event: str, data) -> bytes:
+    return f"event: {event}\ndata: {json.dumps(data, default=_json_default, ensure_ascii=False)}\n\n".encode()
+
+class EventBroadcaster:
+    def __init__(self, queue_size: int = SUBSCRIBER_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self._subscribers: Set[asyncio.Queue] = set()
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def subscribe(self) -> asyncio.Queue:
+        q: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers.add(q)
+        return q
+
+    def unsubscribe(self, q: asyncio.Queue):
+        self._subscribers.discard(q)
+
+    def publish(self, event: str, data) -> int:
+        """Olayı bir kez kodlar, tüm abonelere dağıtır. Ulaşılan abone sayısını döner."""
+        if not self._subscribers: return 0
+        frame = encode_sse(event, data)
+        for q in list(self._subscribers):
+            try:
+                q.put_nowait(frame)
+            except asyncio.QueueFull:
+                # Yavaş istemci: kuyruğunu boşalt, akışı kapatması için None bırak
+                self._subscribers.discard(q)
+                while not q.empty(): q.get_nowait()
+                q.put_nowait(None)
+                logger.warning("⚠️ Yavaş SSE istemcisi düşürüldü.")
+        return len(self._subscribers)
+
+# Uygulama genelinde tek yayıncı
+broadcaster = EventBroadcaster()
+
+async def stream_events(q: asyncio.Queue, snapshot: Optional[bytes] = None, keepalive_sec: float = 15,
+                        on_close: Optional[Callable[[], None]] = None):
+    """StreamingResponse için: önce snapshot, sonra yalnızca yeni kayıtlar."""
+    try:
+        if snapshot: yield snapshot
+        while True:
+            try:
+                frame = await asyncio.wait_for(q.get(), keepalive_sec)
+            except asyncio.TimeoutError:
+                yield b": ping\n\n"
+                continue
+            if frame is None: break
+            yield frame
+    finally:
+        if on_close is not None: on_close()
+        else: broadcaster.unsubscribe(q)
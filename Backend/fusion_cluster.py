@@ -0,0 +1,116 @@
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+from geo_grid import Cell, GRID_CELL_DEG, KM_PER_DEG_LAT
+
+# ==========================================
+#      VEKTÖREL ÇOKLU MERKEZ KÜMELEME
+# ==========================================
+# Penceredeki tüm sinyaller diziler halinde alınır, CLUSTER_CELL_KM'lik
+# ızgaraya yerleştirilir ve komşu (8 yönlü) dolu hücreler bağlı bileşen
+# olarak kümelenir. Her küme için PGA ağırlıklı merkez üssü ve istatistikler
+# tek vektörel geçişte (np.bincount) hesaplanır. Örtüşmeyen depremler ayrı
+# kümelere düşer; sonuç tetikleyen sinyale bağlı değildir.
+
+CLUSTER_CELL_KM = 5.0
+_NEIGHBOURS = [(di, dj) for di in (-1, 0, 1) for dj in (-1, 0, 1) if (di, dj) != (0, 0)]
+_KEY_SPAN = 1 << 20  # hücre (i, j) -> tek tamsayı anahtar
+
+def _keys(i: np.ndarray, j: np.ndarray) -> np.ndarray:
+    return i.astype(np.int64) * _KEY_SPAN + (j.astype(np.int64) + _KEY_SPAN // 2)
+
+def _unkey(keys: np.ndarray):
+    return keys // _KEY_SPAN, keys % _KEY_SPAN - _KEY_SPAN // 2
+
+def _connected_components(cell_i: np.ndarray, cell_j: np.ndarray) -> np.ndarray:
+    """Sıralı tekil hücreler için 8-komşuluk bağlı bileşen etiketleri (min etiket yayılımı)."""
+    keys = _keys(cell_i, cell_j)
+    n = len(keys)
+    labels = np.arange(n)
+    # Her yön için komşu hücrenin indeksi (yoksa kendisi)
+    neighbour_idx = []
+    for di, dj in _NEIGHBOURS:
+        nk = _keys(cell_i + di, cell_j + dj)
+        pos = np.searchsorted(keys, nk)
+        pos_c = np.minimum(pos, n - 1)
+        found = keys[pos_c] == nk
+        neighbour_idx.append(np.where(found, pos_c, np.arange(n)))
+    while True:
+        new = labels.copy()
+        for idx in neighbour_idx:
+            np.minimum(new, labels[idx], out=new)
+        new = new[new]  # yol kısaltma
+        if np.array_equal(new, labels):
+            return labels
+        labels = new
+
+def cluster_signals(
+    user_ids: Sequence, pga: Sequence[float], lat: Sequence[float], lng: Sequence[float],
+    cell_km: float = CLUSTER_CELL_KM, max_pga: Optional[float] = None,
+    dirty_cells: Optional[Iterable[Cell]] = None, dirty_cell_deg: float = GRID_CELL_DEG,
+) -> List[Dict]:
+    """
+    Sinyal penceresini kümeler. Kullanıcı başına en yüksek PGA'lı okuma kullanılır
+    (user_ids tamsayı kod da olabilir; SignalIndex.window() öyle döner).
+    dirty_cells verilirse sadece bu (SignalIndex) hücrelerine dokunan kümeler döner.
+    Her küme: signal_count (tekil kullanıcı), avg_pga, max_pga, center_lat,
+    center_lng (PGA ağırlıklı), radius_km (merkezden en uzak üye).
+    """
+    if len(pga) == 0: return []
+    pga = np.asarray(pga, dtype=np.float64)
+    lat = np.asarray(lat, dtype=np.float64)
+    lng = np.asarray(lng, dtype=np.float64)
+    uid = np.asarray(user_ids)
+    if max_pga is not None:
+        ok = pga <= max_pga
+        pga, lat, lng, uid = pga[ok], lat[ok], lng[ok], uid[ok]
+        if len(pga) == 0: return []
+
+    # Kullanıcı başına tek okuma (en yüksek PGA)
+    order = np.lexsort((-pga, uid))
+    first = np.ones(len(order), dtype=bool)
+    first[1:] = uid[order[1:]] != uid[order[:-1]]
+    keep = order[first]
+    pga, lat, lng = pga[keep], lat[keep], lng[keep]
+
+    # Yerel düzlem izdüşümü (km) ve ızgara
+    km_per_deg_lng = KM_PER_DEG_LAT * np.cos(np.radians(lat.mean()))
+    ci = np.floor(lat * KM_PER_DEG_LAT / cell_km).astype(np.int64)
+    cj = np.floor(lng * km_per_deg_lng / cell_km).astype(np.int64)
+    ukeys, inverse = np.unique(_keys(ci, cj), return_inverse=True)
+    cell_labels = _connected_components(*_unkey(ukeys))
+    _, label = np.unique(cell_labels[inverse], return_inverse=True)
+    k = label.max() + 1
+
+    # Küme istatistikleri (tek geçiş)
+    count = np.bincount(label, minlength=k)
+    sum_pga = np.bincount(label, weights=pga, minlength=k)
+    w_lat = np.bincount(label, weights=pga * lat, minlength=k)
+    w_lng = np.bincount(label, weights=pga * lng, minlength=k)
+    mean_lat = np.bincount(label, weights=lat, minlength=k) / count
+    mean_lng = np.bincount(label, weights=lng, minlength=k) / count
+    has_w = sum_pga > 0
+    c_lat = np.where(has_w, w_lat / np.where(has_w, sum_pga, 1), mean_lat)
+    c_lng = np.where(has_w, w_lng / np.where(has_w, sum_pga, 1), mean_lng)
+    peak = np.zeros(k)
+    np.maximum.at(peak, label, pga)
+    dist = np.hypot((lat - c_lat[label]) * KM_PER_DEG_LAT, (lng - c_lng[label]) * km_per_deg_lng)
+    radius = np.zeros(k)
+    np.maximum.at(radius, label, dist)
+
+    selected = np.arange(k)
+    if dirty_cells is not None:
+        dirty_ij = np.array(list(dirty_cells), dtype=np.int64).reshape(-1, 2)
+        dirty = _keys(dirty_ij[:, 0], dirty_ij[:, 1])
+        sig_cells = _keys(np.floor(lat / dirty_cell_deg), np.floor(lng / dirty_cell_deg))
+        selected = np.unique(label[np.isin(sig_cells, dirty)])
+
+    return [{
+        'signal_count': int(count[c]),
+        'avg_pga': float(sum_pga[c] / count[c]),
+        'max_pga': float(peak[c]),
+        'center_lat': float(c_lat[c]),
+        'center_lng': float(c_lng[c]),
+        'radius_km': float(radius[c]),
+    } for c in selected]
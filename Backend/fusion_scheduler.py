@@ -0,0 +1,113 @@
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from geo_grid import Cell, haversine_km
+from metrics import FUSION_TICK_SECONDS
+
+logger = logging.getLogger("KENET-FUSION")
+
+# ==========================================
+#      BİRLEŞTİRİCİ FÜZYON ZAMANLAYICISI
+# ==========================================
+# Her sinyal için ayrı füzyon görevi başlatmak yerine, sinyalin düştüğü
+# hücre "kirli" olarak işaretlenir. Her tick'te (varsayılan 250 ms) o ana
+# kadar kirlenen hücrelerin hepsi tek bir değerlendirmeye verilir; her hücre
+# tick başına yalnızca bir kez değerlendirilir.
+
+FUSION_TICK_MS = 250
+
+class FusionScheduler:
+    def __init__(self, evaluate: Callable[[Dict[Cell, Tuple[float, float]]], Awaitable[None]], tick_ms: int = FUSION_TICK_MS):
+        self.evaluate = evaluate
+        self.tick_sec = tick_ms / 1000
+        # hücre -> hücreyi kirleten son sinyalin konumu
+        self._dirty: Dict[Cell, Tuple[float, float]] = {}
+        self._task: Optional[asyncio.Task] = None
+        self.ticks = 0
+        self.evaluations = 0
+        self.last_tick_ms = 0.0
+        self.max_tick_ms = 0.0
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._dirty)
+
+    def mark_dirty(self, cell: Cell, lat: float, lng: float):
+        self._dirty[cell] = (lat, lng)
+
+    def clear(self):
+        self._dirty.clear()
+
+    async def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try: await self._task
+            except asyncio.CancelledError: pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.tick_sec)
+            if self._dirty:
+                await self.tick()
+
+    async def tick(self):
+        batch, self._dirty = self._dirty, {}
+        start = time.perf_counter()
+        try:
+            await self.evaluate(batch)
+        except Exception as e:
+            logger.error(f"Füzyon değerlendirme hatası: {e}")
+        self.ticks += 1
+        self.evaluations += len(batch)
+        elapsed = time.perf_counter() - start
+        FUSION_TICK_SECONDS.observe(elapsed)
+        self.last_tick_ms = elapsed * 1000
+        self.max_tick_ms = max(self.max_tick_ms, self.last_tick_ms)
+
+    def stats(self) -> Dict:
+        return {
+            'queue_depth': self.queue_depth,
+            'ticks': self.ticks,
+            'evaluations': self.evaluations,
+            'last_tick_ms': round(self.last_tick_ms, 3),
+            'max_tick_ms': round(self.max_tick_ms, 3),
+        }
+
+# ==========================================
+#      BELLEK İÇİ OLAY TEKİLLEŞTİRME
+# ==========================================
+
+class EventDedup:
+    """
+    Aynı bölgede (radius_km) son window_sec içinde olay varsa yenisini engeller.
+    claim() içinde await yoktur; kontrol ve kayıt tek adımda yapılır, yarış olmaz.
+    """
+    def __init__(self, radius_km: float = 20, window_sec: float = 300):
+        self.radius_km = radius_km
+        self.window_sec = window_sec
+        self._events: List[Tuple[float, float, float]] = []  # (zaman, lat, lng)
+
+    def claim(self, lat: float, lng: float, now: Optional[float] = None) -> bool:
+        now = now if now is not None else time.monotonic()
+        cutoff = now - self.window_sec
+        self._events = [e for e in self._events if e[0] > cutoff]
+        for _, e_lat, e_lng in self._events:
+            if haversine_km(lat, lng, e_lat, e_lng) <= self.radius_km:
+                return False
+        self._events.append((now, lat, lng))
+        return True
+
+    def release(self, lat: float, lng: float):
+        """Kayıt başarısız olursa bölgeyi tekrar serbest bırakır."""
+        self._events = [e for e in self._events if (e[1], e[2]) != (lat, lng)]
+
+    def seed(self, lat: float, lng: float, age_sec: float):
+        """Başlangıçta veritabanındaki son olaylarla doldurmak için."""
+        self._events.append((time.monotonic() - age_sec, lat, lng))
@@ -0,0 +1,36 @@
+import math
+from typing import List, Tuple
+
+# ==========================================
+#      MEKANSAL IZGARA YARDIMCILARI
+# ==========================================
+
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEG_LAT = 111.32
+GRID_CELL_DEG = 0.1  # ~11 km (enlem yönünde)
+
+Cell = Tuple[int, int]
+
+def haversine_km(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    """İki nokta arasındaki büyük daire mesafesi (km)."""
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    dp = p2 - p1
+    dl = math.radians(lng2 - lng1)
+    a = math.sin(dp / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(dl / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+def cell_of(lat: float, lng: float, cell_deg: float = GRID_CELL_DEG) -> Cell:
+    """Koordinatın düştüğü ızgara hücresi."""
+    return (math.floor(lat / cell_deg), math.floor(lng / cell_deg))
+
+def cell_center(cell: Cell, cell_deg: float = GRID_CELL_DEG) -> Tuple[float, float]:
+    return ((cell[0] + 0.5) * cell_deg, (cell[1] + 0.5) * cell_deg)
+
+def cells_in_radius(lat: float, lng: float, radius_km: float, cell_deg: float = GRID_CELL_DEG) -> List[Cell]:
+    """Merkezden radius_km içindeki noktaları kapsayabilecek tüm hücreler."""
+    d_lat = radius_km / KM_PER_DEG_LAT
+    cos_lat = max(math.cos(math.radians(lat)), 0.01)
+    d_lng = radius_km / (KM_PER_DEG_LAT * cos_lat)
+    lat0, lng0 = cell_of(lat - d_lat, lng - d_lng, cell_deg)
+    lat1, lng1 = cell_of(lat + d_lat, lng + d_lng, cell_deg)
+    return [(i, j) for i in range(lat0, lat1 + 1) for j in range(lng0, lng1 + 1)]
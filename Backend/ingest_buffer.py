@@ -0,0 +1,119 @@
+import asyncio
+import logging
+import os
+from typing import List, Optional, Tuple
+
+import database
+
+logger = logging.getLogger("KENET-INGEST")
+
+# ==========================================
+#      MİKRO-PARTİ SİNYAL KAYDI
+# ==========================================
+# /signal istekleri kuyruğa alınır; INGEST_FLUSH_MS dolunca ya da
+# INGEST_MAX_BATCH satır birikince hepsi tek seferde (COPY) yazılır.
+# Kullanıcı konumları ayrıca location_buffer üzerinden birleştirilerek yazılır.
+#
+# INGEST_ACK_MODE:
+#   "flush"   -> İstek, kendi satırı veritabanına yazılınca cevaplanır (varsayılan)
+#   "enqueue" -> İstek, kuyruğa girer girmez cevaplanır (en hızlı, çökmede kayıp olabilir)
+
+INGEST_FLUSH_MS = int(os.getenv("INGEST_FLUSH_MS", "5"))
+INGEST_MAX_BATCH = int(os.getenv("INGEST_MAX_BATCH", "500"))
+INGEST_ACK_MODE = os.getenv("INGEST_ACK_MODE", "flush").lower()
+
+SignalRecord = Tuple[str, float, float, float]  # (user_id, pga, lat, lng)
+
+class SignalIngestBuffer:
+    def __init__(self, flush_ms: int = INGEST_FLUSH_MS, max_batch: int = INGEST_MAX_BATCH, ack_mode: str = INGEST_ACK_MODE):
+        if ack_mode not in ("flush", "enqueue"):
+            raise ValueError(f"Geçersiz INGEST_ACK_MODE: {ack_mode}")
+        self.flush_sec = flush_ms / 1000
+        self.max_batch = max_batch
+        self.ack_mode = ack_mode
+        self._pending: List[SignalRecord] = []
+        # (future, başlangıç, bitiş): isteğin _pending içindeki kayıt aralığı
+        self._waiters: List[Tuple[asyncio.Future, int, int]] = []
+        self._has_data = asyncio.Event()
+        self._full = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._pending)
+
+    async def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Döngüyü durdurur ve kuyrukta kalanları yazar."""
+        if self._task:
+            self._task.cancel()
+            try: await self._task
+            except asyncio.CancelledError: pass
+            self._task = None
+        await self._flush(*self._take())
+
+    async def submit(self, user_id: str, pga: float, lat: float, lng: float) -> Optional[bool]:
+        """
+        flush modunda satır yazıldıysa True, kullanıcı bilinmiyor / satır
+        geçersizse False döner (yalnızca bu istek etkilenir). enqueue modunda None.
+        """
+        _check_user_id(user_id)
+        result = await self._enqueue([(user_id, pga, lat, lng)])
+        return result[0] if result is not None else None
+
+    async def submit_many(self, records: List[SignalRecord]) -> Optional[List[bool]]:
+        """Röle cihazlarından gelen partiyi tek seferde kuyruğa alır (aynı flush'a düşer)."""
+        if not records: return []
+        for rec in records: _check_user_id(rec[0])
+        return await self._enqueue(records)
+
+    async def _enqueue(self, records: List[SignalRecord]):
+        start = len(self._pending)
+        self._pending.extend(records)
+        fut = None
+        if self.ack_mode == "flush":
+            fut = asyncio.get_running_loop().create_future()
+            self._waiters.append((fut, start, len(self._pending)))
+        self._has_data.set()
+        if len(self._pending) >= self.max_batch:
+            self._full.set()
+        return await fut if fut is not None else None
+
+    def _take(self):
+        batch, self._pending = self._pending, []
+        waiters, self._waiters = self._waiters, []
+        self._has_data.clear()
+        self._full.clear()
+        return batch, waiters
+
+    async def _run(self):
+        while True:
+            await self._has_data.wait()
+            if len(self._pending) < self.max_batch:
+                try: await asyncio.wait_for(self._full.wait(), self.flush_sec)
+                except asyncio.TimeoutError: pass
+            await self._flush(*self._take())
+
+    async def _flush(self, batch: List[SignalRecord], waiters):
+        if not batch: return
+        try:
+            # Hatalı / bilinmeyen kullanıcılı satırlar partiyi düşürmez, False işaretlenir
+            written = await database.insert_seismic_signals_bulk(batch)
+        except Exception as e:
+            logger.error(f"❌ Sinyal partisi yazılamadı ({len(batch)} satır): {e}")
+            for fut, _, _ in waiters:
+                if not fut.done(): fut.set_exception(e)
+            return
+        rejected = len(written) - sum(written)
+        if rejected:
+            logger.warning(f"⚠️ {rejected} sinyal satırı reddedildi (bilinmeyen kullanıcı / geçersiz veri).")
+        for fut, start, end in waiters:
+            if not fut.done(): fut.set_result(written[start:end])
+
+def _check_user_id(user_id: str):
+    # CHAR(8)'e sığmayan id paylaşılan COPY partisini bozmasın: kuyruğa girmeden reddet
+    if not isinstance(user_id, str) or not user_id or len(user_id) > database.USER_ID_LEN:
+        raise ValueError(f"Geçersiz user_id: {user_id!r}")
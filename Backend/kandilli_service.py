@@ -1,80 +1,181 @@
-import requests
-import xmltodict
+import asyncio
+import hashlib
+import io
+import os
+import time
+import xml.etree.ElementTree as ET
 from datetime import datetime
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
 import logging
 import database  # <-- DÜZELTME BURADA: Modülü import ediyoruz
+from coordination import coordinator
+from metrics import registry
 
-logger = logging.getLogger("KANDILLI-SERVICE")
+if TYPE_CHECKING:
+    import aiohttp
 
-# Kandilli XML URL
-KANDILLI_URL = "http://udim.koeri.boun.edu.tr/zeqmap/xmlt/son24saat.xml"
+logger = logging.getLogger("KANDILLI-SERVICE")
 
-async def fetch_and_store_kandilli_data():
+# Kandilli XML URL (Test için yerel sunucu veya file:///yol/son24saat.xml verilebilir)
+KANDILLI_URL = os.getenv("KANDILLI_URL", "http://udim.koeri.boun.edu.tr/zeqmap/xmlt/son24saat.xml")
+KANDILLI_TIMEOUT_SEC = 10
+
+# Çalıştırmalar arası durum: koşullu istek başlıkları, içerik özeti ve
+# en son kaydedilen deprem (external_id = Kandilli tarih damgası, sıralanabilir)
+_session: Optional["aiohttp.ClientSession"] = None
+_etag: Optional[str] = None
+_last_modified: Optional[str] = None
+_content_hash: Optional[str] = None
+_watermark: Optional[str] = None
+
+# Son çalıştırmanın aşama süreleri (ms) ve sonucu
+last_run_stats: Dict = {}
+
+KANDILLI_STAGE_SECONDS = registry.histogram(
+    "kenet_kandilli_stage_duration_seconds", "Kandilli aktarım aşamalarının süresi.", ("stage",))
+KANDILLI_RUNS = registry.counter(
+    "kenet_kandilli_runs_total", "Kandilli aktarım çalışmaları (ok / not_modified / same_content / error / no_db).", ("outcome",))
+KANDILLI_NEW_ROWS = registry.counter("kenet_kandilli_new_rows_total", "Kaydedilen yeni resmi depremler.")
+
+async def _get_session() -> "aiohttp.ClientSession":
+    global _session
+    import aiohttp  # ilk istek öncesi yüklemeyi uzatmasın diye burada
+    if _session is None or _session.closed:
+        _session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=KANDILLI_TIMEOUT_SEC))
+    return _session
+
+async def close_kandilli_session():
+    global _session
+    if _session is not None:
+        await _session.close()
+        _session = None
+
+def _read_file(path: str) -> bytes:
+    with open(path, 'rb') as f:
+        return f.read()
+
+async def fetch_feed(url: str) -> Optional[Tuple[bytes, Optional[str], Optional[str]]]:
+    """
+    Beslemeyi olay döngüsünü bloklamadan çeker: (içerik, ETag, Last-Modified).
+    Değişmemişse (304) None döner. file:// adresleri fixture testleri içindir.
+    Doğrulayıcıları çağıran, içerik kaydedildikten sonra saklar (remember_validators):
+    kayıt başarısız olursa sonraki istek 304 alıp depremleri atlamasın.
+    """
+    parsed = urlparse(url)
+    if parsed.scheme == "file":
+        return await asyncio.to_thread(_read_file, parsed.path), None, None
+
+    headers = {}
+    if _etag: headers["If-None-Match"] = _etag
+    if _last_modified: headers["If-Modified-Since"] = _last_modified
+
+    session = await _get_session()
+    async with session.get(url, headers=headers) as response:
+        if response.status == 304:
+            return None
+        if response.status != 200:
+            raise RuntimeError(f"Kandilli verisi çekilemedi. Kod: {response.status}")
+        return await response.read(), response.headers.get("ETag"), response.headers.get("Last-Modified")
+
+def remember_validators(etag: Optional[str], last_modified: Optional[str]):
+    global _etag, _last_modified
+    _etag, _last_modified = etag, last_modified
+
+def parse_new_earthquakes(content: bytes, watermark: Optional[str]) -> List[Dict]:
+    """
+    XML'i akış halinde okur. Besleme yeniden eskiye sıralı olduğundan
+    watermark'a (son kaydedilen external_id) ulaşınca durur.
+    Dönüş eskiden yeniye sıralıdır.
+    """
+    rows = []
+    for _, elem in ET.iterparse(io.BytesIO(content), events=("start",)):
+        if elem.tag != "earhquake":
+            continue
+        a = elem.attrib
+        date_str = a.get('name')
+        if not date_str:
+            continue
+        if watermark and date_str <= watermark:
+            break
+        try:
+            rows.append({
+                'external_id': date_str,
+                'title': a['lokasyon'].strip(),
+                'magnitude': float(a['mag']),
+                'depth': float(a['Depth']),
+                'latitude': float(a['lat']),
+                'longitude': float(a['lng']),
+                'occurred_at': datetime.strptime(date_str, "%Y.%m.%d %H:%M:%S"),
+            })
+        except (KeyError, ValueError):
+            continue
+    rows.reverse()
+    return rows
+
+async def fetch_and_store_kandilli_data(url: str = KANDILLI_URL):
     """
     Arka planda çalışacak görev.
-    Kandilli'den son depremleri çeker ve veritabanına yazar.
+    Kandilli'den son depremleri çeker ve sadece yenilerini tek seferde yazar.
     """
+    global _content_hash, _watermark, last_run_stats
+    stats = {'fetch_ms': 0.0, 'parse_ms': 0.0, 'store_ms': 0.0, 'new': 0, 'skipped': None}
+    t0 = time.perf_counter()
     try:
-        # 1. İstek At
-        response = requests.get(KANDILLI_URL, timeout=10)
+        # Kandilli işleri arka plan havuzunda çalışır
+        if database.background_pool is None:
+            logger.error("Veritabanı havuzu henüz başlatılmamış!")
+            stats['skipped'] = "no_db"
+            return
 
-        if response.status_code != 200:
-            logger.error(f"Kandilli verisi çekilemedi. Kod: {response.status_code}")
+        # 1. İstek At (koşullu)
+        fetched = await fetch_feed(url)
+        t1 = time.perf_counter()
+        stats['fetch_ms'] = (t1 - t0) * 1000
+        if fetched is None:
+            stats['skipped'] = "not_modified"
             return
+        content, etag, last_modified = fetched
 
-        # 2. XML Parsing
-        data = xmltodict.parse(response.content)
+        # 2. İçerik değişmediyse parse etme
+        digest = hashlib.sha256(content).hexdigest()
+        if digest == _content_hash:
+            remember_validators(etag, last_modified)
+            stats['skipped'] = "same_content"
+            return
 
-        # XML yapısı bazen tek deprem olunca liste değil dict döner
-        raw_list = data.get('eqlist', {}).get('earhquake', [])
-        if isinstance(raw_list, dict):
-            raw_list = [raw_list]
+        if _watermark is None:
+            _watermark = await database.get_latest_earthquake_external_id()
 
-        if not raw_list:
-            return
+        # 3. XML Parsing (watermark'ta durur)
+        rows = parse_new_earthquakes(content, _watermark)
+        t2 = time.perf_counter()
+        stats['parse_ms'] = (t2 - t1) * 1000
 
-        new_count = 0
+        # 4. Tek toplu upsert
+        new_rows = [dict(r) for r in await database.insert_confirmed_earthquakes_bulk(rows)] if rows else []
+        stats['store_ms'] = (time.perf_counter() - t2) * 1000
+        stats['new'] = len(new_rows)
 
-        # 3. Veritabanı Bağlantısı Al
-        # DÜZELTME BURADA: database.pool kullanıyoruz
-        if database.pool is None:
-            logger.error("Veritabanı havuzu henüz başlatılmamış!")
-            return
+        _content_hash = digest
+        remember_validators(etag, last_modified)
+        if rows:
+            _watermark = max(_watermark or "", rows[-1]['external_id'])
 
-        async with database.pool.acquire() as conn:
-            # Listeyi tersten (eskiden yeniye) işle
-            for eq in reversed(raw_list):
-                try:
-                    # XML'den verileri al
-                    date_str = eq['@name']
-                    loc_raw = eq['@lokasyon']
-                    lat = float(eq['@lat'])
-                    lng = float(eq['@lng'])
-                    mag = float(eq['@mag'])
-                    depth = float(eq['@Depth'])
-
-                    title = loc_raw.strip()
-                    occurred_at = datetime.strptime(date_str, "%Y.%m.%d %H:%M:%S")
-
-                    # 4. Veritabanına Ekle
-                    query = """
-                        INSERT INTO confirmed_earthquakes
-                        (external_id, title, magnitude, depth, latitude, longitude, occurred_at)
-                        VALUES ($1, $2, $3, $4, $5, $6, $7)
-                        ON CONFLICT (external_id) DO NOTHING
-                        RETURNING id
-                    """
-
-                    result = await conn.fetchval(query, date_str, title, mag, depth, lat, lng, occurred_at)
-
-                    if result:
-                        new_count += 1
-
-                except Exception as e:
-                    continue
-
-        if new_count > 0:
-            logger.info(f"🌍 {new_count} yeni resmi deprem kaydedildi.")
+        if new_rows:
+            logger.info(f"🌍 {len(new_rows)} yeni resmi deprem kaydedildi.")
+            # Bağlı istemcilere (tüm workerlarda) sadece yeni kayıtları gönder; önbellek orada eskitilir
+            for row in new_rows:
+                await coordinator.announce("confirmed_earthquake", row)
 
     except Exception as e:
-        logger.error(f"Kandilli Servis Genel Hatası: {e}")
\ No newline at end of file
+        stats['skipped'] = "error"
+        logger.error(f"Kandilli Servis Genel Hatası: {e}")
+    finally:
+        stats['total_ms'] = (time.perf_counter() - t0) * 1000
+        last_run_stats = stats
+        for stage in ("fetch", "parse", "store", "total"):
+            if stats.get(f"{stage}_ms"): KANDILLI_STAGE_SECONDS.observe(stats[f"{stage}_ms"] / 1000, stage)
+        KANDILLI_RUNS.inc(stats['skipped'] or "ok")
+        KANDILLI_NEW_ROWS.inc(amount=stats['new'])
+        logger.debug(f"Kandilli aşama süreleri: {stats}")
@@ -0,0 +1,91 @@
+import asyncio
+import logging
+import os
+import time
+from typing import Dict, Optional, Tuple
+
+import database
+from geo_grid import haversine_km
+
+logger = logging.getLogger("KENET-LOCATION")
+
+# ==========================================
+#      KONUM YAZMA BİRLEŞTİRİCİ
+# ==========================================
+# /update_location ve /signal konumları doğrudan users satırına yazmaz.
+# Kullanıcı başına son konum tutulur (son yazan kazanır) ve LOCATION_FLUSH_SEC
+# aralıklarla tek UPDATE ... FROM unnest(...) ile yazılır. Son yazılan konuma
+# göre LOCATION_MIN_MOVE_M'den az hareket atılır; ancak last_seen en geç
+# LAST_SEEN_REFRESH_SEC'de bir yenilenir (1 saatlik aktiflik penceresi için
+# yeterli hassasiyet).
+
+LOCATION_FLUSH_SEC = float(os.getenv("LOCATION_FLUSH_SEC", "5"))
+LOCATION_MIN_MOVE_M = float(os.getenv("LOCATION_MIN_MOVE_M", "50"))
+LAST_SEEN_REFRESH_SEC = float(os.getenv("LAST_SEEN_REFRESH_SEC", "300"))
+
+class LocationBuffer:
+    def __init__(self, flush_sec: float = LOCATION_FLUSH_SEC, min_move_m: float = LOCATION_MIN_MOVE_M, refresh_sec: float = LAST_SEEN_REFRESH_SEC):
+        self.flush_sec = flush_sec
+        self.min_move_km = min_move_m / 1000
+        self.refresh_sec = refresh_sec
+        self._pending: Dict[str, Tuple[float, float]] = {}
+        # user_id -> (lat, lng, yazılma zamanı)
+        self._written: Dict[str, Tuple[float, float, float]] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._last_cleanup = time.monotonic()
+        self.received = 0
+        self.dropped = 0
+        self.written = 0
+
+    def update(self, user_id: str, lat: float, lng: float, now: Optional[float] = None):
+        now = now if now is not None else time.monotonic()
+        self.received += 1
+        last = self._written.get(user_id)
+        if (last is not None and user_id not in self._pending
+                and now - last[2] < self.refresh_sec
+                and haversine_km(lat, lng, last[0], last[1]) < self.min_move_km):
+            self.dropped += 1
+            return
+        self._pending[user_id] = (lat, lng)
+
+    async def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try: await self._task
+            except asyncio.CancelledError: pass
+            self._task = None
+        await self.flush()
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.flush_sec)
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"❌ Konum yazımı başarısız: {e}")
+
+    async def flush(self):
+        if not self._pending: return
+        batch, self._pending = self._pending, {}
+        try:
+            await database.update_user_locations_bulk(batch)
+        except Exception:
+            # Yazılamayanları geri koy (bu arada gelen daha yeni konumu ezme)
+            for uid, loc in batch.items():
+                self._pending.setdefault(uid, loc)
+            raise
+        now = time.monotonic()
+        for uid, (lat, lng) in batch.items():
+            self._written[uid] = (lat, lng, now)
+        self.written += len(batch)
+        # 1 saatten uzun süredir yazılmayanları dakikada bir unut (bellek sınırı)
+        if now - self._last_cleanup > 60:
+            self._last_cleanup = now
+            self._written = {u: w for u, w in self._written.items() if now - w[2] < 3600}
+
+    def stats(self) -> Dict:
+        return {'pending': len(self._pending), 'received': self.received, 'dropped': self.dropped, 'written': self.written}
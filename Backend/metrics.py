@@ -0,0 +1,193 @@
+import functools
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, List, Sequence, Tuple
+
+# ==========================================
+#      PROMETHEUS METRİKLERİ (/metrics)
+# ==========================================
+# Bağımlılıksız, küçük bir metrik kaydı. Sıcak yolda yapılan iş bir
+# perf_counter farkı ve bisect ile kova sayacı artırmaktır; metin çıktı
+# yalnızca /metrics çağrıldığında üretilir. Kuyruk derinliği gibi anlık
+# değerler kayıt sırasında verilen fonksiyonlarla okunur (gauge callback).
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+Labels = Tuple[str, ...]
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _label_str(names: Sequence[str], values: Labels, extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra: parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+def _fmt(v: float) -> str:
+    if v == float("inf"): return "+Inf"
+    return repr(float(v)) if isinstance(v, float) else str(v)
+
+class Counter:
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Labels, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1):
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        for labels, v in self._values.items():
+            lines.append(f"{self.name}{_label_str(self.labelnames, labels)} {_fmt(v)}")
+        return lines
+
+class Histogram:
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        # etiketler -> [kova sayıları (+Inf dahil, kümülatif değil), toplam, adet]
+        self._series: Dict[Labels, list] = {}
+
+    def observe(self, value: float, *labels: str):
+        s = self._series.get(labels)
+        if s is None:
+            s = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        s[0][bisect_left(self.buckets, value)] += 1
+        s[1] += value
+        s[2] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        for labels, (counts, total, n) in self._series.items():
+            cumulative = 0
+            for bound, c in zip(self.buckets + (float("inf"),), counts):
+                cumulative += c
+                le = 'le="%s"' % _fmt(bound)
+                lines.append(f"{self.name}_bucket{_label_str(self.labelnames, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_label_str(self.labelnames, labels)} {_fmt(total)}")
+            lines.append(f"{self.name}_count{_label_str(self.labelnames, labels)} {n}")
+        return lines
+
+class CallbackMetric:
+    """
+    Değeri /metrics anında okunan gauge/counter.
+    fn bir sayı ya da {etiket demeti: sayı} sözlüğü döner.
+    """
+    def __init__(self, name: str, documentation: str, fn: Callable, kind: str = "gauge", labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.fn = fn
+        self.kind = kind
+        self.labelnames = tuple(labelnames)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        value = self.fn()
+        if isinstance(value, dict):
+            for labels, v in value.items():
+                if v is None: continue
+                lines.append(f"{self.name}{_label_str(self.labelnames, labels)} {_fmt(v)}")
+        elif value is not None:
+            lines.append(f"{self.name} {_fmt(value)}")
+        return lines
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics = []
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._add(Counter(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self._add(Histogram(name, documentation, labelnames, buckets))
+
+    def gauge_callback(self, name: str, documentation: str, fn: Callable, labelnames: Sequence[str] = ()):
+        return self._add(CallbackMetric(name, documentation, fn, "gauge", labelnames))
+
+    def counter_callback(self, name: str, documentation: str, fn: Callable, labelnames: Sequence[str] = ()):
+        return self._add(CallbackMetric(name, documentation, fn, "counter", labelnames))
+
+    def _add(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for m in self._metrics:
+            try:
+                lines.extend(m.render())
+            except Exception as e:
+                # Bir toplayıcının hatası tüm çıktıyı bozmasın
+                lines.append(f"# {m.name} okunamadı: {_escape(e)}")
+        return "\n".join(lines) + "\n"
+
+# Uygulama genelinde tek kayıt
+registry = MetricsRegistry()
+
+HTTP_REQUEST_SECONDS = registry.histogram(
+    "kenet_http_request_duration_seconds",
+    "İstek başından yanıt başlığına kadar geçen süre (SSE için bağlantı süresi değil).",
+    ("method", "route", "status"))
+DB_ACQUIRE_WAIT_SECONDS = registry.histogram(
+    "kenet_db_pool_acquire_wait_seconds", "Havuzdan bağlantı almak için beklenen süre.", ("pool",))
+DB_QUERY_SECONDS = registry.histogram(
+    "kenet_db_query_duration_seconds", "database.py içindeki adlandırılmış sorguların süresi (bağlantı beklemesi dahil).",
+    ("query",))
+DB_QUERY_ERRORS = registry.counter(
+    "kenet_db_query_errors_total", "Hata ile biten adlandırılmış sorgular.", ("query",))
+FUSION_TICK_SECONDS = registry.histogram(
+    "kenet_fusion_tick_duration_seconds", "Bir füzyon tick'inin (kümeleme + değerlendirme) süresi.")
+
+def timed_query(fn):
+    """database.py fonksiyonları için: süreyi fonksiyon adıyla kaydeder."""
+    name = fn.__name__
+
+    @functools.wraps(fn)
+    async def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return await fn(*args, **kwargs)
+        except Exception:
+            DB_QUERY_ERRORS.inc(name)
+            raise
+        finally:
+            DB_QUERY_SECONDS.observe(time.perf_counter() - start, name)
+    return wrapper
+
+class MetricsMiddleware:
+    """
+    Saf ASGI ara katmanı (BaseHTTPMiddleware'in akış maliyeti yok).
+    Rota, FastAPI'nin eşleştirdiği yol şablonudur (/users/{id} gibi); eşleşmeyen
+    istekler tek "unmatched" etiketinde toplanır, etiket sayısı sınırlı kalır.
+    """
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        start = time.perf_counter()
+        recorded = False
+
+        def record(status):
+            nonlocal recorded
+            if recorded: return
+            recorded = True
+            route = scope.get("route")
+            HTTP_REQUEST_SECONDS.observe(time.perf_counter() - start, scope["method"],
+                                         getattr(route, "path", "unmatched"), str(status))
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                record(message["status"])
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except Exception:
+            record(500)
+            raise
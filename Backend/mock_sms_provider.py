@@ -0,0 +1,51 @@
+"""
+Netgsm uyumlu sahte SMS sağlayıcısı (çevrimdışı yük testi için).
+
+Kullanım:
+    python mock_sms_provider.py --port 9100 --latency-ms 80 --fail-rate 0.05
+    SMS_PROVIDER_URL=http://127.0.0.1:9100/sms/send/get uvicorn app:app
+"""
+import argparse
+import asyncio
+import itertools
+import random
+
+from aiohttp import web
+
+def build_app(latency_ms: float, fail_rate: float, error_rate: float) -> web.Application:
+    ids = itertools.count(1)
+    stats = {'accepted': 0, 'rejected': 0, 'errors': 0}
+
+    async def send(request: web.Request) -> web.Response:
+        # Sağlayıcı gecikmesini taklit et (±%50)
+        await asyncio.sleep(latency_ms / 1000 * random.uniform(0.5, 1.5))
+        if not request.query.get("gsmno") or not request.query.get("message"):
+            stats['rejected'] += 1
+            return web.Response(text="30")  # Netgsm: geçersiz parametre
+        r = random.random()
+        if r < error_rate:
+            stats['errors'] += 1
+            return web.Response(status=503, text="Service Unavailable")
+        if r < error_rate + fail_rate:
+            stats['rejected'] += 1
+            return web.Response(text="70")  # Netgsm: hatalı sorgulama
+        stats['accepted'] += 1
+        return web.Response(text=f"00 {next(ids)}")
+
+    async def get_stats(request: web.Request) -> web.Response:
+        return web.json_response(stats)
+
+    app = web.Application()
+    app.router.add_get("/sms/send/get", send)
+    app.router.add_get("/stats", get_stats)
+    return app
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sahte Netgsm SMS sağlayıcısı")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--latency-ms", type=float, default=50)
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="Netgsm hata kodu dönen istek oranı")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="HTTP 503 dönen istek oranı")
+    args = parser.parse_args()
+    web.run_app(build_app(args.latency_ms, args.fail_rate, args.error_rate), host=args.host, port=args.port)
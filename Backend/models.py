@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional, List
+from typing import Optional, List, Any
 from datetime import datetime
 
 # --- Temel Modeller ---
@@ -53,11 +53,47 @@ class SeismicSignalRequest(BaseModel):
     latitude: float
     longitude: float
 
+# Röle (BLE / Wi-Fi Direct) cihazlarının topladığı sinyaller.
+# Öğeler ham alınır; hatalı bir öğe tüm partiyi düşürmez, tek tek raporlanır.
+class SeismicSignalBatchRequest(BaseModel):
+    signals: List[Any]
+
 # --- Yanıt (Response) Modelleri ---
 class StatusResponse(BaseModel):
     message: str
     user_id: Optional[str] = None
 
+class SignalBatchItemResult(BaseModel):
+    index: int
+    accepted: bool
+    error: Optional[str] = None
+
+class SignalBatchResponse(BaseModel):
+    accepted: int
+    rejected: int
+    results: List[SignalBatchItemResult]
+
+class SmsQueueStatsResponse(BaseModel):
+    queue_depth: int
+    sent: int
+    failed: int
+    retries: int
+
+class UserCacheStatsResponse(BaseModel):
+    size: int
+    hits: int
+    misses: int
+    hit_rate: float
+
+class FusionStatsResponse(BaseModel):
+    queue_depth: int
+    ticks: int
+    evaluations: int
+    last_tick_ms: float
+    max_tick_ms: float
+    coordination: str
+    is_leader: bool
+
 class VerifyOtpResponse(BaseModel):
     is_new_user: bool
     user_id: str
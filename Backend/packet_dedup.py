@@ -0,0 +1,46 @@
+from collections import OrderedDict
+
+# ==========================================
+#      SON GÖRÜLEN PAKETLER (LRU Filtresi)
+# ==========================================
+# Mesh ağı aynı packet_uid'yi defalarca teslim eder. Bu süreçte yakın zamanda
+# görülen UID'ler Postgres'e gitmeden reddedilir. Filtre sınırlıdır; taşan
+# eski UID'ler için asıl garanti sms_logs üzerindeki atomik INSERT'tir.
+# UID ilk kopya kuyruğa yazılana (INSERT commit) kadar "işlemde" durur: o arada
+# gelen kopya "Duplicate." almaz (ilk kopya hâlâ başarısız olabilir), tekrar
+# denenebilir bir yanıt alır.
+
+SEEN_PACKET_CAPACITY = 100_000
+
+NEW, IN_FLIGHT, DONE = "new", "in_flight", "done"
+
+class SeenPacketFilter:
+    def __init__(self, capacity: int = SEEN_PACKET_CAPACITY):
+        self.capacity = capacity
+        # uid -> kuyruğa yazıldı mı
+        self._seen: "OrderedDict[str, bool]" = OrderedDict()
+        self.hits = 0
+
+    def add(self, uid: str) -> str:
+        """UID yeni ise işlemde olarak kaydeder ve NEW döner; görülmüşse IN_FLIGHT ya da DONE."""
+        done = self._seen.get(uid)
+        if done is not None:
+            self._seen.move_to_end(uid)
+            self.hits += 1
+            return DONE if done else IN_FLIGHT
+        self._seen[uid] = False
+        if len(self._seen) > self.capacity:
+            self._seen.popitem(last=False)
+        return NEW
+
+    def mark_done(self, uid: str):
+        """İlk kopya kuyruğa yazıldı (ya da sms_logs'ta zaten vardı): sonraki kopyalar Duplicate."""
+        if uid in self._seen:
+            self._seen[uid] = True
+
+    def discard(self, uid: str):
+        """İşlenemeyen paket (ör. kullanıcı yok) tekrar denenebilsin diye çıkarılır."""
+        self._seen.pop(uid, None)
+
+    def __len__(self) -> int:
+        return len(self._seen)
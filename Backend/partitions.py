@@ -0,0 +1,204 @@
+"""
+seismic_signals tablosunun saatlik bölümleme (partition) yönetimi.
+
+Kullanım (Backend klasöründen):
+    python partitions.py migrate    # Tek seferlik: tabloyu RANGE (created_at) bölümlü yapıya çevirir
+    python partitions.py maintain   # İleri bölümleri açar, süresi dolanları düşürür / ayırır
+
+Uygulama açıkken bakım işi zamanlayıcı ile 30 dakikada bir (yalnızca liderde) çalışır.
+"""
+import asyncio
+import logging
+import os
+import sys
+from datetime import datetime, timedelta
+from typing import List
+
+import database
+import queries
+
+logger = logging.getLogger("KENET-PARTITIONS")
+
+TABLE = "seismic_signals"
+PARTITION_AHEAD_HOURS = int(os.getenv("SIGNAL_PARTITION_AHEAD_HOURS", "6"))
+PARTITION_RETENTION_HOURS = int(os.getenv("SIGNAL_PARTITION_RETENTION_HOURS", "48"))
+# "drop": eski bölüm silinir, "detach": tablodan ayrılıp arşiv tablosu olarak kalır
+PARTITION_RETENTION_MODE = os.getenv("SIGNAL_PARTITION_RETENTION_MODE", "drop")
+
+DEFAULT_PARTITION = f"{TABLE}_default"
+
+def partition_name(hour: datetime) -> str:
+    return f"{TABLE}_p{hour:%Y%m%d%H}"
+
+async def is_partitioned(conn) -> bool:
+    return await conn.fetchval(f"SELECT relkind = 'p' FROM pg_class WHERE oid = '{TABLE}'::regclass")
+
+async def _db_hour(conn) -> datetime:
+    # created_at, oturum saat dilimindeki NOW() ile dolduğu için sınırlar da DB saatinden hesaplanır
+    return await conn.fetchval("SELECT date_trunc('hour', NOW()::timestamp)")
+
+async def ensure_partitions(conn, ahead_hours: int = PARTITION_AHEAD_HOURS, back_hours: int = 0) -> List[str]:
+    """Şu anki saatten ahead_hours ilerisine kadar eksik saatlik bölümleri açar."""
+    now_hour = await _db_hour(conn)
+    created = []
+    for h in range(-back_hours, ahead_hours + 1):
+        start = now_hour + timedelta(hours=h)
+        name = partition_name(start)
+        exists = await conn.fetchval("SELECT to_regclass($1) IS NOT NULL", name)
+        if exists: continue
+        end = start + timedelta(hours=1)
+        bounds = f"FROM ('{start:%Y-%m-%d %H:%M:%S}') TO ('{end:%Y-%m-%d %H:%M:%S}')"
+        try:
+            # Dış işlem (migrate) içindeyken savepoint olur: başarısız bölüm işlemi bozmaz
+            async with conn.transaction():
+                if await _default_has_rows(conn, start, end):
+                    await _create_from_default(conn, name, start, end, bounds)
+                else:
+                    await conn.execute(f"CREATE TABLE {name} PARTITION OF {TABLE} FOR VALUES {bounds}")
+            created.append(name)
+        except Exception as e:
+            logger.error(f"Bölüm açılamadı ({name}): {e}")
+    return created
+
+async def _default_has_rows(conn, start: datetime, end: datetime) -> bool:
+    if not await conn.fetchval("SELECT to_regclass($1) IS NOT NULL", DEFAULT_PARTITION): return False
+    return await conn.fetchval(
+        f"SELECT EXISTS (SELECT 1 FROM {DEFAULT_PARTITION} WHERE created_at >= $1 AND created_at < $2)", start, end)
+
+async def _create_from_default(conn, name: str, start: datetime, end: datetime, bounds: str):
+    """
+    Bakım gecikmiş, bu saatin satırları varsayılan bölüme düşmüş: CREATE ... PARTITION OF
+    çakışma hatası verir. Tablo ayrı kurulur, satırlar varsayılandan taşınır, sonra bağlanır
+    (ATTACH eksik indeks / FK / trigger'ları kendisi ekler).
+    """
+    await conn.execute(f"CREATE TABLE {name} (LIKE {TABLE} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)")
+    moved = await conn.execute(f"""
+        WITH moved AS (
+            DELETE FROM {DEFAULT_PARTITION} WHERE created_at >= $1 AND created_at < $2 RETURNING *
+        )
+        INSERT INTO {name} SELECT * FROM moved
+    """, start, end)
+    await conn.execute(f"ALTER TABLE {TABLE} ATTACH PARTITION {name} FOR VALUES {bounds}")
+    logger.warning(f"⚠️ Varsayılan bölümdeki satırlar {name} bölümüne taşındı ({moved}).")
+
+async def drop_expired_partitions(conn, retention_hours: int = PARTITION_RETENTION_HOURS, mode: str = PARTITION_RETENTION_MODE) -> List[str]:
+    """Üst sınırı saklama süresinden eski olan saatlik bölümleri (ve varsayılan bölümdeki eski satırları) siler veya ayırır."""
+    cutoff = await _db_hour(conn) - timedelta(hours=retention_hours)
+    rows = await conn.fetch("""
+        SELECT c.relname FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = $1::regclass
+    """, TABLE)
+    removed = []
+    prefix = f"{TABLE}_p"
+    for r in rows:
+        name = r['relname']
+        if not name.startswith(prefix): continue  # varsayılan bölüm vb.
+        try:
+            start = datetime.strptime(name[len(prefix):], "%Y%m%d%H")
+        except ValueError:
+            continue
+        if start + timedelta(hours=1) > cutoff: continue
+        if mode == "detach":
+            await conn.execute(f"ALTER TABLE {TABLE} DETACH PARTITION {name}")
+            await conn.execute(f"ALTER TABLE {name} RENAME TO {name}_archive")
+        else:
+            await conn.execute(f"DROP TABLE {name}")
+        removed.append(name)
+    removed += await _expire_default_rows(conn, cutoff, mode)
+    return removed
+
+async def _expire_default_rows(conn, cutoff: datetime, mode: str) -> List[str]:
+    """Varsayılan bölüm saatlik bölümlerle birlikte düşmez: saklama süresini aşan satırlar ayrıca temizlenir."""
+    if not await conn.fetchval("SELECT to_regclass($1) IS NOT NULL", DEFAULT_PARTITION): return []
+    async with conn.transaction():
+        if mode == "detach":
+            archive = f"{DEFAULT_PARTITION}_archive"
+            await conn.execute(f"CREATE TABLE IF NOT EXISTS {archive} (LIKE {TABLE} INCLUDING DEFAULTS)")
+            status = await conn.execute(f"""
+                WITH moved AS (DELETE FROM {DEFAULT_PARTITION} WHERE created_at < $1 RETURNING *)
+                INSERT INTO {archive} SELECT * FROM moved
+            """, cutoff)
+        else:
+            status = await conn.execute(f"DELETE FROM {DEFAULT_PARTITION} WHERE created_at < $1", cutoff)
+    # "DELETE n" / "INSERT 0 n"
+    return [f"{DEFAULT_PARTITION} ({status})"] if not status.endswith(" 0") else []
+
+async def migrate_seismic_signals(conn, retention_hours: int = PARTITION_RETENTION_HOURS):
+    """
+    Mevcut düz tabloyu seismic_signals_legacy adıyla kenara alır, aynı kolonlarla
+    RANGE (created_at) bölümlü yeni tabloyu kurar ve saklama süresi içindeki
+    satırları taşır. Eski tablo arşiv olarak kalır. Tekrar çalıştırmak güvenlidir.
+    """
+    if await is_partitioned(conn):
+        logger.info("seismic_signals zaten bölümlü.")
+        return
+    async with conn.transaction():
+        await conn.execute(f"""
+            ALTER TABLE {TABLE} RENAME TO {TABLE}_legacy;
+            ALTER INDEX IF EXISTS idx_signals_time RENAME TO idx_signals_time_legacy;
+            ALTER INDEX IF EXISTS idx_signals_loc RENAME TO idx_signals_loc_legacy;
+            DROP TRIGGER IF EXISTS trg_sync_signal_location ON {TABLE}_legacy;
+
+            CREATE TABLE {TABLE} (
+                id BIGINT NOT NULL DEFAULT nextval('{TABLE}_id_seq'),
+                user_id CHAR(8) REFERENCES users(user_id),
+                pga FLOAT NOT NULL,
+                latitude FLOAT NOT NULL,
+                longitude FLOAT NOT NULL,
+                location GEOMETRY(Point, 4326),
+                created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (id, created_at)
+            ) PARTITION BY RANGE (created_at);
+            ALTER SEQUENCE {TABLE}_id_seq OWNED BY {TABLE}.id;
+
+            -- Bölümlü indeksler: her bölüm kendi küçük indeksini taşır
+            CREATE INDEX idx_signals_time ON {TABLE}(created_at);
+            CREATE INDEX idx_signals_loc ON {TABLE} USING GIST (location);
+
+            -- Bakım gecikirse eklemeler hata vermesin
+            CREATE TABLE {DEFAULT_PARTITION} PARTITION OF {TABLE} DEFAULT;
+
+            CREATE TRIGGER trg_sync_signal_location
+            BEFORE INSERT OR UPDATE ON {TABLE}
+            FOR EACH ROW
+            EXECUTE FUNCTION sync_legacy_location();
+        """)
+        await ensure_partitions(conn, back_hours=retention_hours)
+        moved = await conn.execute(f"""
+            INSERT INTO {TABLE} (id, user_id, pga, latitude, longitude, location, created_at)
+            SELECT id, user_id, pga, latitude, longitude, location, created_at FROM {TABLE}_legacy
+            WHERE created_at >= date_trunc('hour', NOW()::timestamp) - ($1 || ' hours')::INTERVAL
+        """, str(retention_hours))
+    logger.info(f"✅ seismic_signals bölümlü yapıya taşındı ({moved}). Eski veriler: {TABLE}_legacy")
+
+async def maintain_partitions():
+    """Zamanlayıcı işi: ileri bölümleri aç, süresi dolanları kaldır."""
+    if database.background_pool is None: return
+    try:
+        async with queries.acquire(database.background_pool) as conn:
+            if not await is_partitioned(conn): return
+            created = await ensure_partitions(conn)
+            removed = await drop_expired_partitions(conn)
+        if created or removed:
+            logger.info(f"🗂️ Sinyal bölümleri: +{len(created)} açıldı, -{len(removed)} kaldırıldı.")
+    except Exception as e:
+        logger.error(f"Bölüm bakımı hatası: {e}")
+
+async def _main(cmd: str):
+    await database.connect_db()
+    try:
+        async with queries.acquire(database.background_pool) as conn:
+            if cmd == "migrate":
+                await migrate_seismic_signals(conn)
+            elif cmd == "maintain":
+                print("açıldı:", await ensure_partitions(conn))
+                print("kaldırıldı:", await drop_expired_partitions(conn))
+            else:
+                raise SystemExit(__doc__)
+    finally:
+        await database.close_db()
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(_main(sys.argv[1] if len(sys.argv) > 1 else ""))
@@ -0,0 +1,92 @@
+import asyncpg
+import contextlib
+import time
+from asyncpg.prepared_stmt import PreparedStatement
+from typing import Dict
+from metrics import DB_ACQUIRE_WAIT_SECONDS
+
+# ==========================================
+#      ADLI SORGULAR (açık kolon listeleri)
+# ==========================================
+# Her kullanım yeri yalnızca ihtiyaç duyduğu kolonları çeker: SELECT * users
+# satırıyla birlikte IBE anahtarlarını, konum geometrisini ve zaman damgalarını
+# da taşıyordu. Sorgular bağlantı başına bir kez hazırlanır (interactive havuzda
+# bağlantı açılırken, diğerlerinde ilk kullanımda) ve adıyla çağrılır:
+#     await fetchrow(pool, 'user_by_phone', phone)
+
+# Kimlik + anahtarlar: verify_otp, gateway göndereni, rehber sahibi (user_cache bunu tutar)
+USER_IDENTITY = "user_id, phone_number, display_name, blood_type, verification_code, ibe_private_key, public_params"
+
+QUERIES: Dict[str, str] = {
+    'user_by_phone': f"SELECT {USER_IDENTITY} FROM users WHERE phone_number = $1",
+    'user_by_id': f"SELECT {USER_IDENTITY} FROM users WHERE user_id = $1",
+    # /check_contacts: registered_user_item alanları (özel anahtar yok)
+    'registered_users': """
+        SELECT user_id, phone_number, display_name, blood_type, public_params, latitude, longitude
+        FROM users WHERE phone_number = ANY($1::text[])
+    """,
+    # /sync_contacts: sync_contact_item alanları
+    'user_contacts': """
+        SELECT c.contact_id, c.phone_number, c.display_name, u.latitude, u.longitude, u.public_params
+        FROM contacts c LEFT JOIN users u ON c.contact_id = u.user_id
+        WHERE c.owner_id = $1
+    """,
+    # $3: saat dilimsiz since (yanıtlardaki değerler gibi, olduğu gibi karşılaştırılır)
+    # $4: saat dilimli since, ::timestamp ile oturumun TimeZone'una çevrilir (database.since_args)
+    'app_events': """
+        SELECT id, latitude, longitude, intensity_label, max_pga, participating_users, created_at
+        FROM app_detected_events
+        WHERE created_at > NOW() - ($1 || ' hours')::INTERVAL
+        AND ($2::int IS NULL OR id > $2)
+        AND ($3::timestamp IS NULL OR created_at > $3)
+        AND ($4::timestamptz IS NULL OR created_at > $4::timestamp)
+        ORDER BY created_at DESC
+    """,
+    'confirmed_earthquakes': """
+        SELECT id, external_id, title, magnitude, depth, latitude, longitude, occurred_at
+        FROM confirmed_earthquakes
+        WHERE occurred_at > NOW() - ($1 || ' hours')::INTERVAL
+        AND ($2::int IS NULL OR id > $2)
+        AND ($3::timestamp IS NULL OR occurred_at > $3)
+        AND ($4::timestamptz IS NULL OR occurred_at > $4::timestamp)
+        ORDER BY occurred_at DESC
+    """,
+}
+
+class KenetConnection(asyncpg.Connection):
+    """Adlı sorguların hazırlanmış ifadelerini bağlantı ömrü boyunca tutar."""
+    __slots__ = ('_named',)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._named: Dict[str, PreparedStatement] = {}
+
+    async def named(self, name: str) -> PreparedStatement:
+        stmt = self._named.get(name)
+        if stmt is None:
+            stmt = self._named[name] = await self.prepare(QUERIES[name])
+        return stmt
+
+async def prepare_all(conn: KenetConnection):
+    """Havuz init kancası: ilk istek parse/plan beklemesin."""
+    for name in QUERIES:
+        await conn.named(name)
+
+# id(havuz) -> metrik etiketi (interactive / ingest / background); database.connect_db doldurur
+POOL_LABELS: Dict[int, str] = {}
+
+@contextlib.asynccontextmanager
+async def acquire(pool):
+    """pool.acquire() ile aynı; bağlantı için beklenen süre havuz etiketiyle ölçülür."""
+    start = time.perf_counter()
+    async with pool.acquire() as conn:
+        DB_ACQUIRE_WAIT_SECONDS.observe(time.perf_counter() - start, POOL_LABELS.get(id(pool), "other"))
+        yield conn
+
+async def fetch(pool, name: str, *args):
+    async with acquire(pool) as conn:
+        return await (await conn.named(name)).fetch(*args)
+
+async def fetchrow(pool, name: str, *args):
+    async with acquire(pool) as conn:
+        return await (await conn.named(name)).fetchrow(*args)
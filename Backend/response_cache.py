@@ -0,0 +1,58 @@
+import asyncio
+import hashlib
+import time
+from typing import Dict, Optional, Tuple
+
+# ==========================================
+#      SERİLEŞTİRİLMİŞ YANIT ÖNBELLEĞİ
+# ==========================================
+# Liste uç noktalarının JSON gövdesi bayt olarak saklanır ve ETag ile sunulur.
+# Yeni satır yazılınca ilgili anahtar silinir; 24 saatlik pencere kaydığı
+# için kayıtlar ayrıca ttl_sec sonunda da düşer.
+
+RESPONSE_CACHE_TTL_SEC = 60
+
+class ResponseCache:
+    def __init__(self, ttl_sec: float = RESPONSE_CACHE_TTL_SEC):
+        self.ttl_sec = ttl_sec
+        self._entries: Dict[str, Tuple[bytes, str, float]] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._versions: Dict[str, int] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[Tuple[bytes, str]]:
+        entry = self._entries.get(key)
+        if entry is None or entry[2] <= time.monotonic():
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry[0], entry[1]
+
+    def version(self, key: str) -> int:
+        return self._versions.get(key, 0)
+
+    def put(self, key: str, body: bytes, version: Optional[int] = None) -> str:
+        """
+        Gövdeyi saklar ve ETag'ini döner. version verilirse ve bu arada
+        invalidate() çağrıldıysa (gövde bayatladıysa) saklanmaz.
+        """
+        etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+        if version is None or version == self.version(key):
+            self._entries[key] = (body, etag, time.monotonic() + self.ttl_sec)
+        return etag
+
+    def lock(self, key: str) -> asyncio.Lock:
+        """Aynı anahtar için eşzamanlı ıskalarda tek istek veritabanına gitsin."""
+        lock = self._locks.get(key)
+        if lock is None:
+            lock = self._locks[key] = asyncio.Lock()
+        return lock
+
+    def invalidate(self, *keys: str):
+        for key in keys:
+            self._entries.pop(key, None)
+            self._versions[key] = self.version(key) + 1
+
+# Uygulama genelinde tek önbellek
+response_cache = ResponseCache()
@@ -0,0 +1,80 @@
+import time
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple
+
+from geo_grid import Cell, GRID_CELL_DEG, cell_of
+
+# ==========================================
+#   BELLEK İÇİ SİNYAL İNDEKSİ (Son N saniye)
+# ==========================================
+# Her hücre, (zaman, user_id, pga, lat, lng, kullanıcı kodu) kayıtlarını tutan bir
+# tampondur. Kayıtlar yalnızca yaşa göre (süresi dolunca baştan) atılır: adet sınırı
+# büyük depremde yoğun hücrelerin sinyallerini sessizce düşürüp olayı eksik sayardı.
+# Bellek, pencere süresi boyunca alınan sinyallerle (admission ile sınırlı) orantılıdır.
+# Postgres sadece kalıcı kayıt olarak kalır, füzyon sorguları buradan cevaplanır.
+
+Signal = Tuple[float, str, float, float, float, int]
+
+class SignalIndex:
+    def __init__(self, window_sec: float, cell_deg: float = GRID_CELL_DEG):
+        self.window_sec = window_sec
+        self.cell_deg = cell_deg
+        self.cells: Dict[Cell, Deque[Signal]] = {}
+        # user_id -> tamsayı kod (vektörel kümelemede string sıralamasından kaçınmak için).
+        # Pencereden çıkan kullanıcıların kodları prune'da silinir; kodlar yeniden
+        # kullanılmaz (sayaç), penceredeki eski kayıtlarla çakışmaz.
+        self._user_codes: Dict[str, int] = {}
+        self._next_code = 0
+
+    def add(self, user_id: str, pga: float, lat: float, lng: float, ts: Optional[float] = None) -> Cell:
+        """Yeni sinyali ilgili hücrenin tamponuna ekler."""
+        now = ts if ts is not None else time.monotonic()
+        cell = cell_of(lat, lng, self.cell_deg)
+        buf = self.cells.get(cell)
+        if buf is None:
+            buf = self.cells[cell] = deque()
+        self._evict(buf, now)
+        code = self._user_codes.get(user_id)
+        if code is None:
+            code = self._user_codes[user_id] = self._next_code
+            self._next_code += 1
+        buf.append((now, user_id, pga, lat, lng, code))
+        return cell
+
+    def _evict(self, buf: Deque[Signal], now: float):
+        cutoff = now - self.window_sec
+        while buf and buf[0][0] <= cutoff:
+            buf.popleft()
+
+    def prune(self, now: Optional[float] = None) -> int:
+        """Tüm hücrelerdeki eski sinyalleri atar, boş hücreleri siler."""
+        now = now if now is not None else time.monotonic()
+        for cell in list(self.cells):
+            buf = self.cells[cell]
+            self._evict(buf, now)
+            if not buf: del self.cells[cell]
+        return len(self)
+
+    def prune_user_codes(self) -> int:
+        """Zamanlayıcı işi: kodu tutulan ama penceresinde sinyali kalmayan kullanıcıları unutur."""
+        self.prune()
+        live = {s[1] for buf in self.cells.values() for s in buf}
+        self._user_codes = {uid: code for uid, code in self._user_codes.items() if uid in live}
+        return len(self._user_codes)
+
+    def window(self, now: Optional[float] = None) -> Tuple[List[int], List[float], List[float], List[float]]:
+        """Penceredeki tüm sinyaller, kümeleme için sütunlar halinde: (kullanıcı kodu, pga, lat, lng)."""
+        self.prune(now)
+        rows = [s for buf in self.cells.values() for s in buf]
+        if not rows:
+            return [], [], [], []
+        _, _, pga, lat, lng, codes = zip(*rows)
+        return list(codes), list(pga), list(lat), list(lng)
+
+    def clear(self):
+        self.cells.clear()
+        self._user_codes.clear()
+        self._next_code = 0
+
+    def __len__(self) -> int:
+        return sum(len(b) for b in self.cells.values())
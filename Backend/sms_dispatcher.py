@@ -0,0 +1,153 @@
+import asyncio
+import logging
+import os
+import random
+import time
+from typing import TYPE_CHECKING, Dict, Optional, Set, Tuple
+
+import database
+from utils import send_real_sms_via_provider
+
+if TYPE_CHECKING:
+    import aiohttp
+
+logger = logging.getLogger("KENET-SMS")
+
+# ==========================================
+#      GİDEN SMS KUYRUĞU (sms_logs destekli)
+# ==========================================
+# Gateway uç noktası mesajı PENDING olarak kaydeder ve hemen döner.
+# İşçiler tek bir bağlantı havuzlu HTTP oturumunu paylaşır, sağlayıcı başına
+# hız sınırına uyar ve başarısız gönderimleri üstel geri çekilmeyle tekrarlar.
+# Durum: PENDING -> SENT / FAILED. Her worker elindeki PENDING kayıtların
+# updated_at'ini SMS_LEASE_SEC dolmadan tazeler (kira). Kirası dolan kayıtlar
+# (çöken / kapanan worker) açılışta ve periyodik olarak, SKIP LOCKED ile tek bir
+# worker tarafından sahiplenilip kuyruğa alınır; çoklu workerda çift gönderim olmaz.
+
+SMS_WORKERS = int(os.getenv("SMS_WORKERS", "4"))
+SMS_PROVIDER = os.getenv("SMS_PROVIDER", "netgsm")
+SMS_RATE_PER_SEC = float(os.getenv("SMS_RATE_PER_SEC", "20"))
+SMS_MAX_ATTEMPTS = int(os.getenv("SMS_MAX_ATTEMPTS", "5"))
+SMS_BACKOFF_BASE_SEC = 1.0
+SMS_BACKOFF_MAX_SEC = 60.0
+SMS_LEASE_SEC = float(os.getenv("SMS_LEASE_SEC", "120"))
+
+# (packet_uid, hedef, mesaj, deneme sayısı)
+SmsJob = Tuple[str, str, str, int]
+
+class TokenBucket:
+    """Saniyede rate adet, en fazla burst kadar birikebilen jeton."""
+    def __init__(self, rate: float, burst: Optional[float] = None):
+        self.rate = rate
+        self.capacity = burst if burst is not None else max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+class SmsDispatcher:
+    def __init__(self, workers: int = SMS_WORKERS, rate_per_sec: float = SMS_RATE_PER_SEC, max_attempts: int = SMS_MAX_ATTEMPTS):
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.queue: "asyncio.Queue[SmsJob]" = asyncio.Queue()
+        self.limiters: Dict[str, TokenBucket] = {SMS_PROVIDER: TokenBucket(rate_per_sec)}
+        self.session: Optional["aiohttp.ClientSession"] = None
+        self._tasks = []
+        # Bu workerın sahip olduğu (kuyrukta / geri çekilmede / gönderimde) kayıtlar
+        self._held: Set[str] = set()
+        self.sent = 0
+        self.failed = 0
+        self.retries = 0
+
+    async def start(self):
+        if self._tasks: return
+        # Önce DB: başarısız olursa oturum açılmadan çıkılır, bootstrap tekrar dener
+        await self._claim_stale()
+        import aiohttp  # ilk istek öncesi yüklemeyi uzatmasın diye burada
+        connector = aiohttp.TCPConnector(limit=self.workers * 2, keepalive_timeout=60)
+        self.session = aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=15))
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._lease_loop()))
+
+    async def stop(self):
+        for t in self._tasks: t.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        if self.session:
+            await self.session.close()
+            self.session = None
+
+    async def enqueue(self, uid: str, sender: str, target: str, message: str) -> bool:
+        """
+        Mesajı PENDING olarak kalıcı yazar ve kuyruğa alır. Aynı uid varsa False.
+        INSERT ... ON CONFLICT DO NOTHING tekilleştirmenin asıl (yarışsız) garantisidir.
+        """
+        if not await database.enqueue_sms(uid, sender, target, message):
+            return False
+        self._held.add(uid)
+        self.queue.put_nowait((uid, target, message, 0))
+        return True
+
+    async def _claim_stale(self):
+        rows = await database.claim_stale_sms(SMS_LEASE_SEC)
+        for row in rows:
+            self._held.add(row['packet_uid'])
+            self.queue.put_nowait((row['packet_uid'], row['target_phone'], row['message_content'], row['attempts'] or 0))
+        if rows:
+            logger.info(f"📨 {len(rows)} sahipsiz bekleyen SMS kuyruğa alındı.")
+
+    async def _lease_loop(self):
+        while True:
+            await asyncio.sleep(SMS_LEASE_SEC / 3)
+            try:
+                if self._held:
+                    await database.renew_sms_leases(list(self._held))
+                await self._claim_stale()
+            except Exception as e:
+                logger.error(f"SMS kira yenileme hatası: {e}")
+
+    def stats(self) -> Dict:
+        return {'queue_depth': self.queue.qsize(), 'sent': self.sent, 'failed': self.failed, 'retries': self.retries}
+
+    async def _worker(self):
+        while True:
+            job = await self.queue.get()
+            try:
+                await self._deliver(job)
+            except Exception as e:
+                # Durum yazılamadı (finish / retry): kira tazelenmesin, SMS_LEASE_SEC
+                # dolunca kayıt _claim_stale ile (bu ya da başka worker) yeniden alınır
+                self._held.discard(job[0])
+                logger.error(f"SMS işçi hatası ({job[0]}), kira bırakıldı: {e}")
+            finally:
+                self.queue.task_done()
+
+    async def _deliver(self, job: SmsJob):
+        uid, target, message, attempts = job
+        await self.limiters[SMS_PROVIDER].acquire()
+        resp = await send_real_sms_via_provider(target, message, self.session)
+        attempts += 1
+        if resp.startswith("SUCCESS"):
+            await database.finish_sms(uid, "SENT", resp, attempts)
+            self._held.discard(uid)
+            self.sent += 1
+        elif attempts >= self.max_attempts:
+            await database.finish_sms(uid, "FAILED", resp, attempts)
+            self._held.discard(uid)
+            self.failed += 1
+            logger.warning(f"❌ SMS gönderilemedi ({uid}): {resp}")
+        else:
+            await database.mark_sms_retry(uid, resp, attempts)
+            self.retries += 1
+            delay = min(SMS_BACKOFF_MAX_SEC, SMS_BACKOFF_BASE_SEC * 2 ** (attempts - 1)) * random.uniform(0.5, 1.0)
+            asyncio.get_running_loop().call_later(delay, self.queue.put_nowait, (uid, target, message, attempts))
@@ -0,0 +1,78 @@
+import os
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+# ==========================================
+#      KULLANICI ÖNBELLEĞİ (LRU + TTL)
+# ==========================================
+# get_user_by_id / get_user_by_phone sonuçları user_id ve temiz telefon
+# numarası ile tutulur. database.py'deki yazma fonksiyonları ilgili kaydı
+# siler. Kayıtlar yalnızca kimlik/anahtar kolonlarını içerir (queries.USER_IDENTITY);
+# konum/last_seen okuyan çağıranlar önbelleği kullanmaz. Silmeler süreç içidir:
+# çoklu workerda OTP / anahtar doğrulayanlar (verify_otp) fresh=True ile DB'den okur.
+
+USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", "10000"))
+USER_CACHE_TTL_SEC = float(os.getenv("USER_CACHE_TTL_SEC", "60"))
+
+class UserCache:
+    def __init__(self, capacity: int = USER_CACHE_SIZE, ttl_sec: float = USER_CACHE_TTL_SEC):
+        self.capacity = capacity
+        self.ttl_sec = ttl_sec
+        self._by_id: "OrderedDict[str, Tuple[object, float]]" = OrderedDict()
+        self._phone_to_id: Dict[str, str] = {}
+        # Her silmede artar; okuma sırasında yazma olduysa bayat kayıt saklanmaz
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get_by_id(self, uid: str):
+        entry = self._by_id.get(uid)
+        if entry is None or entry[1] <= time.monotonic():
+            if entry is not None: self._remove(uid)
+            self.misses += 1
+            return None
+        self._by_id.move_to_end(uid)
+        self.hits += 1
+        return entry[0]
+
+    def get_by_phone(self, phone: str):
+        uid = self._phone_to_id.get(phone)
+        if uid is None:
+            self.misses += 1
+            return None
+        return self.get_by_id(uid)
+
+    def put(self, user, generation: int):
+        """Kaydı saklar; okuma başladıktan sonra bir silme olduysa (generation değiştiyse) saklamaz."""
+        if user is None or generation != self.generation:
+            return
+        uid = user['user_id']
+        self._remove(uid)
+        self._by_id[uid] = (user, time.monotonic() + self.ttl_sec)
+        self._phone_to_id[user['phone_number']] = uid
+        while len(self._by_id) > self.capacity:
+            self._remove(next(iter(self._by_id)))
+
+    def _remove(self, uid: str):
+        entry = self._by_id.pop(uid, None)
+        if entry is not None:
+            phone = entry[0]['phone_number']
+            if self._phone_to_id.get(phone) == uid:
+                del self._phone_to_id[phone]
+
+    def invalidate(self, uid: Optional[str] = None, phone: Optional[str] = None):
+        self.generation += 1
+        if phone is not None:
+            uid_by_phone = self._phone_to_id.get(phone)
+            if uid_by_phone is not None: self._remove(uid_by_phone)
+        if uid is not None:
+            self._remove(uid)
+
+    def stats(self) -> Dict:
+        total = self.hits + self.misses
+        return {'size': len(self._by_id), 'hits': self.hits, 'misses': self.misses,
+                'hit_rate': round(self.hits / total, 4) if total else 0.0}
+
+# Uygulama genelinde tek önbellek
+user_cache = UserCache()
@@ -1,8 +1,22 @@
 import hashlib
+import hmac
 import random
 import base64
+import os
+from typing import TYPE_CHECKING, Optional
 from nacl.public import PrivateKey
-# import aiohttp  # PRODUCTION'DA BURAYI AÇ
+from dotenv import load_dotenv
+
+if TYPE_CHECKING:
+    import aiohttp  # açılışı hızlandırmak için çalışma anında yüklenmez
+
+load_dotenv()
+
+# SMS sağlayıcı ayarları (Netgsm uyumlu GET API). Boşsa mock mod.
+# Çevrimdışı yük testi için: SMS_PROVIDER_URL=http://127.0.0.1:9100/sms/send/get (mock_sms_provider.py)
+SMS_PROVIDER_URL = os.getenv("SMS_PROVIDER_URL", "")
+NETGSM_USERCODE = os.getenv("NETGSM_USERCODE", "")
+NETGSM_PASSWORD = os.getenv("NETGSM_PASSWORD", "")
 
 def generate_short_id(phone: str) -> str:
     """Telefon numarasından unique ID üretir."""
@@ -23,6 +37,30 @@ def generate_user_keys():
     # Bizim mimarimizde public_key, 'public_params' alanında veya rehberde tutulur.
     return priv_b64, pub_b64
 
+# /alerts/stream imzasının geçerli sayıldığı saat farkı (sn)
+ALERT_STREAM_MAX_SKEW_SEC = int(os.getenv("ALERT_STREAM_MAX_SKEW_SEC", "300"))
+
+def alert_stream_signature(priv_b64: str, user_id: str, ts: int) -> str:
+    """
+    /alerts/stream kimlik kanıtı: HMAC-SHA256(özel anahtar, "user_id:ts"), hex.
+    Özel anahtar yalnızca OTP doğrulamasından geçmiş istemcide (ve sunucuda) bulunur.
+    """
+    key = base64.b64decode(priv_b64)
+    return hmac.new(key, f"{user_id}:{ts}".encode(), hashlib.sha256).hexdigest()
+
+_HEX_DIGITS = frozenset("0123456789abcdef")
+
+def verify_alert_stream_signature(priv_b64: Optional[str], user_id: str, ts: int, sig: str, now: float) -> bool:
+    if not priv_b64 or abs(now - ts) > ALERT_STREAM_MAX_SKEW_SEC: return False
+    # compare_digest ASCII dışı str'de TypeError fırlatır: 64 hex dışı her şey geçersiz
+    sig = sig.lower()
+    if len(sig) != 64 or not _HEX_DIGITS.issuperset(sig): return False
+    try:
+        expected = alert_stream_signature(priv_b64, user_id, ts)
+    except ValueError:
+        return False
+    return hmac.compare_digest(expected, sig)
+
 def generate_otp() -> str:
     return str(random.randint(1000, 9999))
 
@@ -34,25 +72,26 @@ def generate_public_params():
     _, pub = generate_user_keys()
     return pub
 
-async def send_real_sms_via_provider(target_phone: str, message: str) -> str:
+async def send_real_sms_via_provider(target_phone: str, message: str, session: Optional["aiohttp.ClientSession"] = None) -> str:
     """
     SMS Sağlayıcı Entegrasyonu (Netgsm / Twilio).
+    SMS_PROVIDER_URL boşsa mock modda çalışır. Oturum (session) çağıran taraftan
+    gelir; böylece tüm gönderimler aynı bağlantı havuzunu kullanır.
     """
     print(f"📡 [SMS API OUT] Hedef: {target_phone} | Mesaj: '{message}'")
 
     # --- MOCK MODU (Test İçin) ---
-    return "SUCCESS: Mock Provider Accepted"
+    if not SMS_PROVIDER_URL or session is None:
+        return "SUCCESS: Mock Provider Accepted"
 
-    # --- NETGSM PRODUCTION MODU (Kullanmak İçin Yorumları Kaldır) ---
-    """
-    api_url = "https://api.netgsm.com.tr/sms/send/get"
+    # --- NETGSM PRODUCTION MODU ---
     # Telefon formatı temizliği (5xxxxxxxxx)
     clean_phone = target_phone.replace("+90", "").replace("+", "").replace(" ", "")
     if clean_phone.startswith("0"): clean_phone = clean_phone[1:]
 
     payload = {
-        "usercode": "NETGSM_KULLANICI_ADINIZ",
-        "password": "NETGSM_SIFRENIZ",
+        "usercode": NETGSM_USERCODE,
+        "password": NETGSM_PASSWORD,
         "gsmno": clean_phone,
         "message": message,
         "msgheader": "KENET",
@@ -61,14 +100,12 @@ async def send_real_sms_via_provider(target_phone: str, message: str) -> str:
     }
 
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(api_url, params=payload) as response:
-                result = await response.text()
-                # 00 ile başlıyorsa başarılıdır
-                if result.startswith("00"):
-                    return f"SUCCESS: {result}"
-                else:
-                    return f"FAILED: {result}"
+        async with session.get(SMS_PROVIDER_URL, params=payload) as response:
+            result = await response.text()
+            # 00 ile başlıyorsa başarılıdır
+            if response.status == 200 and result.startswith("00"):
+                return f"SUCCESS: {result}"
+            else:
+                return f"FAILED: {result}"
     except Exception as e:
         return f"FAILED: Connection Error {str(e)}"
-    """
\ No newline at end of file
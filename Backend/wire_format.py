@@ -0,0 +1,104 @@
+import struct
+import zlib
+from typing import List, NamedTuple, Optional, Sequence, Tuple
+
+# ==========================================
+#      İKİLİ İSTEK BİÇİMLERİ (Content-Type ile seçilir)
+# ==========================================
+# Deprem sonrası tıkalı hücresel hatlarda JSON + base64 yükü yaklaşık 3-4 kat
+# büyütür. Aynı uç noktalar aşağıdaki sabit düzenli biçimleri de kabul eder;
+# Content-Type belirtilmezse ya da application/json ise eski yol çalışır.
+# Gövde (ikili ya da JSON) isteğe bağlı olarak Content-Encoding: deflate / gzip ile
+# sıkıştırılabilir.
+#
+# application/x-kenet-signal  (/signal: 1 kayıt, /signals/batch: N kayıt, 20 bayt/kayıt)
+#     user_id 8s (ASCII, kısa id'ler \0 ile doldurulur) | pga f32 | latitude f32 | longitude f32
+#     float32 koordinat çözünürlüğü ~0.5 m; little-endian.
+#
+# application/x-kenet-gateway (/send_gateway_sms)
+#     4 x u8 uzunluk: packet_uid, sender_id, sender_phone, target_phone
+#     bu dört alan (UTF-8)
+#     nonce 24 | ephemeral_key 32 | integrity_tag 16 (ham bayt, base64 yok)
+#     şifreli içerik (kalan tüm baytlar)
+
+SIGNAL_CONTENT_TYPE = "application/x-kenet-signal"
+GATEWAY_CONTENT_TYPE = "application/x-kenet-gateway"
+
+SIGNAL_RECORD = struct.Struct("<8sfff")
+GATEWAY_HEADER = struct.Struct("<BBBB")
+NONCE_SIZE, PUBLIC_KEY_SIZE, TAG_SIZE = 24, 32, 16
+
+# Sıkıştırılmış gövde açılırken üst sınır (sıkıştırma bombasına karşı)
+MAX_INFLATED_BYTES = 1 << 20
+
+class WireFormatError(ValueError):
+    pass
+
+class GatewayPacket(NamedTuple):
+    packet_uid: str
+    sender_id: str
+    sender_phone: str
+    target_phone: str
+    nonce: bytes
+    ephemeral_key: bytes
+    integrity_tag: bytes
+    ciphertext: bytes
+
+def media_type(content_type: Optional[str]) -> str:
+    return (content_type or "").split(";", 1)[0].strip().lower()
+
+def inflate(body: bytes, content_encoding: Optional[str], limit: int = MAX_INFLATED_BYTES) -> bytes:
+    encoding = (content_encoding or "identity").strip().lower()
+    if encoding == "identity": return body
+    if encoding not in ("deflate", "gzip"):
+        raise WireFormatError(f"Desteklenmeyen Content-Encoding: {encoding}")
+    # MAX_WBITS | 32: zlib ve gzip başlığını kendisi tanır
+    d = zlib.decompressobj(zlib.MAX_WBITS | 32)
+    try:
+        out = d.decompress(body, limit)
+    except zlib.error as e:
+        raise WireFormatError(f"Sıkıştırılmış gövde açılamadı: {e}")
+    if d.unconsumed_tail:
+        raise WireFormatError("Açılan gövde çok büyük.")
+    return out
+
+# --- Sinyal ---
+
+def encode_signals(records: Sequence[Tuple[str, float, float, float]]) -> bytes:
+    pack = SIGNAL_RECORD.pack
+    return b"".join(pack(uid.encode("ascii"), pga, lat, lng) for uid, pga, lat, lng in records)
+
+def decode_signals(body: bytes) -> List[Tuple[str, float, float, float]]:
+    if not body or len(body) % SIGNAL_RECORD.size:
+        raise WireFormatError(f"Gövde {SIGNAL_RECORD.size} baytlık kayıtlardan oluşmalı.")
+    try:
+        return [(uid.rstrip(b"\0").decode("ascii"), pga, lat, lng) for uid, pga, lat, lng in SIGNAL_RECORD.iter_unpack(body)]
+    except UnicodeDecodeError:
+        raise WireFormatError("user_id ASCII olmalı.")
+
+# --- Gateway paketi ---
+
+def encode_gateway(p: GatewayPacket) -> bytes:
+    fields = [p.packet_uid.encode(), p.sender_id.encode(), p.sender_phone.encode(), p.target_phone.encode()]
+    return b"".join([GATEWAY_HEADER.pack(*map(len, fields)), *fields, p.nonce, p.ephemeral_key, p.integrity_tag, p.ciphertext])
+
+def decode_gateway(body: bytes) -> GatewayPacket:
+    if len(body) < GATEWAY_HEADER.size:
+        raise WireFormatError("Gateway başlığı eksik.")
+    lengths = GATEWAY_HEADER.unpack_from(body)
+    pos = GATEWAY_HEADER.size
+    fields = []
+    for n in lengths:
+        fields.append(body[pos:pos + n])
+        pos += n
+    crypto_end = pos + NONCE_SIZE + PUBLIC_KEY_SIZE + TAG_SIZE
+    if len(body) < crypto_end:
+        raise WireFormatError("Gateway paketi kısa.")
+    try:
+        packet_uid, sender_id, sender_phone, target_phone = (f.decode() for f in fields)
+    except UnicodeDecodeError:
+        raise WireFormatError("Gateway alanları UTF-8 olmalı.")
+    nonce = body[pos:pos + NONCE_SIZE]
+    key = body[pos + NONCE_SIZE:pos + NONCE_SIZE + PUBLIC_KEY_SIZE]
+    tag = body[crypto_end - TAG_SIZE:crypto_end]
+    return GatewayPacket(packet_uid, sender_id, sender_phone, target_phone, nonce, key, tag, body[crypto_end:])